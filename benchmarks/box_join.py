@@ -0,0 +1,73 @@
+"""
+Scaling benchmark of the text/shape joins in src/shapes.py on synthetic
+charts (benchmarks/synthetic.py): enclosing_box for every text element and
+fit_cover of every element against the connector lines, scanning all the
+shapes versus querying a GridIndex / SegmentIndex. Also checks that both
+give the same results.
+
+Usage:
+    python benchmarks/box_join.py [--sizes 100,1000,5000] [--repeat 3]
+
+The scans are quadratic: 5,000 nodes takes over a minute.
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "benchmarks"))
+
+from src.extraction_cache import load_pages
+from src.extractor import pdf_shapes
+from src.shapes import SegmentIndex, enclosing_box, fit_cover
+from src.spatial import GridIndex
+from src.word_groups import group_elements
+from synthetic import generate_orgchart
+
+def join(elements, boxes, use_index):
+    index = GridIndex(boxes) if use_index else None
+    return [enclosing_box(e, boxes, index) for e in elements]
+
+def covers(elements, boxes, segments, box_of, use_index):
+    index = SegmentIndex(segments) if use_index else None
+    return [fit_cover({'x': e['x'] - 0.5, 'y': e['y'] - 0.5, 'w': e['w'] + 1, 'h': e['h'] + 1}, e,
+                      boxes[box] if box is not None else None, segments, index)
+            for e, box in zip(elements, box_of)]
+
+def best_of(fn, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best * 1000, result
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="enclosing_box / fit_cover: shape scan vs index")
+    parser.add_argument("--sizes", default="100,1000,5000", help="Node counts (comma separated)")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'nodes':>6} {'elements':>9} {'shapes':>7} {'join scan ms':>13} {'index ms':>9} "
+          f"{'cover scan ms':>14} {'index ms':>9}  result")
+    with tempfile.TemporaryDirectory() as workdir:
+        for n_nodes in (int(s) for s in args.sizes.split(",")):
+            chart = generate_orgchart(n_nodes, workdir)
+            page = load_pages(chart['pdf_path'], cache_dir=os.path.join(workdir, "cache"))[0]
+            elements = group_elements(page['words'], page['height'])
+            shapes = pdf_shapes(page, 0)
+            boxes, segments = shapes['boxes'], shapes['segments']
+
+            join_scan_ms, scan_boxes = best_of(lambda: join(elements, boxes, False), args.repeat)
+            join_index_ms, index_boxes = best_of(lambda: join(elements, boxes, True), args.repeat)
+            cover_scan_ms, scan_covers = best_of(
+                lambda: covers(elements, boxes, segments, index_boxes, False), args.repeat)
+            cover_index_ms, index_covers = best_of(
+                lambda: covers(elements, boxes, segments, index_boxes, True), args.repeat)
+            same = "identical" if (scan_boxes, scan_covers) == (index_boxes, index_covers) else "MISMATCH"
+            print(f"{n_nodes:6} {len(elements):9} {len(boxes) + len(segments):7} {join_scan_ms:13.2f} "
+                  f"{join_index_ms:9.2f} {cover_scan_ms:14.2f} {cover_index_ms:9.2f}  {same}")
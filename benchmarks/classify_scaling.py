@@ -0,0 +1,55 @@
+"""
+Scaling benchmark of src.extractor.classify_text_element: full page
+scan per element versus the NeighborIndex, on synthetic charts
+(benchmarks/synthetic.py). Also checks that both give the same labels.
+
+Usage:
+    python benchmarks/classify_scaling.py [--sizes 100,1000,5000] [--repeat 3]
+
+The scan is quadratic: 10,000 nodes (20,000 elements) takes minutes.
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "benchmarks"))
+
+from src.extractor import NeighborIndex, classify_text_element
+from src.extraction_cache import load_pages
+from src.word_groups import group_elements
+from synthetic import generate_orgchart
+
+def classify(elements, use_index):
+    index = NeighborIndex(elements) if use_index else None
+    return [classify_text_element(e['text'], e['y'], elements, index) for e in elements]
+
+def best_of(fn, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best * 1000, result
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="classify_text_element: page scan vs NeighborIndex")
+    parser.add_argument("--sizes", default="100,1000,5000", help="Node counts (comma separated)")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'nodes':>6} {'elements':>9} {'scan ms':>11} {'index ms':>9} {'speedup':>8}  labels")
+    with tempfile.TemporaryDirectory() as workdir:
+        for n_nodes in (int(s) for s in args.sizes.split(",")):
+            chart = generate_orgchart(n_nodes, workdir)
+            page = load_pages(chart['pdf_path'], cache_dir=os.path.join(workdir, "cache"))[0]
+            elements = group_elements(page['words'], page['height'])
+
+            scan_ms, scan_labels = best_of(lambda: classify(elements, False), args.repeat)
+            index_ms, index_labels = best_of(lambda: classify(elements, True), args.repeat)
+            same = "identical" if scan_labels == index_labels else "MISMATCH"
+            print(f"{n_nodes:6} {len(elements):9} {scan_ms:11.2f} {index_ms:9.2f} {scan_ms / index_ms:7.0f}x  {same}")
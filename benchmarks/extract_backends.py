@@ -0,0 +1,75 @@
+"""
+Checks the pikepdf extraction backend (src/content_text.py) against
+pdfplumber and times both: every PDF in input/templates/ plus, optionally,
+synthetic charts (benchmarks/synthetic.py). Words and chars must be equal
+field by field, and boxes and segments (src/shapes.py) too; exits with
+status 1 otherwise.
+
+Usage:
+    python benchmarks/extract_backends.py [--sizes 100,1000] [--repeat 3]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "benchmarks"))
+
+from src.content_text import read_pages
+from src.extraction_cache import CHAR_FIELDS, WORD_FIELDS, parse_page_range
+from synthetic import generate_orgchart
+
+TEMPLATES_DIR = os.path.join(ROOT, "input", "templates")
+
+def best_of(fn, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best * 1000, result
+
+def differences(reference, pages):
+    """Number of words, chars, shapes or page sizes that differ."""
+    if len(reference) != len(pages):
+        return abs(len(reference) - len(pages))
+    count = 0
+    for ref, page in zip(reference, pages):
+        count += (ref['width'], ref['height']) != (page['width'], page['height'])
+        for key, fields in (('words', WORD_FIELDS), ('chars', CHAR_FIELDS)):
+            mine = [{f: obj[f] for f in fields if f in obj} for obj in page[key]]
+            count += abs(len(ref[key]) - len(mine)) + sum(a != b for a, b in zip(ref[key], mine))
+        for key in ('boxes', 'segments'):
+            count += abs(len(ref[key]) - len(page[key])) + sum(a != b for a, b in zip(ref[key], page[key]))
+    return count
+
+def compare(label, pdf_path, repeat):
+    plumber_ms, reference = best_of(lambda: parse_page_range(pdf_path, {}), repeat)
+    pikepdf_ms, pages = best_of(lambda: read_pages(pdf_path), repeat)
+    diffs = differences(reference, pages)
+    words = sum(len(page['words']) for page in reference)
+    print(f"{label:28} {words:7} {plumber_ms:13.1f} {pikepdf_ms:11.1f} "
+          f"{plumber_ms / pikepdf_ms:7.1f}x  {'identical' if not diffs else f'{diffs} DIFFERENCES'}")
+    return diffs
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="pikepdf content-stream extraction vs pdfplumber")
+    parser.add_argument("--sizes", default="", help="Synthetic chart node counts too (comma separated)")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'pdf':28} {'words':>7} {'pdfplumber ms':>13} {'pikepdf ms':>11} {'speedup':>8}  result")
+    failures = 0
+    for name in sorted(f for f in os.listdir(TEMPLATES_DIR) if f.endswith(".pdf")):
+        failures += compare(os.path.splitext(name)[0], os.path.join(TEMPLATES_DIR, name), args.repeat)
+
+    with tempfile.TemporaryDirectory() as workdir:
+        for n_nodes in (int(s) for s in args.sizes.split(",") if s):
+            chart = generate_orgchart(n_nodes, workdir)
+            failures += compare(chart['org_id'], chart['pdf_path'], args.repeat)
+
+    sys.exit(1 if failures else 0)
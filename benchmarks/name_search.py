@@ -0,0 +1,81 @@
+"""
+Latency of the person search (src/text_index.py) over many names:
+substring search with the trigram index, and the typo-tolerant
+FuzzyIndex fallback, with one random typo per query.
+
+Usage:
+    python benchmarks/name_search.py [--sizes 1000,10000,50000] [--queries 500]
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from src.text_index import FuzzyIndex, build_trigram_index, search_texts
+
+SYLLABLES = ("ma", "ri", "lo", "pe", "ca", "son", "der", "ñan", "gu", "tie", "rez", "al", "var",
+             "gon", "zá", "les", "vi", "da", "mar", "tín", "ber", "to", "ni", "co", "san", "chez")
+
+def names(count: int, seed: int = 0):
+    """`count` distinct 'First Last' names, deterministic for a given seed."""
+    rng = random.Random(seed)
+    word = lambda: ''.join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4))).capitalize()
+    result = set()
+    while len(result) < count:
+        result.add(f"{word()} {word()}")
+    return sorted(result)
+
+def typo(text: str, rng: random.Random) -> str:
+    """text with one substitution, deletion, insertion or adjacent swap in a random word."""
+    words = text.split()
+    w = rng.randrange(len(words))
+    word, i = words[w], rng.randrange(len(words[w]) - 1)
+    kind = rng.choice(("sub", "del", "ins", "swap"))
+    if kind == "sub":
+        word = word[:i] + rng.choice("aeiourst") + word[i + 1:]
+    elif kind == "del":
+        word = word[:i] + word[i + 1:]
+    elif kind == "ins":
+        word = word[:i] + rng.choice("aeiourst") + word[i:]
+    else:
+        word = word[:i] + word[i + 1] + word[i] + word[i + 2:]
+    words[w] = word
+    return ' '.join(words)
+
+def timed(fn, queries):
+    """(median µs, p99 µs, [results])."""
+    samples, results = [], []
+    for query in queries:
+        start = time.perf_counter()
+        results.append(fn(query))
+        samples.append((time.perf_counter() - start) * 1e6)
+    samples.sort()
+    return statistics.median(samples), samples[int(len(samples) * 0.99) - 1], results
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Substring and fuzzy name search latency")
+    parser.add_argument("--sizes", default="1000,10000,50000", help="Name counts (comma separated)")
+    parser.add_argument("--queries", type=int, default=500)
+    args = parser.parse_args()
+
+    print(f"{'names':>6} {'build ms':>9} {'exact µs p50/p99':>17} {'typo µs p50/p99':>16} {'typo found':>11}")
+    for count in (int(s) for s in args.sizes.split(",")):
+        texts = names(count)
+        rng = random.Random(1)
+        targets = [rng.randrange(count) for _ in range(args.queries)]
+
+        start = time.perf_counter()
+        org_index = build_trigram_index(texts)
+        fuzzy = FuzzyIndex(texts)
+        build_ms = (time.perf_counter() - start) * 1000
+
+        exact_p50, exact_p99, _ = timed(lambda q: search_texts(texts, q, org_index),
+                                        [texts[i] for i in targets])
+        typo_p50, typo_p99, results = timed(fuzzy.search, [typo(texts[i], rng) for i in targets])
+        found = sum(i in result for i, result in zip(targets, results)) / len(targets)
+        print(f"{count:6} {build_ms:9.0f} {exact_p50:8.0f}/{exact_p99:<8.0f} {typo_p50:7.0f}/{typo_p99:<8.0f} {found:10.0%}")
@@ -0,0 +1,170 @@
+"""
+Scaling benchmark on synthetic org charts (benchmarks/synthetic.py).
+
+For each size it generates a chart (PDF, template JSON and datalake data)
+and times every stage, then measures its peak Python memory (tracemalloc)
+in a separate run so profiling does not skew the timings:
+
+    extract_positions          parse + group + classify (cold extraction cache)
+    find_overlapping_elements  overlap check of every extracted element
+    generate_overlay_pdf       ReportLab overlay
+    build_overlay_ops          direct content-stream overlay
+    merge_pdfs                 overlay stamped on the base page, saved to memory
+
+Usage:
+    python benchmarks/orgchart_suite.py [--sizes 10,100,1000,10000] [--repeat 3]
+                                        [--save] [--tolerance 0.5] [--keep DIR]
+
+--save stores the results in benchmarks/orgchart_baseline.json; later runs
+compare against it and exit with status 1 when a stage is slower (or uses
+more memory) than the baseline by more than the tolerance.
+"""
+import argparse
+import io
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "benchmarks"))
+
+import src.extraction_cache as extraction_cache
+from extract_positions import extract_positions_from_pdf
+from src.datalake import JsonFileBackend
+from src.merger import merge_pdfs
+from src.pipeline import load_template_config
+from src.renderer import build_overlay_ops, generate_overlay_pdf
+from src.template_cache import base_templates
+from synthetic import generate_orgchart
+from update_smart import find_all_overlaps
+
+BASELINE_PATH = os.path.join(ROOT, "benchmarks", "orgchart_baseline.json")
+DEFAULT_SIZES = (10, 100, 1000, 10000)
+
+# Differences below this are noise, whatever the relative change
+MIN_REGRESSION_MS = 5.0
+MIN_REGRESSION_KB = 256
+
+def quiet(fn):
+    """Runs fn with stdout silenced (the extractors print progress)."""
+    def run():
+        stdout = sys.stdout
+        sys.stdout = io.StringIO()
+        try:
+            return fn()
+        finally:
+            sys.stdout = stdout
+    return run
+
+def build_stages(chart, cache_dir):
+    """name -> (setup, run): setup() runs untimed before each run()."""
+    template = load_template_config(chart['template_path'])
+    positions = JsonFileBackend(chart['datalake_path'], latency_ms=0).fetch(chart['org_id'])
+    pdf_path = chart['pdf_path']
+    extracted = quiet(lambda: extract_positions_from_pdf(pdf_path))()
+    org = {'cargos': extracted['cargos'], 'nombres': extracted['nombres'], 'otros': extracted['otros']}
+    overlay = generate_overlay_pdf(template, positions).getvalue()
+    merge_pdfs(pdf_path, io.BytesIO(overlay), io.BytesIO(), template, log=lambda msg: None)  # Warm imports
+
+    def cold_cache():
+        shutil.rmtree(cache_dir, ignore_errors=True)
+
+    return {
+        "extract_positions": (cold_cache, quiet(lambda: extract_positions_from_pdf(pdf_path))),
+        "find_overlapping_elements": (None, lambda: find_all_overlaps(org, padding=3)),
+        "generate_overlay_pdf": (None, lambda: generate_overlay_pdf(template, positions)),
+        "build_overlay_ops": (None, lambda: build_overlay_ops(template, positions)),
+        "merge_pdfs": (None, lambda: merge_pdfs(pdf_path, io.BytesIO(overlay), io.BytesIO(), template,
+                                                log=lambda msg: None)),
+    }
+
+def measure(setup, run, repeat):
+    """(best of `repeat` runs in ms, peak KiB of Python allocations)."""
+    samples = []
+    for _ in range(repeat):
+        if setup:
+            setup()
+        start = time.perf_counter()
+        run()
+        samples.append(time.perf_counter() - start)
+
+    if setup:
+        setup()
+    tracemalloc.start()
+    run()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return round(min(samples) * 1000, 2), round(peak / 1024)
+
+def run_suite(sizes, repeat, workdir):
+    cache_dir = os.path.join(workdir, "extraction-cache")
+    extraction_cache.CACHE_DIR = cache_dir  # Never touch the real cache
+    results = {}
+    for n_nodes in sizes:
+        chart = generate_orgchart(n_nodes, workdir)
+        base_templates.clear()
+        results[str(n_nodes)] = {}
+        for name, (setup, run) in build_stages(chart, cache_dir).items():
+            ms, peak_kb = measure(setup, run, repeat)
+            results[str(n_nodes)][name] = {"ms": ms, "peak_kb": peak_kb}
+            print(f"{n_nodes:>6} nodes  {name:27} {ms:10.2f} ms {peak_kb:10} KiB", flush=True)
+    return results
+
+def compare(results, baseline, tolerance):
+    """Returns the regressions as printable lines."""
+    regressions = []
+    for size, stages in results.items():
+        for name, res in stages.items():
+            base = baseline.get(size, {}).get(name)
+            if not base:
+                continue
+            if res["ms"] > base["ms"] * (1 + tolerance) and res["ms"] - base["ms"] > MIN_REGRESSION_MS:
+                regressions.append(f"{size} nodes {name}: {base['ms']} -> {res['ms']} ms")
+            if (res["peak_kb"] > base["peak_kb"] * (1 + tolerance)
+                    and res["peak_kb"] - base["peak_kb"] > MIN_REGRESSION_KB):
+                regressions.append(f"{size} nodes {name}: {base['peak_kb']} -> {res['peak_kb']} KiB")
+    return regressions
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Scaling benchmark on synthetic org charts")
+    parser.add_argument("--sizes", default=",".join(map(str, DEFAULT_SIZES)),
+                        help="Node counts (comma separated, default: 10,100,1000,10000)")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--save", action="store_true", help="Store the results as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=0.5,
+                        help="Allowed slowdown / memory growth over the baseline (default 0.5 = 50%%)")
+    parser.add_argument("--keep", metavar="DIR", help="Generate the charts in DIR and keep them")
+    args = parser.parse_args()
+
+    workdir = args.keep or tempfile.mkdtemp(prefix="orgchart-bench-")
+    try:
+        results = run_suite([int(s) for s in args.sizes.split(",")], args.repeat, workdir)
+    finally:
+        if not args.keep:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    baseline = {}
+    if os.path.exists(BASELINE_PATH):
+        with open(BASELINE_PATH, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+
+    if args.save:
+        baseline.update(results)
+        with open(BASELINE_PATH, "w", encoding="utf-8") as f:
+            json.dump(baseline, f, indent=2)
+        print(f"\nBaseline saved to {BASELINE_PATH}")
+        sys.exit(0)
+
+    regressions = compare(results, baseline, args.tolerance)
+    if regressions:
+        print(f"\n{len(regressions)} regression(s) against the baseline:")
+        for line in regressions:
+            print(f"  {line}")
+        sys.exit(1)
+    if baseline:
+        print("\nNo regressions against the baseline.")
@@ -0,0 +1,78 @@
+"""
+Benchmark of the two overlay paths: ReportLab page -> BytesIO -> pikepdf
+versus operators written straight into the base page (src/content_overlay).
+
+Times, for every template in input/templates/, the pipeline's render+merge
+and the update scripts' cover-and-replace with N boxes on the same page.
+
+Usage:
+    python benchmarks/overlay_paths.py [--repeat 20] [--boxes 1,10,100]
+"""
+import argparse
+import io
+import os
+import statistics
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from src.datalake import DataLakeService
+from src.merger import merge_pdfs
+from src.overlay import apply_overlays, build_replacement_overlay, generate_replacement_overlay
+from src.pipeline import load_template_config
+from src.renderer import build_overlay_ops, generate_overlay_pdf
+
+TEMPLATES_DIR = os.path.join(ROOT, "input", "templates")
+
+def timed(fn, repeat):
+    fn()  # Warm-up: imports and font metrics
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples) * 1000
+
+def pipeline_case(org_id, build):
+    template = load_template_config(os.path.join(TEMPLATES_DIR, f"{org_id}.json"))
+    positions = DataLakeService().get_positions_for_org(org_id)
+    base_pdf = os.path.join(TEMPLATES_DIR, f"{org_id}.pdf")
+
+    def run():
+        merge_pdfs(base_pdf, build(template, positions), io.BytesIO(), template, log=lambda msg: None)
+    return run
+
+def replacement_case(org_id, boxes, build):
+    import pikepdf
+    base_pdf = os.path.join(TEMPLATES_DIR, f"{org_id}.pdf")
+    with pikepdf.open(base_pdf) as pdf:
+        _, _, width, height = (float(v) for v in pdf.pages[0].mediabox)
+    replacements = [({'x': 20 + (i % 10) * 50, 'y': 20 + (i // 10) * 14, 'w': 45, 'h': 10},
+                     f"Nombre Apellido {i}", 0.5) for i in range(boxes)]
+
+    def run():
+        apply_overlays(base_pdf, {0: build(replacements, width, height)}, io.BytesIO())
+    return run
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="ReportLab vs direct content-stream overlays")
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--boxes", default="1,10,100", help="Replacement counts to try (comma separated)")
+    args = parser.parse_args()
+
+    org_ids = sorted(os.path.splitext(f)[0] for f in os.listdir(TEMPLATES_DIR) if f.endswith(".json"))
+
+    print(f"{'case':45} {'reportlab ms':>13} {'direct ms':>10} {'speedup':>8}")
+    for org_id in org_ids:
+        cases = [(f"render+merge {org_id}",
+                  pipeline_case(org_id, generate_overlay_pdf), pipeline_case(org_id, build_overlay_ops))]
+        for boxes in (int(b) for b in args.boxes.split(",")):
+            cases.append((f"replace x{boxes} {org_id}",
+                          replacement_case(org_id, boxes, generate_replacement_overlay),
+                          replacement_case(org_id, boxes, build_replacement_overlay)))
+        for name, reportlab_run, direct_run in cases:
+            reportlab_ms = timed(reportlab_run, args.repeat)
+            direct_ms = timed(direct_run, args.repeat)
+            print(f"{name:45} {reportlab_ms:13.2f} {direct_ms:10.2f} {reportlab_ms / direct_ms:7.1f}x")
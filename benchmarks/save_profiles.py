@@ -0,0 +1,61 @@
+"""
+Benchmark of the save profiles (src/save_profiles.py): save latency vs
+output size for every template in input/templates/, with its pipeline
+overlay already stamped on the page.
+
+Usage:
+    python benchmarks/save_profiles.py [--repeat 20]
+"""
+import argparse
+import io
+import os
+import statistics
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from src.datalake import DataLakeService
+from src.pipeline import load_template_config
+from src.renderer import build_overlay_ops
+from src.save_profiles import PROFILES, save_pdf
+from src.template_cache import base_templates
+
+TEMPLATES_DIR = os.path.join(ROOT, "input", "templates")
+
+def merged_pdf(org_id):
+    """The base PDF of org_id with its overlay applied, ready to save."""
+    import pikepdf
+    template = load_template_config(os.path.join(TEMPLATES_DIR, f"{org_id}.json"))
+    positions = DataLakeService().get_positions_for_org(org_id)
+    pdf = pikepdf.Pdf.open(base_templates.open(os.path.join(TEMPLATES_DIR, f"{org_id}.pdf")))
+    build_overlay_ops(template, positions).apply(pdf, pdf.pages[template.page])
+    return pdf
+
+def measure(pdf, profile, repeat):
+    """(median save ms, output bytes)."""
+    output = io.BytesIO()
+    save_pdf(pdf, output, profile)  # Warm-up
+    samples = []
+    for _ in range(repeat):
+        output = io.BytesIO()
+        start = time.perf_counter()
+        save_pdf(pdf, output, profile)
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples) * 1000, len(output.getvalue())
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Save latency vs size for each save profile")
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    org_ids = sorted(os.path.splitext(f)[0] for f in os.listdir(TEMPLATES_DIR) if f.endswith(".json"))
+
+    print(f"{'template':28} {'profile':8} {'save ms':>9} {'bytes':>10} {'vs default':>11}")
+    for org_id in org_ids:
+        pdf = merged_pdf(org_id)
+        results = {profile: measure(pdf, profile, args.repeat) for profile in PROFILES}
+        default_size = results["default"][1]
+        for profile, (ms, size) in results.items():
+            print(f"{org_id:28} {profile:8} {ms:9.2f} {size:10} {size / default_size:10.1%}")
@@ -0,0 +1,120 @@
+"""
+Cold-start benchmark for the command line entry points.
+
+Runs each entry point on a path that does no real work (usage error, lookup
+that finds nothing, --help) under `python -X importtime`, and reports wall
+time, total import time and the heaviest top-level imports.
+
+Usage:
+    python benchmarks/startup.py [--repeat 5] [--save] [--tolerance 0.25]
+
+--save stores the medians in benchmarks/startup_baseline.json; later runs
+compare against it and exit with status 1 when an entry point regresses by
+more than the tolerance.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BASELINE_PATH = os.path.join(ROOT, "benchmarks", "startup_baseline.json")
+
+# name -> argv (after the interpreter); none of them touches a PDF
+ENTRY_POINTS = {
+    "update_pdf (usage)": ["update_pdf.py"],
+    "update_smart (usage)": ["update_smart.py"],
+    "update_from_db (usage)": ["update_from_db.py"],
+    "update_from_db (not found)": ["update_from_db.py", "__NO_ORG__", "x", "y"],
+    "list_names (not found)": ["list_names.py", "__NO_ORG__"],
+    "main (--help)": ["main.py", "--help"],
+    "render_daemon (--help)": ["render_daemon.py", "--help"],
+}
+
+HEAVY_MODULES = ("pikepdf", "reportlab", "pdfplumber", "pdfminer")
+
+def parse_importtime(stderr):
+    """Returns (total self time in us, {top-level module: cumulative us})."""
+    total = 0
+    top_level = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        total += int(self_us)
+        # Nesting is shown by two spaces per level after the first one
+        if not name[1:].startswith(" "):
+            top_level[name.strip()] = int(cumulative_us)
+    return total, top_level
+
+def measure(argv):
+    start = time.perf_counter()
+    proc = subprocess.run([sys.executable, "-X", "importtime"] + argv, cwd=ROOT,
+                          capture_output=True, text=True)
+    wall = time.perf_counter() - start
+    import_us, top_level = parse_importtime(proc.stderr)
+    if "Traceback" in proc.stderr:
+        # A crash would make the entry point look fast; surface it
+        print(f"warning: {' '.join(argv)} failed:\n{proc.stderr.strip().splitlines()[-1]}", file=sys.stderr)
+    return wall, import_us, top_level
+
+def run(repeat):
+    results = {}
+    for name, argv in ENTRY_POINTS.items():
+        walls, imports, top_level = [], [], {}
+        for _ in range(repeat):
+            wall, import_us, top_level = measure(argv)
+            walls.append(wall)
+            imports.append(import_us)
+        heavy = sorted((m for m in top_level if m.split(".")[0] in HEAVY_MODULES))
+        results[name] = {
+            "wall_ms": round(statistics.median(walls) * 1000, 1),
+            "import_ms": round(statistics.median(imports) / 1000, 1),
+            "heavy_imports": heavy,
+            "top_imports": sorted(top_level.items(), key=lambda kv: kv[1], reverse=True)[:5],
+        }
+    return results
+
+def report(results, baseline, tolerance):
+    regressions = []
+    print(f"{'entry point':30} {'wall ms':>9} {'import ms':>10} {'baseline':>9}  heavy imports")
+    for name, res in results.items():
+        base = baseline.get(name, {}).get("wall_ms")
+        flag = ""
+        if base is not None and res["wall_ms"] > base * (1 + tolerance):
+            flag = "  REGRESSION"
+            regressions.append(name)
+        print(f"{name:30} {res['wall_ms']:9.1f} {res['import_ms']:10.1f} "
+              f"{base if base is not None else '-':>9}  {', '.join(res['heavy_imports']) or '-'}{flag}")
+        for module, cumulative in res["top_imports"]:
+            print(f"{'':32}{module:30} {cumulative / 1000:8.1f} ms")
+    return regressions
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Cold-start benchmark for the CLI entry points")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--save", action="store_true", help="Store the results as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25,
+                        help="Allowed slowdown over the baseline (default 0.25 = 25%%)")
+    args = parser.parse_args()
+
+    baseline = {}
+    if os.path.exists(BASELINE_PATH):
+        with open(BASELINE_PATH, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+
+    results = run(args.repeat)
+    regressions = report(results, baseline, args.tolerance)
+
+    if args.save:
+        with open(BASELINE_PATH, "w", encoding="utf-8") as f:
+            json.dump({name: {"wall_ms": r["wall_ms"], "import_ms": r["import_ms"]}
+                       for name, r in results.items()}, f, indent=2)
+        print(f"\nBaseline saved to {BASELINE_PATH}")
+
+    if regressions and not args.save:
+        print(f"\n{len(regressions)} entry point(s) slower than baseline: {', '.join(regressions)}")
+        sys.exit(1)
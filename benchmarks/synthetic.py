@@ -0,0 +1,110 @@
+"""
+Synthetic org charts for benchmarks.
+
+Each chart is a tree of `n` boxes on one page: a box holds an upper-case
+position title and a person's name (what extract_positions classifies as
+CARGO and NOMBRE), and a connector line joins it to its parent. Alongside
+the PDF come the matching template JSON (one OrgNode per box) and the
+datalake positions in the JSON stand-in format (src.datalake.JsonFileBackend).
+
+Usage:
+    python benchmarks/synthetic.py <n_nodes> [<output_dir>]
+"""
+import json
+import math
+import os
+import random
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from src.datalake import write_json
+from src.models import OrgNode, OrgTemplate, PositionData
+
+BOX_W, BOX_H = 64.0, 20.0
+GAP_X, GAP_Y = 10.0, 12.0
+MARGIN = 20.0
+FONT_SIZE = 4
+FANOUT = 4
+
+TITLES = ("GERENTE", "DIRECTOR", "JEFE", "COORDINADOR", "ANALISTA", "SUPERVISOR")
+AREAS = ("LOGISTICA", "OPERACIONES", "FINANZAS", "SISTEMAS", "COMERCIAL", "RRHH")
+FIRST_NAMES = ("Carlos", "María", "Diego", "Lucía", "Pablo", "Ana", "Jorge", "Sofía", "Martín", "Valeria")
+LAST_NAMES = ("Piñero", "González", "Rodríguez", "Fernández", "López", "Martínez", "Pérez", "Gómez")
+
+def chart_id(n_nodes: int) -> str:
+    return f"SYN_{n_nodes:05d}"
+
+def layout(n_nodes: int):
+    """(columns, page width, page height, [(x, y) of each box's bottom-left corner])."""
+    columns = max(1, math.ceil(math.sqrt(n_nodes * 2)))
+    rows = math.ceil(n_nodes / columns)
+    width = 2 * MARGIN + columns * (BOX_W + GAP_X)
+    height = 2 * MARGIN + rows * (BOX_H + GAP_Y)
+    boxes = []
+    for i in range(n_nodes):
+        row, col = divmod(i, columns)
+        boxes.append((MARGIN + col * (BOX_W + GAP_X), height - MARGIN - (row + 1) * (BOX_H + GAP_Y) + GAP_Y))
+    return columns, width, height, boxes
+
+def people(n_nodes: int, seed: int = 0):
+    """[(title, name)] for every box, deterministic for a given seed."""
+    rng = random.Random(seed)
+    return [(f"{rng.choice(TITLES)} {rng.choice(AREAS)} {i}",
+             f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}") for i in range(n_nodes)]
+
+def generate_orgchart(n_nodes: int, output_dir: str, seed: int = 0) -> dict:
+    """
+    Writes <id>.pdf, <id>.json (template) and <id>.datalake.json to output_dir.
+    Returns their paths and the chart id.
+    """
+    from reportlab.pdfgen import canvas
+
+    os.makedirs(output_dir, exist_ok=True)
+    org_id = chart_id(n_nodes)
+    _, width, height, boxes = layout(n_nodes)
+    staff = people(n_nodes, seed)
+
+    pdf_path = os.path.join(output_dir, f"{org_id}.pdf")
+    c = canvas.Canvas(pdf_path, pagesize=(width, height))
+    c.setLineWidth(0.3)
+    for i, (x, y) in enumerate(boxes):
+        if i:
+            px, py = boxes[(i - 1) // FANOUT]
+            c.line(px + BOX_W / 2, py, x + BOX_W / 2, y + BOX_H)
+    for (x, y), (title, name) in zip(boxes, staff):
+        c.setFillColorRGB(1, 1, 1)
+        c.rect(x, y, BOX_W, BOX_H, fill=1, stroke=1)
+        c.setFillColorRGB(0, 0, 0)
+        c.setFont("Helvetica-Bold", FONT_SIZE)
+        c.drawCentredString(x + BOX_W / 2, y + BOX_H - 7, title)
+        c.setFont("Helvetica", FONT_SIZE)
+        c.drawCentredString(x + BOX_W / 2, y + BOX_H - 14, name)
+    c.save()
+
+    nodes = [OrgNode(node_id=f"N{i}", x=x + 1, y=y + 1, w=BOX_W - 2, h=BOX_H - 2,
+                     font="Helvetica", font_size=FONT_SIZE, align="center", max_lines=2)
+             for i, (x, y) in enumerate(boxes)]
+    template = OrgTemplate(org_id=org_id, page=0, nodes=nodes)
+    template_path = os.path.join(output_dir, f"{org_id}.json")
+    with open(template_path, 'w', encoding='utf-8') as f:
+        json.dump(template.model_dump(), f, indent=2, ensure_ascii=False)
+
+    # The datalake has everyone moved one box over, so every node changes
+    positions = [PositionData(org_id=org_id, node_id=f"N{i}", title=staff[(i + 1) % n_nodes][0],
+                              person_name=staff[(i + 1) % n_nodes][1]) for i in range(n_nodes)]
+    datalake_path = os.path.join(output_dir, f"{org_id}.datalake.json")
+    write_json(datalake_path, positions)
+
+    return {'org_id': org_id, 'pdf_path': pdf_path, 'template_path': template_path,
+            'datalake_path': datalake_path}
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("Uso: python benchmarks/synthetic.py <n_nodos> [<carpeta_salida>]")
+        sys.exit(1)
+    paths = generate_orgchart(int(sys.argv[1]), sys.argv[2] if len(sys.argv) > 2 else os.path.join("output", "synthetic"))
+    for key, value in paths.items():
+        print(f"{key}: {value}")
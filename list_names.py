@@ -6,12 +6,15 @@ Uso:
 """
 
 import sys
-import json
+from src.store import open_database
 
 def load_database():
-    """Carga la base de datos de coordenadas."""
-    with open("coordinates_db.json", 'r', encoding='utf-8') as f:
-        return json.load(f)
+    """Carga la base de datos de coordenadas (SQLite si existe, si no el JSON)."""
+    db = open_database("coordinates")
+    if db is None:
+        print("❌ No se encontró la base de datos. Ejecuta primero: python extract_coordinates.py")
+        sys.exit(1)
+    return db
 
 def list_all_names():
     """Lista todos los nombres de todos los organigramas."""
@@ -58,6 +61,7 @@ def list_all_names():
         if len(other) > 0 and len(other) < 20:
             print(f"\n   📝 Otros ({len(other)} elementos): {', '.join(other[:10])}")
     
+    db.close()
     print("\n" + "=" * 80)
 
 def list_org_names(org_id):
@@ -67,9 +71,11 @@ def list_org_names(org_id):
     if org_id not in db['organigramas']:
         print(f"❌ Organigrama '{org_id}' no encontrado")
         print(f"   Disponibles: {list(db['organigramas'].keys())}")
+        db.close()
         return
     
     org_data = db['organigramas'][org_id]
+    db.close()
     
     print("=" * 80)
     print(f"📋 TEXTOS EN: {org_id}")
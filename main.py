@@ -1,4 +1,34 @@
+import argparse
+import sys
+from contextlib import redirect_stdout
 from src.pipeline import run_pipeline
+from src.save_profiles import PROFILES
+from src.sinks import ZipSink, stdout_stream
 
 if __name__ == "__main__":
-    run_pipeline()
+    parser = argparse.ArgumentParser(description="Org chart batch update pipeline")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="Number of worker processes (default: 1, sequential)")
+    parser.add_argument("--zip", metavar="PATH",
+                        help="Stream every generated PDF into one ZIP archive instead of output/ ('-' for stdout)")
+    parser.add_argument("--staged", action="store_true",
+                        help="Overlap fetch, render, merge and save as stages over bounded queues")
+    parser.add_argument("--queue-size", type=int, default=4,
+                        help="Capacity of each queue between stages in --staged mode (default: 4)")
+    parser.add_argument("--save-profile", choices=PROFILES,
+                        help="PDF save settings: fast (no recompression) or compact (object streams, "
+                             "recompressed, linearized); default: $ORGCHART_SAVE_PROFILE or 'default'")
+    args = parser.parse_args()
+    options = dict(workers=args.workers, staged=args.staged, queue_size=args.queue_size,
+                   save_profile=args.save_profile)
+
+    if args.zip is None:
+        run_pipeline(**options)
+    elif args.zip == "-":
+        # stdout carries the archive, so progress goes to stderr
+        stream = stdout_stream()  # Grab it before stdout is redirected
+        with redirect_stdout(sys.stderr), ZipSink(stream) as sink:
+            run_pipeline(sink=sink, **options)
+    else:
+        with ZipSink(args.zip) as sink:
+            run_pipeline(sink=sink, **options)
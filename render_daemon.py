@@ -0,0 +1,259 @@
+"""
+Servicio de larga duración para actualizar y renderizar organigramas.
+
+Mantiene en memoria los templates (OrgTemplate), las posiciones del datalake,
+la base de posiciones y los PDFs base, así cada pedido evita el arranque de
+Python, la importación de pikepdf/reportlab, la consulta al datalake y la
+lectura de la base. Pedidos idénticos que llegan a la
+vez para el mismo organigrama se resuelven con un único render.
+
+Uso:
+    python render_daemon.py [--host 127.0.0.1] [--port 8765]
+
+Endpoints (JSON):
+    POST /update   {"org_id", "search", "replace", "match": 1, "output_name": null}
+                   output_name es solo un nombre de archivo (sin carpetas ni ..):
+                   el PDF siempre se escribe en output/
+    POST /render   {"org_id"}
+    POST /reload   {}   Vuelve a leer templates, datalake, base de posiciones y PDFs
+    GET  /health
+    GET  /stats
+
+Ejemplo:
+    curl -X POST localhost:8765/update -d '{"org_id": "02_ORGANIGRAMA_LUCAS", "search": "Lucas Capuano", "replace": "Diego Piñero"}'
+"""
+
+import argparse
+import glob
+import json
+import os
+import threading
+import time
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from src.datalake import DataLakeService
+from src.pipeline import load_template_config, process_org
+from src.store import open_database, open_org_index
+from src.template_cache import base_templates
+from update_smart import build_overlap_index, build_segment_index, update_pdf_smart
+
+class RenderService:
+    """Estado en memoria del servicio y coalescencia de pedidos."""
+
+    def __init__(self, templates_dir, output_dir):
+        self.templates_dir = templates_dir
+        self.output_dir = output_dir
+        self._lock = threading.Lock()
+        self._inflight = {}
+        self._org_locks = {}
+        self.stats = {'requests': 0, 'renders': 0, 'coalesced': 0, 'errors': 0}
+        self.reload()
+
+    def reload(self):
+        """(Re)carga templates, posiciones del datalake, base de posiciones y PDFs base."""
+        templates = {}
+        for config_file in glob.glob(os.path.join(self.templates_dir, "*.json")):
+            try:
+                template = load_template_config(config_file)
+            except Exception as e:
+                print(f"⚠️  No se pudo cargar {config_file}: {e}")
+                continue
+            templates[template.org_id] = (config_file, template)
+
+        # Un único pedido en bloque al datalake; si un organigrama falla, /render lo vuelve a pedir
+        errors = {}
+        with DataLakeService() as datalake:
+            positions = datalake.get_positions_for_orgs(templates, errors=errors)
+        for org_id, e in errors.items():
+            print(f"⚠️  No se pudieron leer las posiciones de {org_id}: {type(e).__name__}: {e}")
+
+        # Materializar la base: las conexiones SQLite no se comparten entre hilos
+        database = open_database("positions")
+        positions_db, indexes, overlap_indexes, segment_indexes = None, {}, {}, {}
+        if database is not None:
+            orgs = dict(database['organigramas'])
+            indexes = {org_id: open_org_index(database, "positions", org_id) for org_id in orgs}
+            overlap_indexes = {org_id: build_overlap_index(org) for org_id, org in orgs.items()}
+            segment_indexes = {org_id: build_segment_index(org['shapes'])
+                               for org_id, org in orgs.items() if org.get('shapes')}
+            positions_db = {'organigramas': orgs}
+            database.close()
+
+        with self._lock:
+            self.templates = templates
+            self.positions = positions
+            self.positions_db = positions_db
+            self.indexes = indexes
+            self.overlap_indexes = overlap_indexes
+            self.segment_indexes = segment_indexes
+        base_templates.clear()
+
+        print(f"📂 {len(templates)} templates y "
+              f"{len(positions_db['organigramas']) if positions_db else 0} organigramas en memoria")
+
+    def _org_lock(self, org_id):
+        with self._lock:
+            return self._org_locks.setdefault(org_id, threading.Lock())
+
+    def coalesced(self, key, org_id, fn):
+        """
+        Ejecuta fn() una sola vez por `key` mientras haya un pedido en curso;
+        los pedidos idénticos concurrentes esperan ese mismo resultado.
+        Retorna (resultado, coalescido).
+        """
+        with self._lock:
+            self.stats['requests'] += 1
+            future = self._inflight.get(key)
+            owner = future is None
+            if owner:
+                future = Future()
+                self._inflight[key] = future
+            else:
+                self.stats['coalesced'] += 1
+
+        if not owner:
+            return future.result(), True
+
+        try:
+            # Renders distintos del mismo organigrama escriben el mismo archivo
+            with self._org_lock(org_id):
+                result = fn()
+            future.set_result(result)
+        except Exception as e:
+            with self._lock:
+                self.stats['errors'] += 1
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                self.stats['renders'] += 1
+                del self._inflight[key]
+        return result, False
+
+    def output_path(self, output_name):
+        """Ruta dentro de output_dir para un nombre de archivo del cliente (nunca una ruta)."""
+        if (not output_name or output_name in ('.', '..') or '/' in output_name or '\\' in output_name
+                or os.path.basename(output_name) != output_name):
+            raise ValueError(f"Nombre de archivo inválido: '{output_name}'")
+        return os.path.join(self.output_dir, output_name)
+
+    def update(self, org_id, search, replace, match=1, output_name=None):
+        # Una sola vista del estado por pedido: un /reload concurrente no mezcla base e índices
+        with self._lock:
+            positions_db, indexes = self.positions_db, self.indexes
+            overlap_indexes, segment_indexes = self.overlap_indexes, self.segment_indexes
+        if positions_db is None:
+            raise LookupError("No hay base de posiciones; ejecuta python extract_positions.py")
+        if org_id not in positions_db['organigramas']:
+            raise LookupError(f"Organigrama '{org_id}' no encontrado")
+
+        output_path = self.output_path(output_name or f"{org_id}_actualizado.pdf")
+        key = ('update', org_id, search, replace, match, output_path)
+
+        def run():
+            # El PDF base sale de la caché de templates en memoria (src/template_cache)
+            ok = update_pdf_smart(org_id, search, replace, output_path, match,
+                                  database=positions_db,
+                                  org_index=indexes.get(org_id),
+                                  overlap_index=overlap_indexes.get(org_id),
+                                  segment_index=segment_indexes.get(org_id))
+            return {'ok': ok, 'output_path': output_path if ok else None}
+
+        return self.coalesced(key, org_id, run)
+
+    def render(self, org_id):
+        with self._lock:
+            entry, positions = self.templates.get(org_id), self.positions.get(org_id)
+        if entry is None:
+            raise LookupError(f"No hay template para '{org_id}'")
+
+        def run():
+            config_file, template = entry
+            # Posiciones leídas en reload(); None solo si el datalake falló y hay que reintentar
+            res = process_org(config_file, self.templates_dir, self.output_dir, template, positions=positions)
+            return {'ok': res.status == 'ok', 'status': res.status,
+                    'output_path': res.output_path, 'message': res.message}
+
+        return self.coalesced(('render', org_id), org_id, run)
+
+def make_handler(service):
+    class Handler(BaseHTTPRequestHandler):
+        def _send(self, status, payload):
+            body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json; charset=utf-8')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            if self.path == '/health':
+                self._send(200, {'ok': True})
+            elif self.path == '/stats':
+                self._send(200, dict(service.stats, template_cache=base_templates.stats()))
+            else:
+                self._send(404, {'ok': False, 'error': 'not found'})
+
+        def do_POST(self):
+            try:
+                length = int(self.headers.get('Content-Length') or 0)
+                params = json.loads(self.rfile.read(length) or b'{}')
+            except ValueError:
+                self._send(400, {'ok': False, 'error': 'JSON inválido'})
+                return
+
+            start = time.perf_counter()
+            try:
+                if self.path == '/update':
+                    result, coalesced = service.update(params['org_id'], params['search'], params['replace'],
+                                                       int(params.get('match', 1)), params.get('output_name'))
+                elif self.path == '/render':
+                    result, coalesced = service.render(params['org_id'])
+                elif self.path == '/reload':
+                    service.reload()
+                    result, coalesced = {'ok': True}, False
+                else:
+                    self._send(404, {'ok': False, 'error': 'not found'})
+                    return
+            except KeyError as e:
+                self._send(400, {'ok': False, 'error': f"Falta el parámetro {e}"})
+                return
+            except ValueError as e:
+                self._send(400, {'ok': False, 'error': str(e)})
+                return
+            except LookupError as e:
+                self._send(404, {'ok': False, 'error': str(e)})
+                return
+            except Exception as e:
+                self._send(500, {'ok': False, 'error': f"{type(e).__name__}: {e}"})
+                return
+
+            result = dict(result, coalesced=coalesced,
+                          elapsed_ms=round((time.perf_counter() - start) * 1000, 1))
+            self._send(200 if result.get('ok') else 422, result)
+
+    return Handler
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Servicio de render de organigramas")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+
+    print("=" * 70)
+    print("🛰️  SERVICIO DE RENDER DE ORGANIGRAMAS")
+    print("=" * 70)
+
+    base_dir = os.getcwd()
+    service = RenderService(os.path.join(base_dir, "input", "templates"),
+                            os.path.join(base_dir, "output"))
+
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(service))
+    print(f"🚀 Escuchando en http://{args.host}:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\n👋 Servicio detenido")
+    finally:
+        server.server_close()
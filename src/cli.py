@@ -0,0 +1,47 @@
+"""Small helpers shared by the command line scripts."""
+import sys
+from contextlib import contextmanager, redirect_stdout
+from typing import List, Optional
+from src.sinks import stdout_stream
+
+def pop_option(args: List[str], flag: str, default: Optional[str] = None) -> Optional[str]:
+    """Removes `flag VALUE` from args (in place) and returns VALUE, or default."""
+    if flag not in args:
+        return default
+    i = args.index(flag)
+    if i + 1 >= len(args):
+        raise SystemExit(f"Falta el valor de {flag}")
+    value = args[i + 1]
+    del args[i:i + 2]
+    return value
+
+def pop_save_profile(args: List[str]) -> Optional[str]:
+    """Removes `--save-profile NAME` from args and returns NAME (validated), or None."""
+    from src.save_profiles import PROFILES
+
+    profile = pop_option(args, '--save-profile')
+    if profile is not None and profile not in PROFILES:
+        raise SystemExit(f"Perfil de guardado desconocido: {profile} (opciones: {', '.join(PROFILES)})")
+    return profile
+
+def pop_extract_backend(args: List[str]) -> Optional[str]:
+    """Removes `--backend NAME` from args and returns NAME (validated), or None."""
+    from src.extraction_cache import BACKENDS
+
+    backend = pop_option(args, '--backend')
+    if backend is not None and backend not in BACKENDS:
+        raise SystemExit(f"Backend de extracción desconocido: {backend} (opciones: {', '.join(BACKENDS)})")
+    return backend
+
+@contextmanager
+def output_target(output: Optional[str]):
+    """
+    Resolves an --output value: '-' yields binary stdout and sends the
+    script's progress prints to stderr; anything else is passed through.
+    """
+    if output != '-':
+        yield output
+        return
+    stream = stdout_stream()  # Grab it before stdout is redirected
+    with redirect_stdout(sys.stderr):
+        yield stream
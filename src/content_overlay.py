@@ -0,0 +1,103 @@
+"""
+Direct content-stream overlays.
+
+The ReportLab path draws an overlay on a canvas, serializes it to a BytesIO
+and has pikepdf parse it back before stamping it on the base page. Here the
+same white rectangles and text operators are written straight into a Form
+XObject owned by the base PDF, which is then placed with add_overlay exactly
+where the ReportLab page would have gone.
+
+Only the standard Latin PDF fonts (Helvetica, Times, Courier) are supported (text is WinAnsi encoded, as
+ReportLab does for them); overlays using other fonts fall back to ReportLab.
+Set ORGCHART_OVERLAY_BACKEND=reportlab to always use the old path.
+"""
+import os
+from typing import Dict, List, Tuple
+
+OVERLAY_BACKEND = os.environ.get("ORGCHART_OVERLAY_BACKEND", "direct")
+
+STANDARD_FONTS = frozenset((
+    "Courier", "Courier-Bold", "Courier-Oblique", "Courier-BoldOblique",
+    "Helvetica", "Helvetica-Bold", "Helvetica-Oblique", "Helvetica-BoldOblique",
+    "Times-Roman", "Times-Bold", "Times-Italic", "Times-BoldItalic",
+))
+
+def use_direct(fonts) -> bool:
+    """True when the direct path is enabled and can draw every font in `fonts`."""
+    return OVERLAY_BACKEND == "direct" and all(f in STANDARD_FONTS for f in fonts)
+
+def _num(value: float) -> bytes:
+    text = f"{value:.4f}".rstrip('0').rstrip('.')
+    return (text if text not in ("", "-0") else "0").encode('ascii')
+
+def _pdf_string(text: str) -> bytes:
+    raw = text.encode('cp1252', errors='replace')
+    return b'(' + raw.replace(b'\\', b'\\\\').replace(b'(', b'\\(').replace(b')', b'\\)') + b')'
+
+class OverlayOps:
+    """
+    Content stream operators for one overlay page of `width` x `height`
+    points. Plain bytes and font names, so it pickles cheaply between
+    processes (render and merge can run in different workers).
+    """
+
+    def __init__(self, width: float, height: float):
+        self.width = width
+        self.height = height
+        self.fonts: Dict[str, str] = {}  # font name -> resource name
+        self._ops: List[bytes] = []
+
+    def _font_resource(self, font: str) -> str:
+        if font not in self.fonts:
+            self.fonts[font] = f"F{len(self.fonts) + 1}"
+        return self.fonts[font]
+
+    def cover(self, x: float, y: float, w: float, h: float):
+        """White filled rectangle, no stroke."""
+        self._ops.append(b"1 1 1 rg " + b" ".join(map(_num, (x, y, w, h))) + b" re f")
+
+    def text(self, x: float, y: float, text: str, font: str, font_size: float):
+        """One line of black text with its baseline starting at (x, y)."""
+        resource = self._font_resource(font).encode('ascii')
+        self._ops.append(b"0 0 0 rg BT /" + resource + b" " + _num(font_size) + b" Tf " +
+                         _num(x) + b" " + _num(y) + b" Td " + _pdf_string(text) + b" Tj ET")
+
+    def content(self) -> bytes:
+        return b"\n".join(self._ops) + b"\n"
+
+    def apply(self, pdf, page):
+        """
+        Stamps the operators on `page` (a pikepdf.Page of `pdf`) as a Form
+        XObject fitted to the page's MediaBox, like add_overlay does with a
+        ReportLab page of the same size.
+        """
+        import pikepdf
+
+        fonts = pikepdf.Dictionary({
+            f"/{resource}": pikepdf.Dictionary(
+                Type=pikepdf.Name.Font, Subtype=pikepdf.Name.Type1,
+                BaseFont=pikepdf.Name(f"/{font}"), Encoding=pikepdf.Name.WinAnsiEncoding)
+            for font, resource in self.fonts.items()
+        })
+        form = pikepdf.Stream(pdf, self.content())
+        form.Type = pikepdf.Name.XObject
+        form.Subtype = pikepdf.Name.Form
+        form.BBox = [0, 0, self.width, self.height]
+        form.Resources = pikepdf.Dictionary(Font=fonts)
+        page.add_overlay(form, pikepdf.Rectangle(page.mediabox))
+
+def centered_lines(box: dict, lines: List[str], font: str, font_size: float,
+                   line_height: float) -> List[Tuple[float, float, str]]:
+    """
+    (x, y, line) baselines for `lines` centered both ways in `box`, the same
+    layout overlay.draw_replacement uses.
+    """
+    from src.text_fit import measure_lines
+
+    total_text_height = len(lines) * font_size * line_height
+    current_y = box['y'] + box['h'] - ((box['h'] - total_text_height) / 2) - font_size
+    placed = []
+    for line, text_width in zip(lines, measure_lines(lines, font, font_size)):
+        placed.append((box['x'] + (box['w'] - text_width) / 2, current_y, line))
+        current_y -= font_size * line_height
+    return placed
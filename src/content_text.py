@@ -0,0 +1,568 @@
+"""
+Word geometry read straight from the page content streams (pikepdf).
+
+pdfplumber gets its words from pdfminer, which tokenizes the content
+streams in pure Python and builds a layout object per glyph. For our
+templates only the glyph boxes matter, so this backend walks the operators
+pikepdf already parsed (text state, text matrices, CTM, Form XObjects),
+places each glyph the way pdfminer does (advance width from the font,
+height = font size, bottom = baseline + descent) and groups the glyphs into
+words with the same rules and defaults as pdfplumber's extract_words().
+Words and chars come out in pdfplumber's layout (top-left origin, doctop,
+upright). Painted paths are collected the way pdfminer builds them (re
+expanded to m/l/l/l/h, n discards, s/b close first) and reduced to boxes
+and segments with src.shapes, like the pdfplumber backend does.
+
+Supported fonts: simple fonts (Type1 / TrueType with /Widths, or the
+standard 14 with pdfminer's metrics tables) and Type0 fonts with the
+Identity-H encoding. Anything else (Type3, vertical writing, predefined
+CMaps, extract_words options other than WORD_OPTIONS) raises
+UnsupportedContent so the caller can use pdfplumber instead.
+"""
+import re
+import struct
+from decimal import Decimal
+from itertools import groupby
+from operator import itemgetter
+from typing import Dict, List, Optional, Tuple
+
+IDENTITY = (1, 0, 0, 1, 0, 0)
+# Path construction and painting operators (n ends a path without painting)
+PATH_OPS = ('m', 'l', 'c', 'v', 'y', 'h', 're')
+PAINT_OPS = ('S', 's', 'f', 'F', 'f*', 'B', 'B*', 'b', 'b*')
+WORD_OPTIONS = ('x_tolerance', 'y_tolerance', 'keep_blank_chars')
+# pdfplumber expands these when joining chars into words
+LIGATURES = {
+    "ﬀ": "ff", "ﬃ": "ffi", "ﬄ": "ffl", "ﬁ": "fi",
+    "ﬂ": "fl", "ﬆ": "st", "ﬅ": "st",
+}
+
+Matrix = Tuple[float, float, float, float, float, float]
+
+class UnsupportedContent(Exception):
+    """The page uses something this backend does not model."""
+
+# Matrix helpers, same operand order as pdfminer.utils so results match bit for bit
+
+def mult_matrix(m1: Matrix, m0: Matrix) -> Matrix:
+    (a1, b1, c1, d1, e1, f1) = m1
+    (a0, b0, c0, d0, e0, f0) = m0
+    return (a0 * a1 + c0 * b1, b0 * a1 + d0 * b1,
+            a0 * c1 + c0 * d1, b0 * c1 + d0 * d1,
+            a0 * e1 + c0 * f1 + e0, b0 * e1 + d0 * f1 + f0)
+
+def translate_matrix(m: Matrix, x: float, y: float) -> Matrix:
+    (a, b, c, d, e, f) = m
+    return a, b, c, d, x * a + y * c + e, x * b + y * d + f
+
+def apply_matrix_pt(m: Matrix, v) -> Tuple[float, float]:
+    (a, b, c, d, e, f) = m
+    (x, y) = v
+    return a * x + c * y + e, b * x + d * y + f
+
+def apply_matrix_rect(m: Matrix, rect) -> Tuple[float, float, float, float]:
+    (a, b, c, d, e, f) = m
+    (x0, y0, x1, y1) = rect
+    xs = (a * x0 + c * y0 + e, a * x1 + c * y0 + e, a * x1 + c * y1 + e, a * x0 + c * y1 + e)
+    ys = (b * x0 + d * y0 + f, b * x1 + d * y0 + f, b * x1 + d * y1 + f, b * x0 + d * y1 + f)
+    return min(xs), min(ys), max(xs), max(ys)
+
+def _number(value):
+    """pikepdf Decimal -> float (ints stay ints, as pdfminer's parser leaves them)."""
+    return value if isinstance(value, int) else float(value)
+
+def _name(value) -> str:
+    return str(value)[1:] if str(value).startswith('/') else str(value)
+
+def _inherited(page_obj, key: str):
+    node = page_obj
+    while node is not None:
+        if key in node:
+            return node[key]
+        node = node.get('/Parent')
+    return None
+
+# Fonts
+
+_BF_BLOCK = re.compile(rb'begin(bfchar|bfrange)(.*?)end\1', re.S)
+_CMAP_TOKEN = re.compile(rb'<([0-9A-Fa-f\s]*)>|(\[)|(\])')
+
+def _hex(token: bytes) -> bytes:
+    digits = re.sub(rb'\s', b'', token)
+    return bytes.fromhex((digits + b'0' * (len(digits) % 2)).decode('ascii'))
+
+def _utf16(code: bytes) -> str:
+    return code.decode('UTF-16BE', 'ignore')
+
+def parse_to_unicode(data: bytes) -> Dict[int, str]:
+    """code -> text of a ToUnicode CMap (bfchar / bfrange blocks, as pdfminer reads them)."""
+    mapping = {}
+
+    def add(code: int, text: str):
+        # Some fonts map a non-breaking space over a real space: keep the space
+        if not (text == "\u00a0" and mapping.get(code) == " "):
+            mapping[code] = text
+
+    for kind, body in _BF_BLOCK.findall(data):
+        tokens, array = [], None
+        for match in _CMAP_TOKEN.finditer(body):
+            if match.group(2):
+                array = []
+            elif match.group(3):
+                tokens.append(array)
+                array = None
+            elif array is not None:
+                array.append(_hex(match.group(1)))
+            else:
+                tokens.append(_hex(match.group(1)))
+
+        if kind == b'bfchar':
+            for src, dst in zip(tokens[0::2], tokens[1::2]):
+                if isinstance(src, bytes) and isinstance(dst, bytes):
+                    add(int.from_bytes(src, 'big'), _utf16(dst))
+            continue
+
+        for start_b, end_b, dst in zip(tokens[0::3], tokens[1::3], tokens[2::3]):
+            if not isinstance(start_b, bytes) or not isinstance(end_b, bytes) or len(start_b) != len(end_b):
+                continue
+            start, end = int.from_bytes(start_b, 'big'), int.from_bytes(end_b, 'big')
+            if isinstance(dst, list):
+                for code, text in zip(range(start, end + 1), dst):
+                    add(code, _utf16(text))
+            else:
+                prefix, var = dst[:-4], dst[-4:]
+                base = int.from_bytes(var, 'big')
+                for i in range(end - start + 1):
+                    add(start + i, _utf16(prefix + struct.pack(">L", base + i)[-len(var):]))
+    return mapping
+
+class Font:
+    """What the interpreter needs from a font: decoding, text, widths and descent."""
+
+    def __init__(self, fontname: str, descent: float, widths: dict, default_width: float,
+                 to_unicode: Dict[int, str], encoding: Optional[Dict[int, str]] = None,
+                 multibyte: bool = False):
+        self.fontname = fontname
+        # Font units (1/1000 em), forced negative as pdfminer does
+        self.descent = -descent if descent > 0 else descent
+        self.widths = widths
+        self.default_width = default_width
+        self.to_unicode = to_unicode
+        self.encoding = encoding or {}
+        self.multibyte = multibyte
+
+    def decode(self, raw: bytes) -> List[int]:
+        if self.multibyte:
+            n = len(raw) // 2
+            return list(struct.unpack(f">{n}H", raw[:n * 2])) if n else []
+        return list(raw)
+
+    def to_unichr(self, cid: int) -> Optional[str]:
+        text = self.to_unicode.get(cid)
+        if text is None:
+            text = self.encoding.get(cid)
+        return text
+
+    def char_width(self, cid: int) -> float:
+        width = self.widths.get(cid)
+        if width is None:
+            text = self.to_unichr(cid)
+            if text is not None:
+                width = self.widths.get(text)
+        return (self.default_width if width is None else width) * 0.001
+
+def _descriptor_value(descriptor, key: str, default=0):
+    return _number(descriptor[key]) if descriptor is not None and key in descriptor else default
+
+def _fontname(descriptor) -> str:
+    if descriptor is not None and '/FontName' in descriptor:
+        return _name(descriptor['/FontName'])
+    return "unknown"
+
+def _to_unicode(spec) -> Dict[int, str]:
+    if '/ToUnicode' not in spec:
+        return {}
+    import pikepdf
+    if not isinstance(spec['/ToUnicode'], pikepdf.Stream):
+        raise UnsupportedContent(f"ToUnicode {spec['/ToUnicode']}")
+    return parse_to_unicode(spec['/ToUnicode'].read_bytes())
+
+def _simple_font(spec) -> Font:
+    import pikepdf
+    from pdfminer.encodingdb import EncodingDB
+    from pdfminer.fontmetrics import FONT_METRICS
+    from pdfminer.psparser import LIT
+
+    subtype = _name(spec.get('/Subtype'))
+    if subtype not in ('Type1', 'MMType1', 'TrueType'):
+        raise UnsupportedContent(f"font {subtype}")
+
+    basefont = _name(spec['/BaseFont']) if '/BaseFont' in spec else "unknown"
+    descriptor = spec.get('/FontDescriptor')
+    if basefont in FONT_METRICS:
+        metrics, widths = FONT_METRICS[basefont]
+        fontname, descent = metrics.get('FontName', "unknown"), metrics.get('Descent', 0)
+        default_width = metrics.get('MissingWidth', 0)
+        widths = dict(widths)
+    else:
+        first = int(spec.get('/FirstChar', 0))
+        widths = {first + i: _number(w) for i, w in enumerate(spec.get('/Widths', [0] * 256))}
+        fontname, descent = _fontname(descriptor), _descriptor_value(descriptor, '/Descent')
+        default_width = _descriptor_value(descriptor, '/MissingWidth')
+    if '/Encoding' not in spec and descriptor is not None and '/FontFile' in descriptor:
+        raise UnsupportedContent("encoding inside the embedded font")
+
+    default_encoding = 'WinAnsiEncoding' if subtype == 'TrueType' else 'StandardEncoding'
+    encoding = spec.get('/Encoding', pikepdf.Name('/' + default_encoding))
+    if isinstance(encoding, pikepdf.Dictionary):
+        diff = [int(x) if isinstance(x, int) else LIT(_name(x)) for x in encoding.get('/Differences', [])]
+        cid2unicode = EncodingDB.get_encoding(_name(encoding.get('/BaseEncoding', default_encoding)), diff)
+    else:
+        cid2unicode = EncodingDB.get_encoding(_name(encoding))
+
+    return Font(fontname, descent, widths, default_width, _to_unicode(spec), cid2unicode)
+
+def _cid_widths(seq) -> dict:
+    widths, run = {}, []
+    for value in seq:
+        if isinstance(value, (int, Decimal)):
+            run.append(_number(value))
+            if len(run) == 3:
+                first, last, width = run
+                if isinstance(first, int) and isinstance(last, int):
+                    for cid in range(first, last + 1):
+                        widths[cid] = width
+                run = []
+        else:
+            if run:
+                first = run[-1]
+                for i, width in enumerate(value):
+                    widths[first + i] = _number(width)
+                run = []
+    return widths
+
+def _type0_font(spec) -> Font:
+    encoding = _name(spec.get('/Encoding', ''))
+    if encoding != 'Identity-H':
+        raise UnsupportedContent(f"CMap {encoding}")
+    cid_font = spec['/DescendantFonts'][0]
+    descriptor = cid_font.get('/FontDescriptor')
+    if '/ToUnicode' not in spec:
+        raise UnsupportedContent("CID font without ToUnicode")
+    return Font(_fontname(descriptor), _descriptor_value(descriptor, '/Descent'),
+                _cid_widths(cid_font.get('/W', [])), _number(cid_font.get('/DW', 1000)),
+                _to_unicode(spec), multibyte=True)
+
+def load_font(spec) -> Font:
+    if _name(spec.get('/Subtype')) == 'Type0':
+        return _type0_font(spec)
+    return _simple_font(spec)
+
+# Content stream interpreter
+
+class TextState:
+    __slots__ = ('font', 'fontsize', 'charspace', 'wordspace', 'scaling', 'leading', 'rise',
+                 'matrix', 'linematrix')
+
+    def __init__(self):
+        self.font = None
+        self.fontsize = 0
+        self.charspace = 0
+        self.wordspace = 0
+        self.scaling = 100
+        self.leading = 0
+        self.rise = 0
+        self.matrix = IDENTITY
+        self.linematrix = (0, 0)
+
+    def copy(self) -> 'TextState':
+        other = TextState()
+        for slot in self.__slots__:
+            setattr(other, slot, getattr(self, slot))
+        return other
+
+class PageReader:
+    """
+    Glyph boxes and painted paths of one page, in pdfminer's device space
+    (origin at the MediaBox corner), in painting order.
+    """
+
+    def __init__(self, fonts: dict):
+        self.fonts = fonts  # objgen -> Font, shared by the pages of a document
+        self.glyphs: List[tuple] = []  # (text, (x0, y0, x1, y1), fontname, upright)
+        self.paths: List[list] = []  # [(op, (x, y)), ...] per painted path
+
+    def _font(self, resources, name) -> Font:
+        font_dict = resources.get('/Font') if resources is not None else None
+        if font_dict is None or name not in font_dict:
+            raise UnsupportedContent(f"missing font {name}")
+        spec = font_dict[name]
+        key = spec.objgen if spec.objgen != (0, 0) else id(spec)
+        if key not in self.fonts:
+            self.fonts[key] = load_font(spec)
+        return self.fonts[key]
+
+    def run(self, stream, resources, ctm: Matrix, active=()):
+        import pikepdf
+
+        ts = TextState()
+        stack = []
+        path = []
+
+        for operands, operator in pikepdf.parse_content_stream(stream):
+            op = str(operator)
+            if op in PATH_OPS:
+                if op == 're':
+                    x, y, w, h = (float(v) for v in operands)
+                    path.extend((('m', apply_matrix_pt(ctm, (x, y))), ('l', apply_matrix_pt(ctm, (x + w, y))),
+                                 ('l', apply_matrix_pt(ctm, (x + w, y + h))), ('l', apply_matrix_pt(ctm, (x, y + h))),
+                                 ('h',)))
+                elif op == 'h':
+                    path.append(('h',))
+                elif len(operands) >= 2:
+                    path.append((op, apply_matrix_pt(ctm, (float(operands[-2]), float(operands[-1])))))
+            elif op in PAINT_OPS:
+                if op in ('s', 'b', 'b*'):
+                    path.append(('h',))
+                if path:
+                    self.paths.append(path)
+                path = []
+            elif op == 'n':
+                path = []
+            elif op in ('Tj', 'TJ', "'", '"'):
+                if op == "'":
+                    self._next_line(ts)
+                elif op == '"':
+                    # Like pdfminer, without the move to the next line
+                    ts.wordspace, ts.charspace = _number(operands[0]), _number(operands[1])
+                if ts.font is None:
+                    continue
+                seq = operands[0] if op == 'TJ' else [operands[-1]]
+                self._render(ts, seq, ctm)
+            elif op == 'Tf':
+                ts.font = self._font(resources, operands[0])
+                ts.fontsize = _number(operands[1])
+            elif op == 'Tm':
+                ts.matrix = tuple(_number(v) for v in operands)
+                ts.linematrix = (0, 0)
+            elif op in ('Td', 'TD'):
+                tx, ty = (_number(v) for v in operands)
+                ts.matrix = translate_matrix(ts.matrix, tx, ty)
+                if op == 'TD':
+                    ts.leading = ty
+                ts.linematrix = (0, 0)
+            elif op == 'T*':
+                self._next_line(ts)
+            elif op == 'BT':
+                ts.matrix = IDENTITY
+                ts.linematrix = (0, 0)
+            elif op == 'TL':
+                ts.leading = -_number(operands[0])
+            elif op == 'Tc':
+                ts.charspace = _number(operands[0])
+            elif op == 'Tw':
+                ts.wordspace = _number(operands[0])
+            elif op == 'Tz':
+                ts.scaling = _number(operands[0])
+            elif op == 'Ts':
+                ts.rise = _number(operands[0])
+            elif op == 'cm':
+                ctm = mult_matrix(tuple(_number(v) for v in operands), ctm)
+            elif op == 'q':
+                stack.append((ctm, ts.copy()))
+            elif op == 'Q':
+                if stack:
+                    ctm, ts = stack.pop()
+            elif op == 'Do':
+                self._do(resources, operands[0], ctm, active)
+
+    @staticmethod
+    def _next_line(ts: TextState):
+        (a, b, c, d, e, f) = ts.matrix
+        ts.matrix = (a, b, c, d, ts.leading * c + e, ts.leading * d + f)
+        ts.linematrix = (0, 0)
+
+    def _do(self, resources, name, ctm: Matrix, active):
+        xobjects = resources.get('/XObject') if resources is not None else None
+        if xobjects is None or name not in xobjects:
+            return
+        xobj = xobjects[name]
+        if xobj.get('/Subtype') != '/Form' or '/BBox' not in xobj or xobj.objgen in active:
+            return
+        matrix = tuple(_number(v) for v in xobj.get('/Matrix', IDENTITY))
+        # Forms before PDF 1.2 use the page's resources
+        form_resources = xobj.get('/Resources', resources)
+        self.run(xobj, form_resources, mult_matrix(matrix, ctm), active + (xobj.objgen,))
+
+    def _render(self, ts: TextState, seq, ctm: Matrix):
+        matrix = mult_matrix(ts.matrix, ctm)
+        font, fontsize, rise = ts.font, ts.fontsize, ts.rise
+        scaling = ts.scaling * 0.01
+        charspace = ts.charspace * scaling
+        wordspace = 0 if font.multibyte else ts.wordspace * scaling
+        dxscale = 0.001 * fontsize * scaling
+        descent = font.descent * 0.001 * fontsize
+        (a, b, c, d, _e, _f) = matrix
+        upright = a * d * scaling > 0 and b * c <= 0
+
+        (x, y) = ts.linematrix
+        needcharspace = False
+        for obj in seq:
+            if isinstance(obj, (int, Decimal)):
+                x -= _number(obj) * dxscale
+                needcharspace = True
+                continue
+            for cid in font.decode(bytes(obj)):
+                if needcharspace:
+                    x += charspace
+                text = font.to_unichr(cid)
+                adv = font.char_width(cid) * fontsize * scaling
+                box = apply_matrix_rect(translate_matrix(matrix, x, y),
+                                        (0, descent + rise, adv, descent + rise + fontsize))
+                self.glyphs.append((f"(cid:{cid})" if text is None else text, box, font.fontname, upright))
+                x += adv
+                if cid == 32 and wordspace:
+                    x += wordspace
+                needcharspace = True
+        ts.linematrix = (x, y)
+
+def _normalize_box(box, rotation: int) -> Tuple[float, float, float, float]:
+    x0, x1 = sorted((_number(box[0]), _number(box[2])))
+    y0, y1 = sorted((_number(box[1]), _number(box[3])))
+    return (y0, x0, y1, x1) if rotation in (90, 270) else (x0, y0, x1, y1)
+
+def _page_ctm(mediabox, rotation: int) -> Matrix:
+    """pdfminer's initial CTM: moves the MediaBox corner to the origin and applies /Rotate."""
+    x0, x1 = sorted((_number(mediabox[0]), _number(mediabox[2])))
+    y0, y1 = sorted((_number(mediabox[1]), _number(mediabox[3])))
+    if rotation == 90:
+        return (0, -1, 1, 0, -y0, x1)
+    if rotation == 180:
+        return (-1, 0, 0, -1, x1, y1)
+    if rotation == 270:
+        return (0, 1, -1, 0, y1, -x0)
+    return (1, 0, 0, 1, -x0, -y0)
+
+# Words
+
+def _begins_new_word(prev: dict, curr: dict, upright: bool, x_tolerance: float, y_tolerance: float) -> bool:
+    if upright:  # left to right, lines by top
+        x, y = x_tolerance, y_tolerance
+        ay, cy = prev['top'], curr['top']
+        ax, bx, cx = prev['x0'], prev['x1'], curr['x0']
+    else:  # top to bottom, lines by x0
+        x, y = y_tolerance, x_tolerance
+        ay, cy = prev['x0'], curr['x0']
+        ax, bx, cx = prev['top'], prev['bottom'], curr['top']
+    return cx < ax or cx > bx + x or abs(cy - ay) > y
+
+def _cluster(chars: List[dict], key, tolerance: float) -> List[List[dict]]:
+    """pdfplumber's cluster_objects: values chained while within `tolerance` of the previous one."""
+    values = sorted(set(map(key, chars)))
+    cluster_of, cluster = {}, 0
+    for i, value in enumerate(values):
+        if i and value > values[i - 1] + tolerance:
+            cluster += 1
+        cluster_of[value] = cluster
+    ordered = sorted(chars, key=lambda ch: cluster_of[key(ch)])
+    return [list(group) for _, group in groupby(ordered, key=lambda ch: cluster_of[key(ch)])]
+
+def _merge(chars: List[dict]) -> dict:
+    x0 = min(ch['x0'] for ch in chars)
+    top = min(ch['top'] for ch in chars)
+    x1 = max(ch['x1'] for ch in chars)
+    bottom = max(ch['bottom'] for ch in chars)
+    return {
+        'text': ''.join(LIGATURES.get(ch['text'], ch['text']) for ch in chars),
+        'x0': x0, 'x1': x1, 'top': top,
+        'doctop': top + (chars[0]['doctop'] - chars[0]['top']),
+        'bottom': bottom, 'upright': chars[0]['upright'],
+        'height': bottom - top, 'width': x1 - x0,
+    }
+
+def extract_words(chars: List[dict], x_tolerance: float = 3, y_tolerance: float = 3,
+                  keep_blank_chars: bool = False) -> List[dict]:
+    """Same words as pdfplumber's extract_words() with default directions."""
+    words = []
+    for upright, run in groupby(chars, key=itemgetter('upright')):
+        run = list(run)
+        if upright:
+            lines = _cluster(run, itemgetter('top'), y_tolerance)
+            sort_key = itemgetter('x0')
+        else:
+            lines = _cluster(run, itemgetter('x0'), x_tolerance)
+            sort_key = lambda ch: (ch['top'], ch['bottom'])
+
+        for line in lines:
+            current = []
+            for ch in sorted(line, key=sort_key):
+                if not keep_blank_chars and ch['text'].isspace():
+                    if current:
+                        words.append(_merge(current))
+                    current = []
+                elif current and _begins_new_word(current[-1], ch, upright, x_tolerance, y_tolerance):
+                    words.append(_merge(current))
+                    current = [ch]
+                else:
+                    current.append(ch)
+            if current:
+                words.append(_merge(current))
+    return words
+
+def read_pages(pdf_path: str, **extract_kwargs) -> List[dict]:
+    """
+    [{'page_number', 'width', 'height', 'words', 'chars', 'boxes', 'segments'}, ...]
+    for every page, like pdfplumber. Raises UnsupportedContent when some page needs
+    the full pdfminer interpreter.
+    """
+    import pikepdf
+    from src.shapes import page_shapes
+
+    unknown = set(extract_kwargs) - set(WORD_OPTIONS)
+    if unknown:
+        raise UnsupportedContent(f"extract_words options {sorted(unknown)}")
+
+    pages, fonts, doctop = [], {}, 0
+    with pikepdf.open(pdf_path) as pdf:
+        for page_number, page in enumerate(pdf.pages, start=1):
+            rotation = int(_inherited(page.obj, '/Rotate') or 0) % 360
+            mediabox = _inherited(page.obj, '/MediaBox')
+            mb_x0, mb_y0, mb_x1, mb_y1 = _normalize_box(mediabox, rotation)
+            height = mb_y1 - mb_y0
+            mb_top = height - mb_y1  # pdfplumber's MediaBox, flipped to a top-left origin
+
+            reader = PageReader(fonts)
+            if '/Contents' in page.obj:
+                reader.run(page, _inherited(page.obj, '/Resources'), _page_ctm(mediabox, rotation))
+
+            chars = []
+            for text, (x0, y0, x1, y1), fontname, upright in reader.glyphs:
+                top = (height - y1) + mb_top
+                chars.append({
+                    'text': text,
+                    'x0': x0 + mb_x0,
+                    'x1': x1 + mb_x0,
+                    'top': top,
+                    'bottom': (height - y0) + mb_top,
+                    'doctop': doctop + top,
+                    'upright': upright,
+                    'fontname': fontname,
+                    'size': y1 - y0,
+                })
+
+            # Paths in pdfplumber's layout, as page_shapes expects them
+            to_page = lambda pt: (pt[0] + mb_x0, (height - pt[1]) + mb_top)
+            boxes, segments = page_shapes([(seg[0], to_page(seg[1])) if len(seg) > 1 else seg for seg in p]
+                                          for p in reader.paths)
+
+            pages.append({
+                'page_number': page_number,
+                'width': mb_x1 - mb_x0,
+                'height': height,
+                'words': extract_words(chars, **extract_kwargs),
+                'chars': chars,
+                'boxes': boxes,
+                'segments': segments,
+            })
+            doctop += height
+    return pages
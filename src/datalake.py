@@ -1,16 +1,48 @@
-from typing import List
+"""
+Position data source for the pipeline.
+
+DataLakeService talks to a pluggable backend. The default is the in-code
+mock data; JSON and SQLite stand-ins let us exercise the bulk path offline
+with realistic volumes (and an optional simulated round-trip latency):
+
+    ORGCHART_DATALAKE=sqlite:datalake.sqlite ORGCHART_DATALAKE_LATENCY_MS=40 python main.py
+    python -m src.datalake export mock sqlite:datalake.sqlite
+"""
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
 from src.models import PositionData
 
-class DataLakeService:
+DATALAKE_SPEC = os.environ.get("ORGCHART_DATALAKE", "mock")
+LATENCY_MS = float(os.environ.get("ORGCHART_DATALAKE_LATENCY_MS", "0"))
+MAX_CONCURRENCY = int(os.environ.get("ORGCHART_DATALAKE_CONCURRENCY", "8"))
+
+class PositionBackend:
     """
-    Service to fetch organization chart data.
+    Where positions come from. Implementations must be safe to call from
+    several threads: the service fans bulk requests out over a pool.
     """
-    
-    def get_positions_for_org(self, org_id: str) -> List[PositionData]:
-        """
-        Fetches position data for a given org_id.
-        Currently returns mock data.
-        """
+
+    def fetch(self, org_id: str) -> List[PositionData]:
+        raise NotImplementedError
+
+    def org_ids(self) -> List[str]:
+        """Every org the backend has data for."""
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+class MockBackend(PositionBackend):
+    """Hard-coded sample data (the original behaviour)."""
+
+    def fetch(self, org_id: str) -> List[PositionData]:
         # Mock Data Implementation
         if org_id == "01_ORGANIGRAMA_CEO":
             return [
@@ -29,7 +61,7 @@ class DataLakeService:
                     active_flag=True
                 )
             ]
-        
+
         if org_id == "02_ORGANIGRAMA_LUCAS":
             return [
                 PositionData(
@@ -40,5 +72,214 @@ class DataLakeService:
                     active_flag=True
                 )
             ]
-        
+
         return []
+
+    def org_ids(self) -> List[str]:
+        return ["01_ORGANIGRAMA_CEO", "02_ORGANIGRAMA_LUCAS"]
+
+class StandInBackend(PositionBackend):
+    """Base for the offline stand-ins: sleeps `latency_ms` per call to mimic a round trip."""
+
+    def __init__(self, latency_ms: float = LATENCY_MS):
+        self.latency_ms = latency_ms
+
+    def _round_trip(self):
+        if self.latency_ms:
+            time.sleep(self.latency_ms / 1000)
+
+class JsonFileBackend(StandInBackend):
+    """
+    Positions from a JSON file: {"positions": [{org_id, node_id, title,
+    person_name, active_flag}, ...]}, read once and grouped by org.
+    """
+
+    def __init__(self, path: str, latency_ms: float = LATENCY_MS):
+        super().__init__(latency_ms)
+        self.path = path
+        with open(path, 'r', encoding='utf-8') as f:
+            rows = json.load(f)['positions']
+        self._by_org: Dict[str, List[PositionData]] = {}
+        for row in rows:
+            position = PositionData(**row)
+            self._by_org.setdefault(position.org_id, []).append(position)
+
+    def fetch(self, org_id: str) -> List[PositionData]:
+        self._round_trip()
+        return list(self._by_org.get(org_id, []))
+
+    def org_ids(self) -> List[str]:
+        return sorted(self._by_org)
+
+class SQLiteBackend(StandInBackend):
+    """
+    Positions from a SQLite table; one connection per thread, as sqlite3 requires.
+    The file must already exist (see write_sqlite): a mistyped path fails
+    instead of becoming an empty datalake.
+    """
+
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS positions (
+        org_id TEXT NOT NULL,
+        node_id TEXT NOT NULL,
+        title TEXT NOT NULL,
+        person_name TEXT NOT NULL,
+        active_flag INTEGER NOT NULL DEFAULT 1,
+        PRIMARY KEY (org_id, node_id)
+    );
+    """
+
+    def __init__(self, path: str, latency_ms: float = LATENCY_MS):
+        super().__init__(latency_ms)
+        if not os.path.isfile(path):
+            raise FileNotFoundError(f"Datalake database not found: {path}")
+        self.path = path
+        self._uri = Path(path).resolve().as_uri() + "?mode=rw"
+        self._local = threading.local()
+        self._connections: List[sqlite3.Connection] = []
+        self._lock = threading.Lock()
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self._uri, uri=True, timeout=30, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+            with self._lock:
+                self._connections.append(conn)
+        return conn
+
+    def fetch(self, org_id: str) -> List[PositionData]:
+        self._round_trip()
+        rows = self._conn().execute(
+            "SELECT org_id, node_id, title, person_name, active_flag FROM positions "
+            "WHERE org_id = ? ORDER BY rowid", (org_id,)).fetchall()
+        return [PositionData(org_id=r[0], node_id=r[1], title=r[2], person_name=r[3],
+                             active_flag=bool(r[4])) for r in rows]
+
+    def org_ids(self) -> List[str]:
+        return [r[0] for r in self._conn().execute("SELECT DISTINCT org_id FROM positions ORDER BY org_id")]
+
+    def close(self):
+        with self._lock:
+            for conn in self._connections:
+                conn.close()
+            self._connections = []
+
+def open_backend(spec: str = DATALAKE_SPEC) -> PositionBackend:
+    """Backend from a spec string: 'mock', 'json:<path>' or 'sqlite:<path>'."""
+    kind, _, path = spec.partition(':')
+    if kind == "mock":
+        return MockBackend()
+    if kind == "json" and path:
+        return JsonFileBackend(path)
+    if kind == "sqlite" and path:
+        return SQLiteBackend(path)
+    raise ValueError(f"Unknown datalake backend '{spec}' (expected mock, json:<path> or sqlite:<path>)")
+
+def write_json(path: str, positions: Iterable[PositionData]):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({'positions': [p.model_dump() for p in positions]}, f, indent=2, ensure_ascii=False)
+
+def write_sqlite(path: str, positions: Iterable[PositionData]):
+    conn = sqlite3.connect(path)
+    try:
+        conn.executescript(SQLiteBackend.SCHEMA)
+        with conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO positions (org_id, node_id, title, person_name, active_flag) "
+                "VALUES (?, ?, ?, ?, ?)",
+                ((p.org_id, p.node_id, p.title, p.person_name, int(p.active_flag)) for p in positions))
+    finally:
+        conn.close()
+
+class DataLakeService:
+    """
+    Service to fetch organization chart data.
+    Bulk requests run over a pooled, bounded set of worker threads, so at most
+    `max_concurrency` round trips are in flight against the backend at once.
+    """
+
+    def __init__(self, backend: Optional[PositionBackend] = None, max_concurrency: int = MAX_CONCURRENCY):
+        self.backend = backend if backend is not None else open_backend()
+        self.max_concurrency = max(1, max_concurrency)
+        self._pool: Optional[ThreadPoolExecutor] = None
+        self._pool_lock = threading.Lock()
+
+    def _executor(self) -> ThreadPoolExecutor:
+        # Created on first bulk call and reused by later ones
+        with self._pool_lock:
+            if self._pool is None:
+                self._pool = ThreadPoolExecutor(max_workers=self.max_concurrency,
+                                                thread_name_prefix="datalake")
+            return self._pool
+
+    def get_positions_for_org(self, org_id: str) -> List[PositionData]:
+        """
+        Fetches position data for a given org_id.
+        """
+        return self.backend.fetch(org_id)
+
+    def get_positions_for_orgs(self, org_ids: Iterable[str],
+                               errors: Optional[Dict[str, Exception]] = None,
+                               durations: Optional[Dict[str, float]] = None) -> Dict[str, List[PositionData]]:
+        """
+        Fetches several orgs at once: {org_id: positions}.
+        A failing org raises, unless an `errors` dict is given; then its
+        exception is recorded there and the org is left out of the result.
+        With a `durations` dict, each org's fetch time (seconds) is stored there.
+        """
+        org_ids = list(dict.fromkeys(org_ids))
+        if not org_ids:
+            return {}
+
+        def fetch(org_id: str) -> List[PositionData]:
+            start = time.perf_counter()
+            try:
+                return self.backend.fetch(org_id)
+            finally:
+                if durations is not None:
+                    durations[org_id] = time.perf_counter() - start
+
+        futures = {org_id: self._executor().submit(fetch, org_id) for org_id in org_ids}
+        results = {}
+        for org_id, future in futures.items():
+            try:
+                results[org_id] = future.result()
+            except Exception as e:
+                if errors is None:
+                    raise
+                errors[org_id] = e
+        return results
+
+    def close(self):
+        with self._pool_lock:
+            if self._pool is not None:
+                self._pool.shutdown(wait=True)
+                self._pool = None
+        self.backend.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+if __name__ == "__main__":
+    if len(sys.argv) != 4 or sys.argv[1] != "export":
+        print("Uso: python -m src.datalake export <origen> json:<archivo>|sqlite:<archivo>")
+        print("     (origen: mock, json:<archivo> o sqlite:<archivo>)")
+        sys.exit(1)
+
+    source_spec, target_spec = sys.argv[2:]
+    target_kind, _, target_path = target_spec.partition(':')
+    if target_kind not in ("json", "sqlite") or not target_path:
+        print(f"❌ Destino inválido: {target_spec}")
+        sys.exit(1)
+
+    with DataLakeService(open_backend(source_spec)) as service:
+        by_org = service.get_positions_for_orgs(service.backend.org_ids())
+    positions = [p for org_positions in by_org.values() for p in org_positions]
+
+    (write_json if target_kind == "json" else write_sqlite)(target_path, positions)
+    print(f"✅ {len(positions)} posiciones de {len(by_org)} organigramas exportadas a {target_path}")
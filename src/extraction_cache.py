@@ -0,0 +1,156 @@
+import hashlib
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from importlib.metadata import version
+from typing import List, Optional
+
+# Bump when the cached layout changes so old entries are ignored
+CACHE_FORMAT = 2
+CACHE_DIR = os.environ.get("ORGCHART_CACHE_DIR", os.path.join(".cache", "extraction"))
+# pdfplumber (full pdfminer layout) or pikepdf (src/content_text, falls back
+# to pdfplumber for content it does not model)
+BACKENDS = ("pdfplumber", "pikepdf")
+EXTRACT_BACKEND = os.environ.get("ORGCHART_EXTRACT_BACKEND", "pdfplumber")
+
+WORD_FIELDS = ('text', 'x0', 'x1', 'top', 'bottom', 'doctop', 'upright', 'height', 'width')
+CHAR_FIELDS = ('text', 'x0', 'x1', 'top', 'bottom', 'fontname', 'size')
+
+# Documents with at least this many pages are parsed by several processes
+PARALLEL_MIN_PAGES = 4
+EXTRACT_WORKERS = int(os.environ.get("ORGCHART_EXTRACT_WORKERS", "0")) or (os.cpu_count() or 1)
+
+def file_digest(pdf_path: str) -> str:
+    """SHA-256 of the PDF's bytes: the cache key does not depend on path or mtime."""
+    h = hashlib.sha256()
+    with open(pdf_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+def settings_digest(extract_kwargs: dict, backend: str = "pdfplumber") -> str:
+    """
+    Short hash of the extractor settings that affect the cached geometry.
+    Versions come from the package metadata, so a cache hit never imports
+    the parsers.
+    """
+    settings = {
+        "format": CACHE_FORMAT,
+        "pdfplumber": version("pdfplumber"),
+        "extract_words": extract_kwargs,
+    }
+    if backend != "pdfplumber":
+        settings["backend"] = backend
+        settings["pikepdf"] = version("pikepdf")
+    payload = json.dumps(settings, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()[:16]
+
+def cache_path(digest: str, settings: str, cache_dir: Optional[str] = None) -> str:
+    return os.path.join(cache_dir or CACHE_DIR, f"{digest}-{settings}.json")
+
+def _pick(obj: dict, fields) -> dict:
+    return {k: obj[k] for k in fields if k in obj}
+
+def _shapes(page) -> dict:
+    """{'boxes', 'segments'} of a pdfplumber page (see src.shapes)."""
+    from src.shapes import page_shapes
+    boxes, segments = page_shapes(obj['path'] for obj in page.rects + page.lines + page.curves)
+    return {'boxes': boxes, 'segments': segments}
+
+def parse_page_range(pdf_path: str, extract_kwargs: dict, start: int = 0, stop: Optional[int] = None) -> List[dict]:
+    """Parses pages [start, stop) with pdfplumber (the slow path)."""
+    import pdfplumber
+    pages = []
+    with pdfplumber.open(pdf_path) as pdf:
+        for page in pdf.pages[start:stop]:
+            pages.append({
+                'page_number': page.page_number,
+                'width': float(page.width),
+                'height': float(page.height),
+                'words': [_pick(w, WORD_FIELDS) for w in page.extract_words(**extract_kwargs)],
+                'chars': [_pick(c, CHAR_FIELDS) for c in page.chars],
+                **_shapes(page),
+            })
+            page.close()  # Drop the page's parsed objects before the next one
+    return pages
+
+def parse_pages(pdf_path: str, extract_kwargs: dict, workers: Optional[int] = None) -> List[dict]:
+    """
+    Parses every page. Documents of PARALLEL_MIN_PAGES pages or more are
+    split in contiguous page ranges, one per worker process.
+    """
+    workers = workers or EXTRACT_WORKERS
+    if workers <= 1:
+        return parse_page_range(pdf_path, extract_kwargs)
+
+    import pikepdf  # Counts pages without pdfminer parsing the document
+    with pikepdf.open(pdf_path) as pdf:
+        page_count = len(pdf.pages)
+
+    workers = min(workers, page_count)
+    if workers <= 1 or page_count < PARALLEL_MIN_PAGES:
+        return parse_page_range(pdf_path, extract_kwargs)
+
+    chunk = -(-page_count // workers)
+    ranges = [(start, min(start + chunk, page_count)) for start in range(0, page_count, chunk)]
+    with ProcessPoolExecutor(max_workers=len(ranges)) as executor:
+        futures = [executor.submit(parse_page_range, pdf_path, extract_kwargs, start, stop)
+                   for start, stop in ranges]
+        return [page for future in futures for page in future.result()]
+
+def parse_pages_pikepdf(pdf_path: str, extract_kwargs: dict, workers: Optional[int] = None) -> List[dict]:
+    """
+    Parses every page from the content streams (src/content_text), or with
+    pdfplumber when the document uses something that backend does not model.
+    """
+    from src.content_text import UnsupportedContent, read_pages
+    try:
+        pages = read_pages(pdf_path, **extract_kwargs)
+    except UnsupportedContent:
+        return parse_pages(pdf_path, extract_kwargs, workers)
+    for page in pages:
+        page['words'] = [_pick(w, WORD_FIELDS) for w in page['words']]
+        page['chars'] = [_pick(c, CHAR_FIELDS) for c in page['chars']]
+    return pages
+
+def load_pages(pdf_path: str, cache_dir: Optional[str] = None, workers: Optional[int] = None,
+               backend: Optional[str] = None, **extract_kwargs) -> List[dict]:
+    """
+    Per-page word/char geometry of a PDF, every page in order:
+    [{'page_number', 'width', 'height', 'words', 'chars', 'boxes', 'segments'}, ...]
+    (page_number is 1-based, as in pdfplumber; boxes and segments are the
+    chart's frames and lines, see src.shapes).
+
+    Results are cached on disk under a key made of the PDF content hash and
+    the extractor settings, so an unchanged template is parsed only once no
+    matter which tool asks for it.
+
+    `backend` (default EXTRACT_BACKEND) picks the parser; both give the same
+    words, chars and shapes on our templates, and each has its own cache entries.
+    """
+    backend = backend or EXTRACT_BACKEND
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown extraction backend: {backend}")
+    digest = file_digest(pdf_path)
+    path = cache_path(digest, settings_digest(extract_kwargs, backend), cache_dir)
+
+    if os.path.exists(path):
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                return json.load(f)['pages']
+        except (OSError, ValueError, KeyError):
+            pass  # Corrupt entry: parse again and overwrite
+
+    if backend == "pikepdf":
+        pages = parse_pages_pikepdf(pdf_path, extract_kwargs, workers)
+    else:
+        pages = parse_pages(pdf_path, extract_kwargs, workers)
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump({'source': os.path.basename(pdf_path), 'pages': pages}, f,
+                  ensure_ascii=False, separators=(',', ':'))
+    os.replace(tmp_path, path)
+
+    return pages
@@ -0,0 +1,251 @@
+"""
+Single-pass extraction engine for the coordinates and positions databases.
+
+Each template PDF is parsed once (word geometry through the extraction
+cache), its words are grouped once (src.word_groups) and the same groups
+feed both databases: every group goes to coordinates, and the groups
+classified as CARGO / NOMBRE / TITLE / TEXT / OTHER go to positions.
+The page's boxes and connector lines (src.shapes) are stored with both,
+and each group records the box it sits in.
+extract_coordinates.py and extract_positions.py are views over
+build_databases(), so running either one refreshes both.
+
+    python -m src.extractor [--json] [--backend pikepdf]
+"""
+import sys
+from bisect import bisect_left, bisect_right
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from src.extraction_cache import load_pages
+from src.shapes import enclosing_box, pdf_box, pdf_segment
+from src.spatial import GridIndex
+from src.store import KINDS, OrgStore
+from src.text_index import build_trigram_index
+from src.word_groups import group_elements
+
+TEMPLATES_DIR = Path("input/templates")
+
+def is_mixed_case(text: str) -> bool:
+    """Has both upper and lower case letters (like a person's name)."""
+    return any(c.islower() for c in text) and any(c.isupper() for c in text)
+
+class NeighborIndex:
+    """
+    Height index of a page's elements for classify_text_element.
+
+    Classification only looks at the neighbours' y, so it is enough to keep
+    the sorted y of the mixed-case elements (possible names) and of the
+    upper-case ones (possible titles): each check is a binary search over
+    the band of interest instead of a scan of the whole page.
+    """
+
+    def __init__(self, elements: Iterable[dict]):
+        elements = list(elements)
+        self.mixed_case_ys = sorted(e['y'] for e in elements if is_mixed_case(e['text']))
+        self.upper_ys = sorted(e['y'] for e in elements if e['text'].isupper())
+
+    @staticmethod
+    def _any_within(ys: List[float], center: float, radius: float) -> bool:
+        # The band is widened by 1pt so rounding never leaves a candidate out;
+        # the exact condition is then evaluated as in the full scan
+        for y in ys[bisect_left(ys, center - radius - 1):bisect_right(ys, center + radius + 1)]:
+            if abs(y - center) < radius:
+                return True
+        return False
+
+    def has_name_near(self, center: float, radius: float) -> bool:
+        return self._any_within(self.mixed_case_ys, center, radius)
+
+    def has_title_near(self, center: float, radius: float) -> bool:
+        return self._any_within(self.upper_ys, center, radius)
+
+def classify_text_element(text: str, y_coord: float, all_elements: List[dict],
+                          index: Optional[NeighborIndex] = None) -> str:
+    """
+    CARGO, TITLE, NOMBRE, TEXT or OTHER. With a NeighborIndex of
+    `all_elements` the neighbours are looked up in the index.
+    """
+    # Titles are usually upper case
+    if text.isupper() and len(text) > 3:
+        # A name right below makes it a position title
+        if index is not None:
+            nearby_below = index.has_name_near(y_coord - 10, 15)
+        else:
+            nearby_below = [e for e in all_elements if
+                            abs(e['y'] - (y_coord - 10)) < 15 and
+                            is_mixed_case(e['text'])]
+        if nearby_below:
+            return 'CARGO'
+        return 'TITLE'
+
+    # Names are usually mixed case
+    elif is_mixed_case(text):
+        # A title right above makes it a person's name
+        if index is not None:
+            nearby_above = index.has_title_near(y_coord + 10, 15)
+        else:
+            nearby_above = [e for e in all_elements if
+                            abs(e['y'] - (y_coord + 10)) < 15 and
+                            e['text'].isupper()]
+        if nearby_above:
+            return 'NOMBRE'
+        return 'TEXT'
+
+    return 'OTHER'
+
+def pdf_shapes(page: dict, page_index: int) -> dict:
+    """{'boxes', 'segments'} of one page from load_pages, in PDF coordinates."""
+    return {
+        'boxes': [{**pdf_box(b, page['height']), 'page': page_index} for b in page['boxes']],
+        'segments': [{**pdf_segment(s, page['height']), 'page': page_index} for s in page['segments']],
+    }
+
+def join_boxes(groups: List[dict], boxes: List[dict], first_box: int = 0):
+    """
+    Sets 'box' on every group inside one of the page's `boxes` (its position
+    in the org's box list, which starts at `first_box` for this page).
+    """
+    index = GridIndex(boxes)
+    for group in groups:
+        box = enclosing_box(group, boxes, index)
+        if box is not None:
+            group['box'] = first_box + box
+
+def extract_page(page: dict, page_index: int, first_box: int = 0) -> Tuple[List[dict], List[dict], dict]:
+    """
+    (coordinate elements, classified position elements, shapes) of one page
+    from load_pages, in PDF coordinates of that page. Elements inside a box
+    point to it by its position in the org's boxes (this page's start at
+    `first_box`).
+    """
+    groups = group_elements(page['words'], page['height'])
+    shapes = pdf_shapes(page, page_index)
+    join_boxes(groups, shapes['boxes'], first_box)
+    index = NeighborIndex(groups)
+    coordinates = [{**group, 'page': page_index} for group in groups]
+    positions = [{**group, 'type': classify_text_element(group['text'], group['y'], groups, index),
+                  'page': page_index} for group in groups]
+    return coordinates, positions, shapes
+
+def extract_pdf(pdf_path: str, backend: Optional[str] = None) -> dict:
+    """
+    Both views of every page of a PDF, from a single parse:
+    {'pages': [{'width', 'height'}], 'text_elements': [...], 'positions': [...],
+     'shapes': {'boxes': [...], 'segments': [...]}}.
+    `backend` is the extraction_cache parser (pdfplumber / pikepdf).
+    """
+    pages = load_pages(pdf_path, backend=backend)
+    text_elements, positions = [], []
+    shapes = {'boxes': [], 'segments': []}
+    for page_index, page in enumerate(pages):
+        page_coordinates, page_positions, page_shapes = extract_page(page, page_index, len(shapes['boxes']))
+        text_elements.extend(page_coordinates)
+        positions.extend(page_positions)
+        shapes['boxes'].extend(page_shapes['boxes'])
+        shapes['segments'].extend(page_shapes['segments'])
+    return {
+        'pages': [{'width': page['width'], 'height': page['height']} for page in pages],
+        'text_elements': text_elements,
+        'positions': positions,
+        'shapes': shapes,
+    }
+
+def split_positions(positions: List[dict]) -> Tuple[List[dict], List[dict], List[dict]]:
+    """(cargos, nombres, otros) of a list of classified elements."""
+    cargos = [e for e in positions if e['type'] == 'CARGO']
+    nombres = [e for e in positions if e['type'] == 'NOMBRE']
+    otros = [e for e in positions if e['type'] in ['TITLE', 'TEXT', 'OTHER']]
+    return cargos, nombres, otros
+
+def coordinates_org(pdf_path: str, extracted: dict) -> dict:
+    """An org of coordinates_db.json."""
+    return {
+        "pdf_path": pdf_path,
+        "page_dimensions": dict(extracted['pages'][0]),
+        "pages": extracted['pages'],
+        "text_elements": extracted['text_elements'],
+        "shapes": extracted['shapes'],
+    }
+
+def positions_org(pdf_path: str, extracted: dict) -> dict:
+    """An org of positions_db.json."""
+    cargos, nombres, otros = split_positions(extracted['positions'])
+    return {
+        "pdf_path": pdf_path,
+        "page_dimensions": dict(extracted['pages'][0]),
+        "pages": extracted['pages'],
+        "cargos": cargos,
+        "nombres": nombres,
+        "otros": otros,
+        "shapes": extracted['shapes'],
+    }
+
+ORG_BUILDERS = {"coordinates": coordinates_org, "positions": positions_org}
+
+def build_databases(export_json: Iterable[str] = (), templates_dir: Path = TEMPLATES_DIR,
+                    backend: Optional[str] = None) -> Optional[Dict[str, dict]]:
+    """
+    Extracts every PDF in templates_dir once and upserts it in the store as
+    both kinds; the kinds in `export_json` are also exported to their
+    classic JSON files. Returns {kind: database in the classic JSON layout},
+    or None when there are no PDFs.
+    """
+    pdf_files = list(Path(templates_dir).glob("*.pdf"))
+
+    if not pdf_files:
+        print(f"❌ No se encontraron PDFs en {Path(templates_dir).as_posix()}/")
+        return None
+
+    databases = {kind: {"version": KINDS[kind]["version"], "description": KINDS[kind]["description"],
+                        "organigramas": {}} for kind in ORG_BUILDERS}
+
+    print(f"🔍 Encontrados {len(pdf_files)} PDFs para procesar\n")
+
+    store = OrgStore()
+
+    for pdf_file in pdf_files:
+        org_id = pdf_file.stem  # Nombre sin extensión
+        print(f"\n📄 Procesando: {pdf_file}")
+
+        try:
+            extracted = extract_pdf(str(pdf_file), backend)
+            cargos, nombres, otros = split_positions(extracted['positions'])
+            pages_note = f" en {len(extracted['pages'])} páginas" if len(extracted['pages']) > 1 else ""
+            print(f"  ✓ {len(extracted['text_elements'])} grupos de texto: {len(cargos)} cargos, "
+                  f"{len(nombres)} nombres, {len(otros)} otros{pages_note}")
+            print(f"  ✓ {len(extracted['shapes']['boxes'])} recuadros y "
+                  f"{len(extracted['shapes']['segments'])} líneas")
+
+            # Upsert de ambas vistas (con su índice de trigramas) en SQLite
+            for kind, build_org in ORG_BUILDERS.items():
+                org = build_org(pdf_file.as_posix(), extracted)
+                databases[kind]["organigramas"][org_id] = org
+                texts = [e['text'] for e in KINDS[kind]["elements_of"](org)]
+                store.upsert_org(kind, org_id, org, build_trigram_index(texts))
+        except Exception as e:
+            print(f"  ❌ Error procesando {pdf_file.name}: {e}")
+
+    # Quitar organigramas cuyo PDF ya no existe
+    for kind in ORG_BUILDERS:
+        removed = store.delete_orgs_except(kind, [pdf_file.stem for pdf_file in pdf_files])
+        if removed:
+            print(f"\n🗑️  Eliminados de la base ({kind}): {removed}")
+
+    print(f"\n✅ Coordenadas y posiciones guardadas en: {store.path}")
+
+    # Exportar también al formato JSON clásico (más su índice)
+    for kind in export_json:
+        output_path = KINDS[kind]["json_path"]
+        store.export_json(kind, output_path)
+        print(f"📄 Exportada a: {output_path}")
+
+    store.close()
+    return databases
+
+if __name__ == "__main__":
+    from src.cli import pop_extract_backend
+
+    args = sys.argv[1:]
+    backend = pop_extract_backend(args)
+    build_databases(export_json=ORG_BUILDERS if '--json' in args else (), backend=backend)
@@ -0,0 +1,139 @@
+from collections import deque
+from typing import Dict, Iterable, Iterator, List, Tuple
+
+# Words whose tops differ by less than this (pt) are on the same line
+LINE_TOLERANCE = 3
+
+class AhoCorasick:
+    """
+    Multi-pattern literal matcher.
+    Finds every occurrence of every pattern in a single pass over the text,
+    regardless of how many patterns are loaded.
+    """
+
+    def __init__(self, patterns: Iterable[str]):
+        self.patterns: List[str] = [p for p in dict.fromkeys(patterns) if p]
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[List[int]] = [[]]
+
+        for index, pattern in enumerate(self.patterns):
+            state = 0
+            for char in pattern:
+                nxt = self._goto[state].get(char)
+                if nxt is None:
+                    nxt = len(self._goto)
+                    self._goto[state][char] = nxt
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._out.append([])
+                state = nxt
+            self._out[state].append(index)
+
+        # Breadth-first pass to compute failure links
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, nxt in self._goto[state].items():
+                queue.append(nxt)
+                fallback = self._fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                target = self._goto[fallback].get(char, 0)
+                self._fail[nxt] = target if target != nxt else 0
+                self._out[nxt] = self._out[nxt] + self._out[self._fail[nxt]]
+
+    def iter_matches(self, text: str) -> Iterator[Tuple[int, int, str]]:
+        """Yields (start, end, pattern) for every occurrence, overlaps included."""
+        state = 0
+        for pos, char in enumerate(text):
+            while state and char not in self._goto[state]:
+                state = self._fail[state]
+            state = self._goto[state].get(char, 0)
+            for index in self._out[state]:
+                pattern = self.patterns[index]
+                yield pos + 1 - len(pattern), pos + 1, pattern
+
+    def find_all(self, text: str) -> List[Tuple[int, int, str]]:
+        """
+        Returns non-overlapping matches, preferring the leftmost and then the
+        longest pattern (so "Lucas Capuano" wins over "Lucas").
+        """
+        candidates = sorted(self.iter_matches(text), key=lambda m: (m[0], -(m[1] - m[0])))
+        selected = []
+        last_end = -1
+        for start, end, pattern in candidates:
+            if start >= last_end:
+                selected.append((start, end, pattern))
+                last_end = end
+        return selected
+
+def group_lines(words: List[dict], tolerance: float = LINE_TOLERANCE) -> List[List[dict]]:
+    """
+    Words grouped into lines, top to bottom, each line left to right.
+    A word whose top is within `tolerance` of the previous word's (in top
+    order) is on the same line, so 100.4 and 100.6 never get split apart.
+    """
+    lines: List[List[dict]] = []
+    last_top = None
+    for word in sorted(words, key=lambda w: w['top']):
+        if last_top is None or word['top'] - last_top >= tolerance:
+            lines.append([])
+        lines[-1].append(word)
+        last_top = word['top']
+    return [sorted(line, key=lambda w: w['x0']) for line in lines]
+
+def build_page_text(words: List[dict]) -> Tuple[str, List[Tuple[int, int, dict]]]:
+    """
+    Joins extracted words into the page text: words on the same line
+    (group_lines) are separated by a space and lines by '\\n'. Returns the
+    text and the (start, end, word) span of every word in it.
+    """
+    parts = []
+    spans = []
+    offset = 0
+
+    for line in group_lines(words):
+        for position, word in enumerate(line):
+            if spans:
+                parts.append(' ' if position else '\n')
+                offset += 1
+            parts.append(word['text'])
+            spans.append((offset, offset + len(word['text']), word))
+            offset += len(word['text'])
+
+    return ''.join(parts), spans
+
+def find_word_matches(words: List[dict], matcher: AhoCorasick) -> List[dict]:
+    """
+    Runs `matcher` over the page text and returns one box per match, in
+    pdfplumber's top-left coordinates, like page.search():
+    {'text', 'pattern', 'x0', 'x1', 'top', 'bottom', 'words'}.
+    """
+    text, spans = build_page_text(words)
+    results = []
+    word_index = 0
+
+    for start, end, pattern in matcher.find_all(text):
+        # Words touched by [start, end); matches come sorted and disjoint
+        while word_index < len(spans) and spans[word_index][1] <= start:
+            word_index += 1
+        group = []
+        i = word_index
+        while i < len(spans) and spans[i][0] < end:
+            group.append(spans[i][2])
+            i += 1
+        if not group:
+            continue
+
+        results.append({
+            'text': text[start:end],
+            'pattern': pattern,
+            'x0': min(w['x0'] for w in group),
+            'x1': max(w['x1'] for w in group),
+            'top': min(w['top'] for w in group),
+            'bottom': max(w['bottom'] for w in group),
+            'words': group
+        })
+
+    return results
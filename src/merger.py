@@ -1,37 +1,54 @@
 import io
-import pikepdf
+from typing import BinaryIO, Callable, Optional, Union
+from src.content_overlay import OverlayOps
 from src.models import OrgTemplate
+from src.save_profiles import save_pdf
+from src.sinks import OutputTarget, describe_output
+from src.template_cache import base_templates
 
-def merge_pdfs(base_pdf_path: str, overlay_pdf_stream: io.BytesIO, output_path: str, template: OrgTemplate):
+def merge_pdfs(base_pdf_path: Union[str, BinaryIO], overlay_pdf_stream: Union[io.BytesIO, OverlayOps], output_path: OutputTarget,
+               template: OrgTemplate, log: Callable[[str], None] = print,
+               save_profile: Optional[str] = None) -> bool:
     """
-    Merges a base PDF file with an overlay PDF stream.
-    Saves the result to output_path.
+    Merges a base PDF (file path or in-memory stream) with an overlay PDF stream,
+    or writes an OverlayOps straight into the target page.
+    Base PDFs given by path are read through the in-memory template cache.
+    Saves the result to output_path, a file path or any writable binary stream,
+    with the given save profile (see src/save_profiles.py).
+    Returns True on success; errors are reported through `log`.
     """
+    import pikepdf
+
     # Open base PDF
-    try:    
-        base_pdf = pikepdf.Pdf.open(base_pdf_path)
+    try:
+        if isinstance(base_pdf_path, str):
+            base_pdf = pikepdf.Pdf.open(base_templates.open(base_pdf_path))
+        else:
+            base_pdf = pikepdf.Pdf.open(base_pdf_path)
     except FileNotFoundError:
-        print(f"Error: Base PDF not found at {base_pdf_path}")
-        return
+        log(f"Error: Base PDF not found at {base_pdf_path}")
+        return False
 
-    # Open overlay PDF from memory
-    overlay_pdf = pikepdf.Pdf.open(overlay_pdf_stream)
-    
     # We assume we are overlaying on the specific page defined in the template
     # and that the overlay PDF has only one page (the one we just generated)
-    
+
     target_page_index = template.page
-    
+
     if target_page_index >= len(base_pdf.pages):
-        print(f"Error: Template targets page {target_page_index}, but base PDF has only {len(base_pdf.pages)} pages.")
-        return
+        log(f"Error: Template targets page {target_page_index}, but base PDF has only {len(base_pdf.pages)} pages.")
+        return False
 
     base_page = base_pdf.pages[target_page_index]
-    overlay_page = overlay_pdf.pages[0]
-    
+
     # Apply overlay
-    base_page.add_overlay(overlay_page, pikepdf.Rectangle(base_page.mediabox))
-    
+    if isinstance(overlay_pdf_stream, OverlayOps):
+        overlay_pdf_stream.apply(base_pdf, base_page)
+    else:
+        # Open overlay PDF from memory
+        overlay_pdf = pikepdf.Pdf.open(overlay_pdf_stream)
+        base_page.add_overlay(overlay_pdf.pages[0], pikepdf.Rectangle(base_page.mediabox))
+
     # Save output
-    base_pdf.save(output_path)
-    print(f"Successfully generated: {output_path}")
+    save_pdf(base_pdf, output_path, save_profile)
+    log(f"Successfully generated: {describe_output(output_path)}")
+    return True
@@ -0,0 +1,143 @@
+"""
+Per-org, per-stage timings and counters.
+
+Every pipeline run and update script records, for each org it touched, the
+seconds spent in each stage (config_load, fetch, render, merge, save, ...)
+and counters such as bytes_written and nodes_rendered. At the end of a run
+they are appended as JSON lines to <ORGCHART_METRICS_DIR>/metrics.jsonl,
+written as a Prometheus textfile (<ORGCHART_METRICS_DIR>/orgchart_<source>.prom,
+for node_exporter's textfile collector) and summarized as p50/p95/p99.
+Set ORGCHART_METRICS_DIR to an empty string to only print the summary.
+"""
+import json
+import os
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterable, List, Optional
+
+METRICS_DIR = os.environ.get("ORGCHART_METRICS_DIR", ".metrics")
+QUANTILES = (0.5, 0.95, 0.99)
+
+class StageTimer:
+    """Accumulates stage seconds and counters for one org."""
+
+    def __init__(self):
+        self.timings: Dict[str, float] = {}
+        self.counters: Dict[str, int] = {}
+
+    @contextmanager
+    def stage(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - start)
+
+    def add(self, name: str, seconds: float):
+        self.timings[name] = self.timings.get(name, 0.0) + seconds
+
+    def count(self, name: str, value: int = 1):
+        self.counters[name] = self.counters.get(name, 0) + value
+
+def org_record(org_id: str, status: str, timings: Dict[str, float],
+               counters: Dict[str, int]) -> dict:
+    return {'org_id': org_id, 'status': status,
+            'stages': {name: round(seconds, 6) for name, seconds in timings.items()},
+            'counters': dict(counters)}
+
+def percentile(values: List[float], q: float) -> float:
+    """Linear interpolation between closest ranks (numpy's default)."""
+    values = sorted(values)
+    if not values:
+        return 0.0
+    position = (len(values) - 1) * q
+    low = int(position)
+    high = min(low + 1, len(values) - 1)
+    return values[low] + (values[high] - values[low]) * (position - low)
+
+def stage_values(records: Iterable[dict]) -> Dict[str, List[float]]:
+    """{stage: [seconds of every org that went through it]}, in first-seen order."""
+    values: Dict[str, List[float]] = {}
+    for record in records:
+        for name, seconds in record['stages'].items():
+            values.setdefault(name, []).append(seconds)
+    return values
+
+def counter_totals(records: Iterable[dict]) -> Dict[str, int]:
+    totals: Dict[str, int] = {}
+    for record in records:
+        for name, value in record['counters'].items():
+            totals[name] = totals.get(name, 0) + value
+    return totals
+
+def write_jsonl(path: str, source: str, records: List[dict], run_id: str, timestamp: float):
+    with open(path, 'a', encoding='utf-8') as f:
+        for record in records:
+            f.write(json.dumps({'ts': timestamp, 'run_id': run_id, 'source': source, **record},
+                               ensure_ascii=False) + "\n")
+
+def prometheus_text(source: str, records: List[dict], timestamp: float) -> str:
+    lines = [
+        "# HELP orgchart_stage_seconds Per-org seconds spent in each stage during the last run.",
+        "# TYPE orgchart_stage_seconds summary",
+    ]
+    for name, values in stage_values(records).items():
+        labels = f'source="{source}",stage="{name}"'
+        for q in QUANTILES:
+            lines.append(f'orgchart_stage_seconds{{{labels},quantile="{q}"}} {percentile(values, q):.6f}')
+        lines.append(f"orgchart_stage_seconds_sum{{{labels}}} {sum(values):.6f}")
+        lines.append(f"orgchart_stage_seconds_count{{{labels}}} {len(values)}")
+
+    for name, total in counter_totals(records).items():
+        lines.append(f"# HELP orgchart_{name} Total {name.replace('_', ' ')} during the last run.")
+        lines.append(f"# TYPE orgchart_{name} gauge")
+        lines.append(f'orgchart_{name}{{source="{source}"}} {total}')
+
+    lines.append("# HELP orgchart_orgs Orgs processed during the last run, by status.")
+    lines.append("# TYPE orgchart_orgs gauge")
+    statuses: Dict[str, int] = {}
+    for record in records:
+        statuses[record['status']] = statuses.get(record['status'], 0) + 1
+    for status, count in sorted(statuses.items()):
+        lines.append(f'orgchart_orgs{{source="{source}",status="{status}"}} {count}')
+
+    lines.append("# HELP orgchart_last_run_timestamp_seconds When the last run finished.")
+    lines.append("# TYPE orgchart_last_run_timestamp_seconds gauge")
+    lines.append(f'orgchart_last_run_timestamp_seconds{{source="{source}"}} {timestamp:.3f}')
+    return "\n".join(lines) + "\n"
+
+def write_prometheus(path: str, source: str, records: List[dict], timestamp: float):
+    # Written aside and renamed, so the collector never reads a partial file
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(prometheus_text(source, records, timestamp))
+    os.replace(tmp_path, path)
+
+def print_summary(records: List[dict]):
+    print(f"\nStage timings ({len(records)} orgs, ms):")
+    print(f"  {'stage':12} {'p50':>9} {'p95':>9} {'p99':>9} {'total':>10}")
+    for name, values in stage_values(records).items():
+        p50, p95, p99 = (percentile(values, q) * 1000 for q in QUANTILES)
+        print(f"  {name:12} {p50:9.2f} {p95:9.2f} {p99:9.2f} {sum(values) * 1000:10.2f}")
+    totals = counter_totals(records)
+    if totals:
+        print("  " + " | ".join(f"{name}: {value}" for name, value in totals.items()))
+
+def report(source: str, records: List[dict], metrics_dir: Optional[str] = None) -> List[str]:
+    """
+    Exports the records of one run (see org_record) and prints their
+    summary. Returns the files written.
+    """
+    metrics_dir = METRICS_DIR if metrics_dir is None else metrics_dir
+    print_summary(records)
+    if not metrics_dir or not records:
+        return []
+
+    os.makedirs(metrics_dir, exist_ok=True)
+    timestamp = time.time()
+    jsonl_path = os.path.join(metrics_dir, "metrics.jsonl")
+    prom_path = os.path.join(metrics_dir, f"orgchart_{source}.prom")
+    write_jsonl(jsonl_path, source, records, os.urandom(6).hex(), timestamp)
+    write_prometheus(prom_path, source, records, timestamp)
+    print(f"  Metrics: {jsonl_path}, {prom_path}")
+    return [jsonl_path, prom_path]
@@ -1,4 +1,4 @@
-from typing import List, Optional
+from typing import Dict, List, Optional
 from pydantic import BaseModel, Field
 
 class OrgNode(BaseModel):
@@ -34,3 +34,18 @@ class PositionData(BaseModel):
     title: str = Field(..., description="Job title, e.g. 'Gerente General'")
     person_name: str = Field(..., description="Name of the person holding the position")
     active_flag: bool = True
+
+class OrgResult(BaseModel):
+    """
+    Outcome of processing a single org chart in a pipeline run.
+    Collected by the orchestrator so workers never print directly.
+    """
+    org_id: str
+    config_path: str
+    status: str = Field(..., description="'ok', 'skipped' or 'error'")
+    output_path: Optional[str] = None
+    message: Optional[str] = None
+    logs: List[str] = Field(default_factory=list, description="Progress messages emitted while processing")
+    output_bytes: Optional[bytes] = Field(None, description="Merged PDF, when a worker hands it to the parent's sink")
+    timings: Dict[str, float] = Field(default_factory=dict, description="Seconds spent in each stage (see src/metrics.py)")
+    counters: Dict[str, int] = Field(default_factory=dict, description="bytes_written, nodes_rendered")
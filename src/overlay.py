@@ -0,0 +1,136 @@
+"""
+Cover-and-replace overlays shared by the update scripts.
+
+build_replacement_overlay writes the operators straight into the base PDF
+(src/content_overlay) and falls back to a ReportLab page when needed.
+
+reportlab and pikepdf are imported inside the functions that use them, so
+importing this module (and the scripts built on it) stays cheap on paths
+that never draw or merge anything.
+"""
+import io
+import os
+from typing import Dict, Iterable, Optional, Tuple, Union, BinaryIO
+from src.content_overlay import OverlayOps, centered_lines, use_direct
+from src.metrics import StageTimer
+from src.save_profiles import save_pdf
+from src.sinks import OutputTarget
+from src.template_cache import base_templates
+
+FONT = "Helvetica-Bold"
+FONT_SIZE = 6
+LINE_HEIGHT = 1.2
+
+def draw_replacement(c, box: dict, replacement_text: str, padding: float = 0.5,
+                     font: str = FONT, font_size: float = FONT_SIZE):
+    """
+    Covers `box` ({'x', 'y', 'w', 'h'}, PDF points) with a white rectangle and
+    draws `replacement_text` centered in it on an open ReportLab canvas.
+    """
+    # 1. Cover the original text (minimal padding to spare neighbours)
+    c.setFillColorRGB(1, 1, 1)
+    c.rect(
+        box['x'] - padding,
+        box['y'] - padding,
+        box['w'] + (padding * 2),
+        box['h'] + (padding * 2),
+        fill=1,
+        stroke=0
+    )
+
+    # 2. Write the new text, centered both ways
+    c.setFillColorRGB(0, 0, 0)
+    c.setFont(font, font_size)
+
+    lines = replacement_text.split('\n')
+    total_text_height = len(lines) * font_size * LINE_HEIGHT
+    current_y = box['y'] + box['h'] - ((box['h'] - total_text_height) / 2) - font_size
+
+    for line in lines:
+        text_width = c.stringWidth(line, font, font_size)
+        x_pos = box['x'] + (box['w'] - text_width) / 2
+        c.drawString(x_pos, current_y, line)
+        current_y -= (font_size * LINE_HEIGHT)
+
+def generate_replacement_overlay(replacements: Iterable[Tuple[dict, str, float]],
+                                 page_width: float, page_height: float) -> io.BytesIO:
+    """
+    One-page overlay PDF (in memory) with every (box, text, padding)
+    replacement of a page.
+    """
+    from reportlab.pdfgen import canvas
+
+    packet = io.BytesIO()
+    c = canvas.Canvas(packet, pagesize=(page_width, page_height))
+
+    for box, replacement_text, padding in replacements:
+        draw_replacement(c, box, replacement_text, padding)
+
+    c.save()
+    packet.seek(0)
+    return packet
+
+def draw_replacement_ops(ops: OverlayOps, box: dict, replacement_text: str, padding: float = 0.5,
+                         font: str = FONT, font_size: float = FONT_SIZE):
+    """draw_replacement for the direct path: same cover box and text layout."""
+    ops.cover(box['x'] - padding, box['y'] - padding,
+              box['w'] + (padding * 2), box['h'] + (padding * 2))
+    for x_pos, y_pos, line in centered_lines(box, replacement_text.split('\n'), font, font_size, LINE_HEIGHT):
+        ops.text(x_pos, y_pos, line, font, font_size)
+
+def build_replacement_overlay(replacements: Iterable[Tuple[dict, str, float]],
+                              page_width: float, page_height: float) -> Union[OverlayOps, io.BytesIO]:
+    """
+    Overlay with every (box, text, padding) replacement of a page: content
+    stream operators on the direct path, else a ReportLab PDF. Either one
+    can be passed to apply_overlays.
+    """
+    if not use_direct([FONT]):
+        return generate_replacement_overlay(replacements, page_width, page_height)
+
+    ops = OverlayOps(page_width, page_height)
+    for box, replacement_text, padding in replacements:
+        draw_replacement_ops(ops, box, replacement_text, padding)
+    return ops
+
+def apply_overlays(pdf_source: Union[str, BinaryIO], overlays: Dict[int, Union[OverlayOps, io.BytesIO]],
+                   output_path: OutputTarget, timer: Optional[StageTimer] = None,
+                   save_profile: Optional[str] = None) -> OutputTarget:
+    """
+    Stamps each overlay on its page ({page_index: overlay}) of the base PDF
+    and saves the result once, to a path or a writable stream. Overlays are
+    OverlayOps or ReportLab PDF streams. A base PDF given by path is read
+    through the in-memory template cache. `save_profile` picks the pikepdf
+    save settings (see src/save_profiles.py). Returns output_path.
+    Merge and save times and the bytes written go into `timer`, if given.
+    """
+    import pikepdf
+
+    timer = timer or StageTimer()
+    with timer.stage("merge"):
+        if isinstance(pdf_source, str):
+            pdf_source = base_templates.open(pdf_source)
+        base_pdf = pikepdf.Pdf.open(pdf_source)
+        for page_index, overlay in overlays.items():
+            base_page = base_pdf.pages[page_index]
+            if isinstance(overlay, OverlayOps):
+                overlay.apply(base_pdf, base_page)
+                continue
+            overlay_pdf = pikepdf.Pdf.open(overlay)
+            base_page.add_overlay(overlay_pdf.pages[0], pikepdf.Rectangle(base_page.mediabox))
+        merged = io.BytesIO()
+        save_pdf(base_pdf, merged, save_profile)
+
+    data = merged.getvalue()
+    with timer.stage("save"):
+        if isinstance(output_path, str):
+            output_dir = os.path.dirname(output_path)
+            if output_dir:
+                os.makedirs(output_dir, exist_ok=True)
+            with open(output_path, 'wb') as f:
+                f.write(data)
+        else:
+            output_path.write(data)
+            output_path.flush()
+    timer.count("bytes_written", len(data))
+    return output_path
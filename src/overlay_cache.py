@@ -0,0 +1,108 @@
+import hashlib
+import io
+import json
+import os
+from typing import List, Optional, Tuple, Union
+from src.content_overlay import OverlayOps, use_direct
+from src.models import OrgTemplate, PositionData
+from src.renderer import build_overlay_ops, generate_overlay_pdf
+
+# Bump when generate_overlay_pdf changes what it draws, so old entries are ignored
+OVERLAY_FORMAT = 2
+CACHE_DIR = os.environ.get("ORGCHART_OVERLAY_CACHE_DIR", os.path.join(".cache", "overlays"))
+MAX_CACHE_BYTES = int(os.environ.get("ORGCHART_OVERLAY_CACHE_MB", "256")) * 1024 * 1024
+
+def relevant_positions(template: OrgTemplate, data_list: List[PositionData]) -> List[dict]:
+    """
+    The positions generate_overlay_pdf actually draws, in node order: one per
+    template node (the last one wins on duplicates, like the renderer's map).
+    Positions for nodes the template does not have do not change the overlay.
+    """
+    data_map = {d.node_id: d for d in data_list}
+    return [
+        {'node_id': node.node_id, 'title': data_map[node.node_id].title,
+         'person_name': data_map[node.node_id].person_name}
+        for node in template.nodes if node.node_id in data_map
+    ]
+
+def overlay_key(template: OrgTemplate, data_list: List[PositionData]) -> str:
+    """Stable SHA-256 of everything that affects the overlay's content."""
+    import reportlab
+    payload = json.dumps({
+        "format": OVERLAY_FORMAT,
+        "reportlab": reportlab.Version,
+        "template": template.model_dump(),
+        "positions": relevant_positions(template, data_list),
+    }, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+def cache_path(key: str, cache_dir: Optional[str] = None) -> str:
+    return os.path.join(cache_dir or CACHE_DIR, f"{key}.pdf")
+
+def evict(cache_dir: Optional[str] = None, max_bytes: Optional[int] = None) -> int:
+    """
+    Deletes least recently used overlays (oldest mtime; hits refresh it) until
+    the cache fits in max_bytes. Returns the number of files removed.
+    """
+    cache_dir = cache_dir or CACHE_DIR
+    max_bytes = MAX_CACHE_BYTES if max_bytes is None else max_bytes
+
+    entries = []
+    for entry in os.scandir(cache_dir):
+        if entry.is_file() and entry.name.endswith(".pdf"):
+            stat = entry.stat()
+            entries.append((stat.st_mtime, stat.st_size, entry.path))
+
+    total = sum(size for _, size, _ in entries)
+    removed = 0
+    for _, size, path in sorted(entries):
+        if total <= max_bytes:
+            break
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass  # Evicted by a concurrent run
+        total -= size
+        removed += 1
+    return removed
+
+def get_overlay_pdf(template: OrgTemplate, data_list: List[PositionData],
+                    cache_dir: Optional[str] = None,
+                    max_bytes: Optional[int] = None) -> Tuple[io.BytesIO, bool]:
+    """
+    Memoized generate_overlay_pdf: returns (overlay_stream, cache_hit).
+
+    Overlays are stored on disk under a hash of the template and the positions
+    it draws, so orgs whose inputs did not change since the last run skip
+    ReportLab entirely.
+    """
+    path = cache_path(overlay_key(template, data_list), cache_dir)
+
+    try:
+        with open(path, 'rb') as f:
+            data = f.read()
+        os.utime(path)  # Mark as recently used
+        return io.BytesIO(data), True
+    except OSError:
+        pass
+
+    overlay_stream = generate_overlay_pdf(template, data_list)
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(overlay_stream.getvalue())
+    os.replace(tmp_path, path)
+    evict(cache_dir, max_bytes)
+
+    return overlay_stream, False
+
+def get_overlay(template: OrgTemplate, data_list: List[PositionData]) -> Tuple[Union[OverlayOps, io.BytesIO], bool]:
+    """
+    Overlay for merge_pdfs: (overlay, cache_hit). Content stream operators
+    when the direct path can draw the template's fonts (cheap enough that
+    they are not cached), else the cached ReportLab PDF.
+    """
+    if use_direct(node.font for node in template.nodes):
+        return build_overlay_ops(template, data_list), False
+    return get_overlay_pdf(template, data_list)
@@ -1,72 +1,274 @@
+import io
 import os
 import json
 import glob
-from src.models import OrgTemplate, PositionData
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import BinaryIO, Dict, List, Optional, Tuple
+from src.models import OrgTemplate, PositionData, OrgResult
 from src.datalake import DataLakeService
-from src.renderer import generate_overlay_pdf
+from src.metrics import StageTimer, org_record, report
+from src.overlay_cache import get_overlay, relevant_positions
 from src.merger import merge_pdfs
+from src.sinks import MemorySink, OutputSink
 
 def load_template_config(config_path: str) -> OrgTemplate:
     with open(config_path, 'r', encoding='utf-8') as f:
         data = json.load(f)
     return OrgTemplate(**data)
 
-def run_pipeline():
+def output_filename(org_id: str) -> str:
+    return f"{org_id}_actualizado.pdf"
+
+def process_org(config_file: str, templates_dir: str, output_dir: str,
+                template: Optional[OrgTemplate] = None,
+                base_pdf_source: Optional[BinaryIO] = None,
+                sink: Optional[OutputSink] = None,
+                positions: Optional[List[PositionData]] = None,
+                save_profile: Optional[str] = None) -> OrgResult:
+    """
+    Runs load -> fetch -> render -> merge for a single template config.
+    Never prints: progress goes into the result's `logs` so it can run
+    inside a worker process and be reported by the parent.
+    A caller that keeps templates and base PDFs in memory can pass them
+    as `template` and `base_pdf_source`; `positions` skips the datalake
+    round trip when they were already fetched in bulk.
+    The merged PDF goes to output_dir, or to `sink` when one is given,
+    saved with `save_profile` (see src/save_profiles.py).
+    """
+    logs: List[str] = []
+    timer = StageTimer()
+    org_id = template.org_id if template else os.path.splitext(os.path.basename(config_file))[0]
+
+    def result(status: str, message: Optional[str] = None, output_path: Optional[str] = None) -> OrgResult:
+        return OrgResult(org_id=org_id, config_path=config_file, status=status,
+                         output_path=output_path, message=message, logs=logs,
+                         timings=timer.timings, counters=timer.counters)
+
+    logs.append(f"Processing config: {config_file}")
+
+    # Load Template Config
+    if template is None:
+        try:
+            with timer.stage("config_load"):
+                template = load_template_config(config_file)
+        except Exception as e:
+            return result("error", f"Failed to load config {config_file}: {e}")
+        org_id = template.org_id
+
+    # Determine Base PDF Path (Assumes same filename as json but .pdf)
+    base_pdf_filename = f"{template.org_id}.pdf"
+    base_pdf_path = os.path.join(templates_dir, base_pdf_filename)
+
+    if base_pdf_source is None and not os.path.exists(base_pdf_path):
+        return result("skipped", f"Base PDF not found: {base_pdf_path}")
+
+    try:
+        # Fetch Data
+        if positions is None:
+            logs.append(f"Fetching data for Org ID: {template.org_id}")
+            with timer.stage("fetch"), DataLakeService() as datalake:
+                positions = datalake.get_positions_for_org(template.org_id)
+
+        if not positions:
+            return result("skipped", f"No positions found for {template.org_id}")
+
+        # Generate Overlay (ReportLab ones are reused from the cache when inputs are unchanged)
+        with timer.stage("render"):
+            overlay_stream, cached = get_overlay(template, positions)
+        timer.count("nodes_rendered", len(relevant_positions(template, positions)))
+        logs.append("Reusing cached text overlay" if cached else "Generated text overlay")
+
+        # Merge in memory, then hand the destination only complete files
+        filename = output_filename(template.org_id)
+        output_path = os.path.join(output_dir, filename) if sink is None else sink.location(filename)
+
+        logs.append(f"Merging into {output_path}...")
+        errors: List[str] = []
+        merged = io.BytesIO()
+        base_pdf = base_pdf_source if base_pdf_source is not None else base_pdf_path
+        with timer.stage("merge"):
+            if not merge_pdfs(base_pdf, overlay_stream, merged, template, log=errors.append,
+                              save_profile=save_profile):
+                return result("error", "; ".join(errors))
+
+        data = merged.getvalue()
+        with timer.stage("save"):
+            if sink is None:
+                with open(output_path, 'wb') as f:
+                    f.write(data)
+            else:
+                sink.write_bytes(filename, data)
+        timer.count("bytes_written", len(data))
+    except Exception as e:
+        return result("error", f"{type(e).__name__}: {e}")
+
+    return result("ok", output_path=output_path)
+
+def process_org_to_bytes(config_file: str, templates_dir: str, output_dir: str,
+                         template: Optional[OrgTemplate] = None,
+                         positions: Optional[List[PositionData]] = None,
+                         save_profile: Optional[str] = None) -> OrgResult:
+    """
+    Worker-side variant of process_org for sink runs: the merged PDF travels
+    back in `output_bytes` so only the parent process writes to the sink.
+    """
+    memory = MemorySink()
+    res = process_org(config_file, templates_dir, output_dir, template, sink=memory, positions=positions,
+                      save_profile=save_profile)
+    if res.status == "ok":
+        res.output_bytes = memory.files[output_filename(res.org_id)]
+    return res
+
+def schedule_templates(config_files: List[str], templates_dir: str,
+                       load_times: Optional[Dict[str, float]] = None) -> Tuple[List[Tuple[str, OrgTemplate]], List[OrgResult]]:
+    """
+    Loads every config and orders them largest base PDF first, so the
+    longest jobs start early and do not end up as the tail of the run.
+    Configs that fail to load are returned as error results.
+    The seconds each load took go into `load_times` by config file, if given.
+    """
+    jobs = []
+    failed = []
+    for config_file in config_files:
+        try:
+            start = time.perf_counter()
+            try:
+                template = load_template_config(config_file)
+            finally:
+                if load_times is not None:
+                    load_times[config_file] = time.perf_counter() - start
+        except Exception as e:
+            org_id = os.path.splitext(os.path.basename(config_file))[0]
+            failed.append(OrgResult(org_id=org_id, config_path=config_file, status="error",
+                                    message=f"Failed to load config {config_file}: {e}"))
+            continue
+        base_pdf_path = os.path.join(templates_dir, f"{template.org_id}.pdf")
+        size = os.path.getsize(base_pdf_path) if os.path.exists(base_pdf_path) else 0
+        jobs.append((size, config_file, template))
+
+    jobs.sort(key=lambda job: job[0], reverse=True)
+    return [(config_file, template) for _, config_file, template in jobs], failed
+
+def fetch_positions(jobs: List[Tuple[str, OrgTemplate]],
+                    durations: Optional[Dict[str, float]] = None) -> Tuple[Dict[str, List[PositionData]], List[Tuple[str, OrgTemplate]], List[OrgResult]]:
+    """
+    Bulk datalake fetch for every scheduled org.
+    Returns (positions by org, jobs that got their data, error results).
+    Each org's fetch time goes into `durations`, if given.
+    """
+    errors: Dict[str, Exception] = {}
+    with DataLakeService() as datalake:
+        positions_by_org = datalake.get_positions_for_orgs([t.org_id for _, t in jobs], errors=errors,
+                                                           durations=durations)
+
+    ready = [(config_file, template) for config_file, template in jobs if template.org_id in positions_by_org]
+    failed = [OrgResult(org_id=template.org_id, config_path=config_file, status="error",
+                        message=f"Datalake fetch failed: {type(errors[template.org_id]).__name__}: {errors[template.org_id]}")
+              for config_file, template in jobs if template.org_id in errors]
+    return positions_by_org, ready, failed
+
+def print_summary(results: List[OrgResult]):
+    print("\nPipeline summary:")
+    for res in sorted(results, key=lambda r: r.org_id):
+        detail = res.output_path if res.status == "ok" else res.message
+        print(f"  [{res.status.upper():7}] {res.org_id}: {detail}")
+
+    counts = {status: sum(1 for r in results if r.status == status) for status in ("ok", "skipped", "error")}
+    print(f"Total: {len(results)} | ok: {counts['ok']} | skipped: {counts['skipped']} | errors: {counts['error']}")
+
+def report_metrics(results: List[OrgResult], load_times: Dict[str, float], fetch_times: Dict[str, float]):
+    """
+    Adds the stages timed by the parent (config load, bulk fetch) to each
+    result and exports the run's per-org metrics (see src/metrics.py).
+    """
+    records = []
+    for res in results:
+        timings = {}
+        if res.config_path in load_times:
+            timings['config_load'] = load_times[res.config_path]
+        if res.org_id in fetch_times:
+            timings['fetch'] = fetch_times[res.org_id]
+        res.timings = {**timings, **res.timings}
+        records.append(org_record(res.org_id, res.status, res.timings, res.counters))
+    report("pipeline", records)
+
+def run_pipeline(workers: int = 1, sink: Optional[OutputSink] = None,
+                 staged: bool = False, queue_size: int = 4,
+                 save_profile: Optional[str] = None) -> List[OrgResult]:
+    """
+    Processes every template in input/templates/.
+    With workers > 1 the orgs are spread over a process pool, largest
+    base PDF first; results are gathered and summarized by the parent.
+    Outputs go to output/ unless a `sink` (ZIP, memory, ...) is given.
+    With staged=True fetch, render, merge and save run as overlapping
+    stages over bounded queues of `queue_size` (see src/staged.py).
+    Merged PDFs are saved with `save_profile` (see src/save_profiles.py).
+    """
     print("Starting Org Chart Update Pipeline...")
-    
+
     # 1. Setup paths
     base_dir = os.getcwd()
     templates_dir = os.path.join(base_dir, "input", "templates")
     output_dir = os.path.join(base_dir, "output")
-    
-    # 2. Initialize Services
-    datalake = DataLakeService()
-    
-    # 3. Find all JSON configs in templates dir
+
+    # 2. Find all JSON configs in templates dir
     config_files = glob.glob(os.path.join(templates_dir, "*.json"))
-    
+
     if not config_files:
         print("No template configurations found in input/templates/")
-        return
+        return []
 
-    for config_file in config_files:
-        print(f"Processing config: {config_file}")
-        
-        # Load Template Config
-        try:
-            template = load_template_config(config_file)
-        except Exception as e:
-            print(f"Failed to load config {config_file}: {e}")
-            continue
-            
-        # Determine Base PDF Path (Assumes same filename as json but .pdf)
-        base_pdf_filename = f"{template.org_id}.pdf"
-        base_pdf_path = os.path.join(templates_dir, base_pdf_filename)
-        
-        if not os.path.exists(base_pdf_path):
-            print(f"Base PDF not found: {base_pdf_path}. Skipping.")
-            continue
-            
-        # Fetch Data
-        print(f"Fetching data for Org ID: {template.org_id}")
-        positions = datalake.get_positions_for_org(template.org_id)
-        
-        if not positions:
-            print(f"No positions found for {template.org_id}. Skipping.")
-            continue
-            
-        # Generate Overlay
-        print("Generating text overlay...")
-        overlay_stream = generate_overlay_pdf(template, positions)
-        
-        # Merge
-        output_filename = f"{template.org_id}_actualizado.pdf"
-        output_path = os.path.join(output_dir, output_filename)
-        
-        print(f"Merging into {output_path}...")
-        merge_pdfs(base_pdf_path, overlay_stream, output_path, template)
-        
+    # 3. Load configs and schedule largest first
+    load_times: Dict[str, float] = {}
+    fetch_times: Dict[str, float] = {}
+    jobs, results = schedule_templates(config_files, templates_dir, load_times)
+
+    if staged:
+        from src.staged import run_staged
+        results.extend(run_staged(jobs, templates_dir, output_dir, sink, workers, queue_size, save_profile))
+    else:
+        # 4. Fetch every org's positions in one bulk, bounded-concurrency request
+        positions_by_org, jobs, fetch_failed = fetch_positions(jobs, fetch_times)
+        results.extend(fetch_failed)
+
+        if workers <= 1:
+            for config_file, template in jobs:
+                res = process_org(config_file, templates_dir, output_dir, template, sink=sink,
+                                  positions=positions_by_org[template.org_id], save_profile=save_profile)
+                for line in res.logs:
+                    print(line)
+                results.append(res)
+        else:
+            print(f"Running with {workers} worker processes ({len(jobs)} orgs)...")
+            worker = process_org if sink is None else process_org_to_bytes
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                futures = {
+                    executor.submit(worker, config_file, templates_dir, output_dir, template,
+                                    positions=positions_by_org[template.org_id],
+                                    save_profile=save_profile): (config_file, template)
+                    for config_file, template in jobs
+                }
+                for future in as_completed(futures):
+                    config_file, template = futures[future]
+                    try:
+                        res = future.result()
+                        if res.output_bytes is not None:
+                            filename = output_filename(res.org_id)
+                            start = time.perf_counter()
+                            sink.write_bytes(filename, res.output_bytes)
+                            res.timings['save'] = res.timings.get('save', 0.0) + time.perf_counter() - start
+                            res.output_path = sink.location(filename)
+                            res.output_bytes = None
+                        results.append(res)
+                    except Exception as e:
+                        results.append(OrgResult(org_id=template.org_id, config_path=config_file, status="error",
+                                                 message=f"Worker crashed: {e}"))
+
+    print_summary(results)
+    report_metrics(results, load_times, fetch_times)
     print("Pipeline completed.")
+    return results
 
 if __name__ == "__main__":
     run_pipeline()
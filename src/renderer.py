@@ -1,19 +1,15 @@
 import io
-import textwrap
-from reportlab.pdfgen import canvas
-from reportlab.lib.pagesizes import A4
-from reportlab.lib.utils import ImageReader
-from src.models import OrgTemplate, PositionData
+from typing import Iterator, List, Tuple
+from src.models import OrgNode, OrgTemplate, PositionData
+from src.content_overlay import OverlayOps
+from src.text_fit import fit_text, measure_lines
 
-def generate_overlay_pdf(template: OrgTemplate, data_list: list[PositionData]) -> io.BytesIO:
+def layout_overlay(template: OrgTemplate, data_list: list[PositionData]) -> Iterator[Tuple[OrgNode, float, List[Tuple[float, float, str]]]]:
     """
-    Generates a PDF file in memory (BytesIO) containing only the text overlays.
-    This PDF will later be merged with the base template.
+    Positions every line of the overlay: yields (node, font size,
+    [(x, y, line), ...]) for each template node that has data.
+    Shared by the ReportLab and the direct content-stream renderers.
     """
-    packet = io.BytesIO()
-    # Create a new PDF with Reportlab
-    c = canvas.Canvas(packet, pagesize=A4)
-    
     # Map data by node_id for easy lookup
     data_map = {d.node_id: d for d in data_list}
     
@@ -28,34 +24,19 @@ def generate_overlay_pdf(template: OrgTemplate, data_list: list[PositionData]) -
         # We might want to customize this logic
         text_content = f"{data.title}\n{data.person_name}"
         
-        # Setup font
-        c.setFont(node.font, node.font_size)
-        
-        # Calculate text position
-        # ReportLab textobject for multi-line support
-        text_object = c.beginText()
-        
-        # Basic text wrapping logic
-        # Estimate chars per line based on width (very rough approximation)
-        # Avg char width approx 0.6 * font_size
-        avg_char_width = 0.6 * node.font_size
-        chars_per_line = int(node.w / avg_char_width)
-        
-        lines = textwrap.wrap(text_content, width=chars_per_line)
-        
-        # Limit lines
-        lines = lines[:node.max_lines]
+        # Wrap by real glyph widths; shrink the font if it needs more than max_lines
+        font_size, lines = fit_text(text_content, node.font, node.font_size, node.w, node.max_lines)
         
         # Vertical alignment: start from top of the box
         # y is the bottom-left corner of the box. 
         # So top is y + h.
         # We need to drop down by font_size for the first line.
         
-        current_y = node.y + node.h - node.font_size
+        current_y = node.y + node.h - font_size
+        placed = []
         
-        for line in lines:
+        for line, text_width in zip(lines, measure_lines(lines, node.font, font_size)):
             # Horizontal alignment
-            text_width = c.stringWidth(line, node.font, node.font_size)
             x_pos = node.x
             
             if node.align == 'center':
@@ -63,9 +44,42 @@ def generate_overlay_pdf(template: OrgTemplate, data_list: list[PositionData]) -
             elif node.align == 'right':
                 x_pos = node.x + node.w - text_width
             
-            c.drawString(x_pos, current_y, line)
-            current_y -= (node.font_size * 1.2) # Line height
+            placed.append((x_pos, current_y, line))
+            current_y -= (font_size * 1.2) # Line height
+            
+        yield node, font_size, placed
+
+def generate_overlay_pdf(template: OrgTemplate, data_list: list[PositionData]) -> io.BytesIO:
+    """
+    Generates a PDF file in memory (BytesIO) containing only the text overlays.
+    This PDF will later be merged with the base template.
+    """
+    # Imported here so that importing the pipeline stays cheap
+    from reportlab.pdfgen import canvas
+    from reportlab.lib.pagesizes import A4
+
+    packet = io.BytesIO()
+    # Create a new PDF with Reportlab
+    c = canvas.Canvas(packet, pagesize=A4)
+    
+    for node, font_size, placed in layout_overlay(template, data_list):
+        c.setFont(node.font, font_size)
+        for x_pos, y_pos, line in placed:
+            c.drawString(x_pos, y_pos, line)
             
     c.save()
     packet.seek(0)
     return packet
+
+def build_overlay_ops(template: OrgTemplate, data_list: list[PositionData]) -> OverlayOps:
+    """
+    Same overlay as generate_overlay_pdf, as content stream operators that
+    merge_pdfs writes straight into the base page (no PDF round trip).
+    """
+    from reportlab.lib.pagesizes import A4
+
+    ops = OverlayOps(*A4)
+    for node, font_size, placed in layout_overlay(template, data_list):
+        for x_pos, y_pos, line in placed:
+            ops.text(x_pos, y_pos, line, node.font, font_size)
+    return ops
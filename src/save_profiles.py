@@ -0,0 +1,41 @@
+"""
+Named pikepdf save profiles for the merged PDFs.
+
+    default  pikepdf's defaults (what every writer used before)
+    fast     passthrough: streams are copied as they are, never decoded or
+             recompressed, and the XMP metadata is not touched
+    compact  object streams, every stream (re)compressed with Flate and a
+             linearized file, for web delivery
+
+ORGCHART_SAVE_PROFILE sets the profile used when a caller does not pick
+one; `python benchmarks/save_profiles.py` shows the latency vs size trade-off.
+"""
+import os
+from typing import Optional
+
+SAVE_PROFILE = os.environ.get("ORGCHART_SAVE_PROFILE", "default")
+PROFILES = ("default", "fast", "compact")
+
+def save_options(profile: Optional[str] = None) -> dict:
+    """Keyword arguments for pikepdf.Pdf.save under `profile`."""
+    import pikepdf
+
+    profile = profile or SAVE_PROFILE
+    if profile == "default":
+        return {}
+    if profile == "fast":
+        return dict(compress_streams=False,
+                    stream_decode_level=pikepdf.StreamDecodeLevel.none,
+                    object_stream_mode=pikepdf.ObjectStreamMode.preserve,
+                    fix_metadata_version=False)
+    if profile == "compact":
+        return dict(compress_streams=True,
+                    stream_decode_level=pikepdf.StreamDecodeLevel.generalized,
+                    recompress_flate=True,
+                    object_stream_mode=pikepdf.ObjectStreamMode.generate,
+                    linearize=True)
+    raise ValueError(f"Unknown save profile '{profile}' (expected one of: {', '.join(PROFILES)})")
+
+def save_pdf(pdf, target, profile: Optional[str] = None):
+    """Saves a pikepdf.Pdf to a path or a seekable stream with `profile`."""
+    pdf.save(target, **save_options(profile))
@@ -0,0 +1,227 @@
+"""
+Boxes and connector lines of an org chart page, and how text sits in them.
+
+page_shapes() turns the painted paths of a page (from pdfplumber's rects,
+lines and curves, or from the pikepdf content-stream reader) into:
+
+- boxes: closed axis-aligned rectangles, the frames of the chart's cells;
+- segments: every straight piece of the other paths (connectors, rules),
+  plus rectangles thinner than LINE_MAX_THICKNESS, which are drawn lines.
+
+Both come out deduplicated (a cell is usually painted twice, fill and
+stroke) and sorted, so the two extraction backends give the same lists.
+
+enclosing_box() joins a text element to the smallest box around it and
+fit_cover() shrinks a cover rectangle so it stays inside that box and off
+the connector lines, without ever uncovering the original words. Both take
+an index (a GridIndex of the boxes, a SegmentIndex of the lines) so charts
+with thousands of shapes are not scanned once per element.
+"""
+import math
+from typing import Iterable, List, Optional, Sequence, Tuple
+
+from src.spatial import GridIndex
+
+# Rectangles thinner than this (pt) are lines drawn as filled rects
+LINE_MAX_THICKNESS = 2.0
+# Corners closer than this (pt) count as aligned
+AXIS_TOLERANCE = 0.01
+# Margin group_elements() leaves around the words
+TEXT_MARGIN = 2
+# Room kept free inside a box border and on each side of a line (pt)
+CLEARANCE = 1.0
+# SegmentIndex cell size (pt): about a text line's width
+SEGMENT_CELL = 36.0
+
+Point = Tuple[float, float]
+
+def _subpaths(path: Sequence[tuple]) -> Iterable[List[Tuple[str, Point]]]:
+    """(op, end point) lists, one per 'm'; 'h' gets the subpath's start point."""
+    current: List[Tuple[str, Point]] = []
+    for segment in path:
+        op = segment[0]
+        if op == 'm':
+            if current:
+                yield current
+            current = [('m', tuple(segment[-1]))]
+        elif not current:
+            continue  # Painting must start with m (or re, already expanded)
+        elif op == 'h':
+            current.append(('h', current[0][1]))
+        else:
+            current.append((op, tuple(segment[-1])))
+    if current:
+        yield current
+
+def _as_box(ops: str, pts: List[Point]) -> Optional[Tuple[float, float, float, float]]:
+    """(x0, top, x1, bottom) when the subpath is a closed axis-aligned rectangle."""
+    if ops.endswith('lh') and len(ops) > 3 and pts[-2] == pts[0]:
+        ops, pts = ops[:-2] + 'h', pts[:-2] + pts[-1:]  # Redundant l before the h
+    if ops not in ('mlllh', 'mllll') or pts[4] != pts[0]:
+        return None
+    (x0, y0), (x1, y1), (x2, y2), (x3, y3) = pts[:4]
+    close = lambda a, b: abs(a - b) <= AXIS_TOLERANCE
+    if not ((close(x0, x1) and close(y1, y2) and close(x2, x3) and close(y3, y0)) or
+            (close(y0, y1) and close(x1, x2) and close(y2, y3) and close(x3, x0))):
+        return None
+    return min(x0, x2), min(y0, y2), max(x0, x2), max(y0, y2)
+
+def page_shapes(paths: Iterable[Sequence[tuple]]) -> Tuple[List[dict], List[dict]]:
+    """
+    (boxes, segments) of a page's painted paths. Each path is a list of
+    (op, point...) tuples as in pdfplumber's 'path' (top-left origin).
+    Boxes are {'x0', 'top', 'x1', 'bottom'}, segments {'pts': [[x, top], [x, top]]},
+    rounded to 0.001pt.
+    """
+    boxes, segments = set(), set()
+
+    def add_segment(a: Point, b: Point):
+        a, b = (round(a[0], 3), round(a[1], 3)), (round(b[0], 3), round(b[1], 3))
+        if a != b:
+            segments.add(min(a, b) + max(a, b))
+
+    for path in paths:
+        for subpath in _subpaths(path):
+            ops = ''.join(op for op, _ in subpath)
+            pts = [pt for _, pt in subpath]
+            box = _as_box(ops, pts)
+            if box is None:
+                for (op, end), (_, start) in zip(subpath[1:], subpath):
+                    if op in ('l', 'h'):
+                        add_segment(start, end)
+                continue
+
+            x0, top, x1, bottom = box
+            if x1 - x0 <= LINE_MAX_THICKNESS and bottom - top <= LINE_MAX_THICKNESS:
+                continue  # A dot
+            if x1 - x0 <= LINE_MAX_THICKNESS:
+                add_segment(((x0 + x1) / 2, top), ((x0 + x1) / 2, bottom))
+            elif bottom - top <= LINE_MAX_THICKNESS:
+                add_segment((x0, (top + bottom) / 2), (x1, (top + bottom) / 2))
+            else:
+                boxes.add((round(top, 3), round(x0, 3), round(bottom, 3), round(x1, 3)))
+
+    return ([{'x0': x0, 'top': top, 'x1': x1, 'bottom': bottom} for top, x0, bottom, x1 in sorted(boxes)],
+            [{'pts': [[x0, y0], [x1, y1]]} for x0, y0, x1, y1 in sorted(segments, key=lambda s: (s[1], s[0], s[3], s[2]))])
+
+def pdf_box(box: dict, page_height: float) -> dict:
+    """A page_shapes box as {'x', 'y', 'w', 'h'} in PDF coordinates, rounded to 0.01pt."""
+    return {
+        'x': round(box['x0'], 2),
+        'y': round(page_height - box['bottom'], 2),
+        'w': round(box['x1'] - box['x0'], 2),
+        'h': round(box['bottom'] - box['top'], 2),
+    }
+
+def pdf_segment(segment: dict, page_height: float) -> dict:
+    """A page_shapes segment as {'x0', 'y0', 'x1', 'y1'} in PDF coordinates, rounded to 0.01pt."""
+    (x0, top0), (x1, top1) = segment['pts']
+    return {'x0': round(x0, 2), 'y0': round(page_height - top0, 2),
+            'x1': round(x1, 2), 'y1': round(page_height - top1, 2)}
+
+def segment_bounds(segment: dict) -> dict:
+    """Bounding {'x', 'y', 'w', 'h'} of a pdf_segment, for GridIndex."""
+    x0, x1 = sorted((segment['x0'], segment['x1']))
+    y0, y1 = sorted((segment['y0'], segment['y1']))
+    return {'x': x0, 'y': y0, 'w': x1 - x0, 'h': y1 - y0}
+
+class SegmentIndex:
+    """
+    GridIndex over pdf_segments cut in pieces of at most one cell, so a long
+    diagonal connector is only registered in the cells it crosses and not
+    in every cell of its bounding box.
+    """
+
+    def __init__(self, segments: Sequence[dict], cell_size: float = SEGMENT_CELL):
+        pieces, self.owners = [], []
+        for i, s in enumerate(segments):
+            dx, dy = s['x1'] - s['x0'], s['y1'] - s['y0']
+            count = max(1, math.ceil(max(abs(dx), abs(dy)) / cell_size))
+            for k in range(count):
+                a, b = k / count, (k + 1) / count
+                pieces.append(segment_bounds({'x0': s['x0'] + dx * a, 'y0': s['y0'] + dy * a,
+                                              'x1': s['x0'] + dx * b, 'y1': s['y0'] + dy * b}))
+                self.owners.append(i)
+        self.grid = GridIndex(pieces, cell_size)
+
+    def query(self, x_min: float, y_min: float, x_max: float, y_max: float) -> List[int]:
+        """Positions (ascending) of the segments that may cross the rectangle."""
+        return sorted({self.owners[i] for i in self.grid.query(x_min, y_min, x_max, y_max)})
+
+def enclosing_box(element: dict, boxes: Sequence[dict], index: Optional[GridIndex] = None) -> Optional[int]:
+    """
+    Position in `boxes` (PDF {'x', 'y', 'w', 'h'}, one page) of the smallest
+    box containing the element's center, or None. With a GridIndex of
+    `boxes` only the boxes in the center's cell are tested.
+    """
+    cx = element['x'] + element['w'] / 2
+    cy = element['y'] + element['h'] / 2
+    candidates = range(len(boxes)) if index is None else index.query(cx, cy, cx, cy)
+
+    best, best_area = None, None
+    for i in candidates:
+        box = boxes[i]
+        if box['x'] <= cx <= box['x'] + box['w'] and box['y'] <= cy <= box['y'] + box['h']:
+            area = box['w'] * box['h']
+            if best is None or area < best_area:
+                best, best_area = i, area
+    return best
+
+def _clip_segment(segment: dict, x0: float, y0: float, x1: float, y1: float) -> Optional[Tuple[float, float, float, float]]:
+    """Bounds (x0, y0, x1, y1) of the part of the segment inside the rectangle (Liang-Barsky), or None."""
+    sx, sy = segment['x0'], segment['y0']
+    dx, dy = segment['x1'] - sx, segment['y1'] - sy
+    t0, t1 = 0.0, 1.0
+    for p, q in ((-dx, sx - x0), (dx, x1 - sx), (-dy, sy - y0), (dy, y1 - sy)):
+        if p == 0:
+            if q < 0:
+                return None  # Parallel to this edge and outside it
+            continue
+        t = q / p
+        if p < 0:
+            t0 = max(t0, t)
+        else:
+            t1 = min(t1, t)
+        if t0 > t1:
+            return None
+    ax, ay, bx, by = sx + t0 * dx, sy + t0 * dy, sx + t1 * dx, sy + t1 * dy
+    return min(ax, bx), min(ay, by), max(ax, bx), max(ay, by)
+
+def fit_cover(cover: dict, element: dict, box: Optional[dict] = None, segments: Sequence[dict] = (),
+              index: Optional[SegmentIndex] = None) -> dict:
+    """
+    `cover` ({'x', 'y', 'w', 'h'}, the area that would be painted over
+    `element`) shrunk to stay CLEARANCE inside `box` and CLEARANCE away
+    from the pdf_segments it crosses. Each crossing line is cut off on the
+    side that keeps the most area. The words themselves (the element minus
+    TEXT_MARGIN) always stay covered: a line that runs through the text
+    is left alone. With a SegmentIndex of `segments` only the lines near
+    the cover are tested.
+    """
+    wx0 = element['x'] + min(TEXT_MARGIN, element['w'] / 2)
+    wy0 = element['y'] + min(TEXT_MARGIN, element['h'] / 2)
+    wx1 = element['x'] + element['w'] - min(TEXT_MARGIN, element['w'] / 2)
+    wy1 = element['y'] + element['h'] - min(TEXT_MARGIN, element['h'] / 2)
+
+    x0, y0 = cover['x'], cover['y']
+    x1, y1 = x0 + cover['w'], y0 + cover['h']
+
+    if box is not None:
+        x0 = max(x0, min(box['x'] + CLEARANCE, wx0))
+        y0 = max(y0, min(box['y'] + CLEARANCE, wy0))
+        x1 = min(x1, max(box['x'] + box['w'] - CLEARANCE, wx1))
+        y1 = min(y1, max(box['y'] + box['h'] - CLEARANCE, wy1))
+
+    candidates = range(len(segments)) if index is None else index.query(x0, y0, x1, y1)
+    for i in candidates:
+        piece = _clip_segment(segments[i], x0, y0, x1, y1)
+        if piece is None:
+            continue
+        px0, py0, px1, py1 = piece
+        options = [(px1 + CLEARANCE, y0, x1, y1), (x0, y0, px0 - CLEARANCE, y1),
+                   (x0, py1 + CLEARANCE, x1, y1), (x0, y0, x1, py0 - CLEARANCE)]
+        options = [o for o in options if o[0] <= wx0 and o[1] <= wy0 and o[2] >= wx1 and o[3] >= wy1]
+        if options:
+            x0, y0, x1, y1 = max(options, key=lambda o: (o[2] - o[0]) * (o[3] - o[1]))
+
+    return {'x': x0, 'y': y0, 'w': x1 - x0, 'h': y1 - y0}
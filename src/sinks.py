@@ -0,0 +1,120 @@
+"""
+Output sinks: where generated PDFs are written.
+
+`merge_pdfs` and the update scripts accept either a path or any writable
+binary stream. A sink hands out one stream per generated file, so a whole
+pipeline run can go to a directory, straight into a ZIP archive (a file or
+stdout) or stay in memory, with no intermediate per-org files on disk.
+"""
+import io
+import os
+import sys
+import threading
+import time
+import zipfile
+from contextlib import contextmanager
+from typing import BinaryIO, Dict, Iterator, Union
+
+OutputTarget = Union[str, BinaryIO]
+
+def describe_output(target: OutputTarget) -> str:
+    """Printable name of a path or stream output."""
+    if isinstance(target, str):
+        return target
+    return getattr(target, 'name', None) or f"<{type(target).__name__}>"
+
+def stdout_stream() -> BinaryIO:
+    """Binary stdout, for writing PDF/ZIP bytes to a pipe."""
+    return sys.stdout.buffer
+
+class OutputSink:
+    """Base sink: `with sink.open(name) as stream:` writes one output file."""
+
+    def open(self, name: str):
+        raise NotImplementedError
+
+    def write_bytes(self, name: str, data: bytes):
+        with self.open(name) as stream:
+            stream.write(data)
+
+    def location(self, name: str) -> str:
+        """Where `name` ends up, for logs and summaries."""
+        return name
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+class DirectorySink(OutputSink):
+    """One file per output in a directory (the classic output/ folder)."""
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def location(self, name: str) -> str:
+        return os.path.join(self.directory, name)
+
+    @contextmanager
+    def open(self, name: str) -> Iterator[BinaryIO]:
+        with open(self.location(name), 'wb') as f:
+            yield f
+
+class ZipSink(OutputSink):
+    """
+    Streams every output as an entry of a single ZIP archive.
+    `target` is a path or a writable stream (use stdout_stream() to pipe it);
+    non-seekable streams are fine, entries are written sequentially.
+    """
+
+    def __init__(self, target: OutputTarget, compression: int = zipfile.ZIP_DEFLATED):
+        self.target = target
+        self._zip = zipfile.ZipFile(target, mode='w', compression=compression)
+        self._lock = threading.Lock()
+
+    def location(self, name: str) -> str:
+        return f"{describe_output(self.target)}:{name}"
+
+    @contextmanager
+    def open(self, name: str) -> Iterator[BinaryIO]:
+        # zipfile allows one open entry at a time
+        with self._lock:
+            info = zipfile.ZipInfo(name, date_time=time.localtime()[:6])
+            info.compress_type = self._zip.compression
+            with self._zip.open(info, mode='w', force_zip64=True) as entry:
+                yield entry
+
+    def close(self):
+        self._zip.close()
+
+class MemorySink(OutputSink):
+    """Keeps outputs as bytes in `files` (name -> bytes) for in-process consumers."""
+
+    def __init__(self):
+        self.files: Dict[str, bytes] = {}
+
+    def location(self, name: str) -> str:
+        return f"<memory>:{name}"
+
+    @contextmanager
+    def open(self, name: str) -> Iterator[BinaryIO]:
+        buffer = io.BytesIO()
+        yield buffer
+        self.files[name] = buffer.getvalue()
+
+class StdoutSink(OutputSink):
+    """Raw bytes to stdout: meant for a single output (e.g. one updated PDF)."""
+
+    def location(self, name: str) -> str:
+        return "<stdout>"
+
+    @contextmanager
+    def open(self, name: str) -> Iterator[BinaryIO]:
+        stream = stdout_stream()
+        yield stream
+        stream.flush()
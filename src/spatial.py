@@ -0,0 +1,69 @@
+import math
+from collections import defaultdict
+from typing import Dict, List, Optional, Sequence, Tuple
+
+def check_overlap(box1: dict, box2: dict, padding: float = 2) -> bool:
+    """True if the two boxes overlap once each is grown by `padding`."""
+    x1_min = box1['x'] - padding
+    x1_max = box1['x'] + box1['w'] + padding
+    y1_min = box1['y'] - padding
+    y1_max = box1['y'] + box1['h'] + padding
+
+    x2_min = box2['x'] - padding
+    x2_max = box2['x'] + box2['w'] + padding
+    y2_min = box2['y'] - padding
+    y2_max = box2['y'] + box2['h'] + padding
+
+    if x1_max < x2_min or x2_max < x1_min or y1_max < y2_min or y2_max < y1_min:
+        return False
+    return True
+
+class GridIndex:
+    """
+    Uniform grid over axis-aligned boxes ({'x', 'y', 'w', 'h'} dicts, PDF points).
+    Each box is registered in every cell it touches, so a rectangle query only
+    looks at the boxes sharing a cell with it instead of the whole page.
+    """
+
+    def __init__(self, boxes: Sequence[dict], cell_size: Optional[float] = None):
+        self.boxes = list(boxes)
+        if cell_size is None:
+            cell_size = self._default_cell_size(self.boxes)
+        self.cell_size = cell_size
+        self._cells: Dict[Tuple[int, int], List[int]] = defaultdict(list)
+
+        for index, box in enumerate(self.boxes):
+            for cell in self._cells_for(box['x'], box['y'], box['x'] + box['w'], box['y'] + box['h']):
+                self._cells[cell].append(index)
+
+    @staticmethod
+    def _default_cell_size(boxes: Sequence[dict]) -> float:
+        # About the size of a typical box: most boxes touch 1-4 cells
+        if not boxes:
+            return 1.0
+        return max(sum(max(b['w'], b['h']) for b in boxes) / len(boxes), 1.0)
+
+    def _cells_for(self, x_min: float, y_min: float, x_max: float, y_max: float):
+        size = self.cell_size
+        for cx in range(math.floor(x_min / size), math.floor(x_max / size) + 1):
+            for cy in range(math.floor(y_min / size), math.floor(y_max / size) + 1):
+                yield cx, cy
+
+    def query(self, x_min: float, y_min: float, x_max: float, y_max: float) -> List[int]:
+        """
+        Returns the indices (in insertion order) of boxes whose cells intersect
+        the query rectangle. This is a superset of the boxes that actually touch
+        it; callers apply their own exact test.
+        """
+        found = set()
+        cells = self._cells
+        for cell in self._cells_for(x_min, y_min, x_max, y_max):
+            bucket = cells.get(cell)
+            if bucket:
+                found.update(bucket)
+        return sorted(found)
+
+    def query_box(self, box: dict, padding: float = 0.0) -> List[int]:
+        """Same as query() for a box dict grown by `padding` on every side."""
+        return self.query(box['x'] - padding, box['y'] - padding,
+                          box['x'] + box['w'] + padding, box['y'] + box['h'] + padding)
@@ -0,0 +1,232 @@
+"""
+Staged pipeline mode: fetch -> render -> merge -> save over bounded queues.
+
+Each stage is a set of asyncio tasks that hand the blocking work to an
+executor, so datalake waits and disk writes overlap with rendering and
+merging. Queues are bounded: when a downstream stage falls behind, the
+upstream ones block on put(), which keeps at most a few orgs in memory.
+"""
+import asyncio
+import io
+import os
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Tuple, Union
+from src.datalake import DataLakeService
+from src.merger import merge_pdfs
+from src.models import OrgResult, OrgTemplate, PositionData
+from src.content_overlay import OverlayOps
+from src.metrics import StageTimer
+from src.overlay_cache import get_overlay, relevant_positions
+from src.pipeline import output_filename
+from src.sinks import DirectorySink, OutputSink
+
+_DONE = object()
+
+def render_overlay(template: OrgTemplate, positions: List[PositionData]) -> Tuple[Union[OverlayOps, bytes], bool]:
+    """Render stage body (picklable for process pools): (overlay ops or PDF bytes, cache hit)."""
+    overlay, cached = get_overlay(template, positions)
+    return (overlay if isinstance(overlay, OverlayOps) else overlay.getvalue()), cached
+
+def merge_overlay(base_pdf_path: str, overlay: Union[OverlayOps, bytes],
+                  template: OrgTemplate, save_profile: Optional[str] = None) -> Tuple[Optional[bytes], List[str]]:
+    """Merge stage body: (merged PDF bytes or None, error messages)."""
+    errors: List[str] = []
+    output = io.BytesIO()
+    if isinstance(overlay, bytes):
+        overlay = io.BytesIO(overlay)
+    if not merge_pdfs(base_pdf_path, overlay, output, template, log=errors.append, save_profile=save_profile):
+        return None, errors
+    return output.getvalue(), errors
+
+class StageStats:
+    """Busy time and item counts of one stage, plus the depth of its input queue."""
+
+    def __init__(self, name: str, workers: int):
+        self.name = name
+        self.workers = workers
+        self.items = 0
+        self.busy = 0.0
+        self.depth_samples = 0
+        self.depth_total = 0
+        self.depth_max = 0
+
+    def sample_depth(self, depth: int):
+        self.depth_samples += 1
+        self.depth_total += depth
+        self.depth_max = max(self.depth_max, depth)
+
+    def report(self, wall: float) -> str:
+        utilization = self.busy / (wall * self.workers) if wall else 0.0
+        mean_depth = self.depth_total / self.depth_samples if self.depth_samples else 0.0
+        return (f"  {self.name:7} workers: {self.workers:2} | items: {self.items:4} | "
+                f"busy: {self.busy:7.2f}s | utilization: {utilization:6.1%} | "
+                f"queue depth avg: {mean_depth:4.1f} max: {self.depth_max}")
+
+class StagedPipeline:
+    """
+    One run of the staged mode. Items flowing between stages are dicts with
+    the job ('config_file', 'template'), its StageTimer ('timer') and
+    whatever earlier stages produced.
+    """
+
+    def __init__(self, jobs: List[Tuple[str, OrgTemplate]], templates_dir: str,
+                 sink: OutputSink, workers: int = 1, queue_size: int = 4,
+                 datalake: Optional[DataLakeService] = None, save_profile: Optional[str] = None):
+        self.jobs = jobs
+        self.templates_dir = templates_dir
+        self.sink = sink
+        self.workers = max(1, workers)
+        self.queue_size = max(1, queue_size)
+        self.datalake = datalake
+        self.save_profile = save_profile
+        self.results: List[OrgResult] = []
+        self.stats: Dict[str, StageStats] = {}
+
+    def _fail(self, item: dict, status: str, message: str):
+        config_file, template = item['config_file'], item['template']
+        timer = item['timer']
+        self.results.append(OrgResult(org_id=template.org_id, config_path=config_file,
+                                      status=status, message=message, logs=item['logs'],
+                                      timings=timer.timings, counters=timer.counters))
+
+    async def _stage(self, name: str, workers: int, executor: Executor,
+                     in_q: asyncio.Queue, out_q: Optional[asyncio.Queue], out_workers: int,
+                     fn: Callable[[dict], Tuple], handle: Callable[[dict, Tuple], bool]):
+        """
+        Runs `workers` consumers of in_q. fn(item) returns the executor call
+        (callable, *args); handle(item, result) updates the item and returns
+        True to pass it on to out_q. Once in_q is drained, every one of the
+        `out_workers` consumers of out_q gets an end marker.
+        """
+        stats = self.stats[name] = StageStats(name, workers)
+        loop = asyncio.get_running_loop()
+
+        async def consume():
+            while True:
+                stats.sample_depth(in_q.qsize())
+                item = await in_q.get()
+                if item is _DONE:
+                    return
+                call = fn(item)
+                start = time.perf_counter()
+                try:
+                    result = await loop.run_in_executor(executor, *call)
+                except Exception as e:
+                    self._fail(item, "error", f"{name} failed: {type(e).__name__}: {e}")
+                    continue
+                finally:
+                    elapsed = time.perf_counter() - start
+                    item['timer'].add(name, elapsed)
+                    stats.busy += elapsed
+                    stats.items += 1
+                if handle(item, result) and out_q is not None:
+                    await out_q.put(item)  # Blocks while the next stage is behind
+
+        await asyncio.gather(*(consume() for _ in range(workers)))
+        if out_q is not None:
+            for _ in range(out_workers):
+                await out_q.put(_DONE)
+
+    async def _feed(self, fetch_q: asyncio.Queue, consumers: int):
+        for config_file, template in self.jobs:
+            base_pdf_path = os.path.join(self.templates_dir, f"{template.org_id}.pdf")
+            item = {'config_file': config_file, 'template': template,
+                    'base_pdf_path': base_pdf_path, 'logs': [f"Processing config: {config_file}"],
+                    'timer': StageTimer()}
+            if not os.path.exists(base_pdf_path):
+                self._fail(item, "skipped", f"Base PDF not found: {base_pdf_path}")
+                continue
+            await fetch_q.put(item)
+        for _ in range(consumers):
+            await fetch_q.put(_DONE)
+
+    def _on_fetched(self, item: dict, positions: List[PositionData]) -> bool:
+        if not positions:
+            self._fail(item, "skipped", f"No positions found for {item['template'].org_id}")
+            return False
+        item['positions'] = positions
+        return True
+
+    def _on_rendered(self, item: dict, result: Tuple[Union[OverlayOps, bytes], bool]) -> bool:
+        item['overlay'], cached = result
+        item['logs'].append("Reusing cached text overlay" if cached else "Generated text overlay")
+        item['timer'].count("nodes_rendered", len(relevant_positions(item['template'], item['positions'])))
+        del item['positions']
+        return True
+
+    def _on_merged(self, item: dict, result: Tuple[Optional[bytes], List[str]]) -> bool:
+        merged, errors = result
+        del item['overlay']
+        if merged is None:
+            self._fail(item, "error", "; ".join(errors))
+            return False
+        item['merged'] = merged
+        return True
+
+    def _on_saved(self, item: dict, output_path: str) -> bool:
+        config_file, template, timer = item['config_file'], item['template'], item['timer']
+        timer.count("bytes_written", len(item['merged']))
+        self.results.append(OrgResult(org_id=template.org_id, config_path=config_file, status="ok",
+                                      output_path=output_path, logs=item['logs'],
+                                      timings=timer.timings, counters=timer.counters))
+        del item['merged']
+        return False
+
+    def _save(self, name: str, data: bytes) -> str:
+        self.sink.write_bytes(name, data)
+        return self.sink.location(name)
+
+    async def run(self) -> List[OrgResult]:
+        datalake = self.datalake or DataLakeService()
+        fetch_workers = datalake.max_concurrency
+        fetch_q, render_q, merge_q, save_q = (asyncio.Queue(maxsize=self.queue_size) for _ in range(4))
+
+        # CPU-bound stages get processes when asked for more than one worker
+        cpu_executor = (ProcessPoolExecutor(max_workers=self.workers) if self.workers > 1
+                        else ThreadPoolExecutor(max_workers=1))
+        io_executor = ThreadPoolExecutor(max_workers=fetch_workers + 1)
+        try:
+            await asyncio.gather(
+                self._feed(fetch_q, fetch_workers),
+                self._stage("fetch", fetch_workers, io_executor, fetch_q, render_q, self.workers,
+                            lambda item: (datalake.get_positions_for_org, item['template'].org_id),
+                            self._on_fetched),
+                self._stage("render", self.workers, cpu_executor, render_q, merge_q, self.workers,
+                            lambda item: (render_overlay, item['template'], item['positions']),
+                            self._on_rendered),
+                self._stage("merge", self.workers, cpu_executor, merge_q, save_q, 1,
+                            lambda item: (merge_overlay, item['base_pdf_path'], item['overlay'], item['template'],
+                                          self.save_profile),
+                            self._on_merged),
+                self._stage("save", 1, io_executor, save_q, None, 0,
+                            lambda item: (self._save, output_filename(item['template'].org_id), item['merged']),
+                            self._on_saved),
+            )
+        finally:
+            cpu_executor.shutdown()
+            io_executor.shutdown()
+            if self.datalake is None:
+                datalake.close()
+        return self.results
+
+def run_staged(jobs: List[Tuple[str, OrgTemplate]], templates_dir: str, output_dir: str,
+               sink: Optional[OutputSink] = None, workers: int = 1,
+               queue_size: int = 4, save_profile: Optional[str] = None) -> List[OrgResult]:
+    """
+    Runs the scheduled jobs through the staged pipeline and prints per-stage
+    utilization and queue depth. Outputs go to output_dir unless a sink is given.
+    """
+    pipeline = StagedPipeline(jobs, templates_dir, sink or DirectorySink(output_dir),
+                              workers=workers, queue_size=queue_size, save_profile=save_profile)
+    start = time.perf_counter()
+    results = asyncio.run(pipeline.run())
+    wall = time.perf_counter() - start
+
+    for res in results:
+        for line in res.logs:
+            print(line)
+    print(f"\nStage report ({wall:.2f}s wall, queue size {pipeline.queue_size}):")
+    for stats in pipeline.stats.values():
+        print(stats.report(wall))
+    return results
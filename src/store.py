@@ -0,0 +1,384 @@
+"""
+SQLite store for the coordinates and positions databases.
+
+Replaces loading the whole coordinates_db.json / positions_db.json on every
+call: readers fetch a single org, extractors upsert one org at a time, and
+WAL mode lets several readers work while an extractor writes.
+
+    python -m src.store import coordinates coordinates_db.json
+    python -m src.store export positions positions_db.json
+"""
+import json
+import os
+import sqlite3
+import sys
+from collections.abc import Mapping
+from typing import Iterable, List, Optional
+
+from src.text_index import (INDEX_VERSION, build_database_index, checked_index, coordinate_elements,
+                            index_path_for, load_org_index, position_elements)
+
+STORE_PATH = os.environ.get("ORGCHART_STORE", "orgcharts.sqlite")
+
+KINDS = {
+    "coordinates": {
+        "version": "1.0",
+        "description": "Base de datos de coordenadas de organigramas",
+        "json_path": "coordinates_db.json",
+        "elements_of": coordinate_elements,
+    },
+    "positions": {
+        "version": "2.0",
+        "description": "Base de datos de posiciones organizacionales con validación de superposición",
+        "json_path": "positions_db.json",
+        "elements_of": position_elements,
+    },
+}
+
+# Element type -> list of a positions_db.json org
+POSITION_GROUPS = {"CARGO": "cargos", "NOMBRE": "nombres"}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS orgs (
+    kind TEXT NOT NULL,
+    org_id TEXT NOT NULL,
+    pdf_path TEXT NOT NULL,
+    page_width REAL NOT NULL,
+    page_height REAL NOT NULL,
+    pages TEXT,
+    text_index TEXT,
+    shapes TEXT,
+    updated_at TEXT NOT NULL DEFAULT (datetime('now')),
+    PRIMARY KEY (kind, org_id)
+);
+CREATE TABLE IF NOT EXISTS elements (
+    kind TEXT NOT NULL,
+    org_id TEXT NOT NULL,
+    seq INTEGER NOT NULL,
+    text TEXT NOT NULL,
+    x REAL NOT NULL,
+    y REAL NOT NULL,
+    w REAL NOT NULL,
+    h REAL NOT NULL,
+    type TEXT,
+    page INTEGER NOT NULL DEFAULT 0,
+    box INTEGER,
+    PRIMARY KEY (kind, org_id, seq),
+    FOREIGN KEY (kind, org_id) REFERENCES orgs (kind, org_id) ON DELETE CASCADE
+);
+CREATE INDEX IF NOT EXISTS idx_elements_type ON elements (kind, org_id, type);
+DROP INDEX IF EXISTS idx_elements_bbox;
+"""
+
+# Columns added after the first release: (table, column, definition)
+MIGRATIONS = (
+    ("orgs", "pages", "TEXT"),
+    ("elements", "page", "INTEGER NOT NULL DEFAULT 0"),
+    ("orgs", "shapes", "TEXT"),
+    ("elements", "box", "INTEGER"),
+)
+
+def page_dimensions(org: dict, page: int = 0) -> dict:
+    """{'width', 'height'} of one page of an org (0-based; older data only has the first)."""
+    pages = org.get("pages")
+    if pages and page < len(pages):
+        return pages[page]
+    return org["page_dimensions"]
+
+class OutdatedStore(Exception):
+    """A store written before the last schema change, opened read-only."""
+
+class OrgStore:
+    """
+    Per-org access to the coordinates/positions data in a SQLite file.
+    Orgs are returned in the same dict layout as the JSON databases.
+    Only a writable open creates the schema and upgrades older stores; a
+    read-only open of an older store raises OutdatedStore.
+    """
+
+    def __init__(self, path: str = STORE_PATH, readonly: bool = False):
+        self.path = path
+        if readonly:
+            self.conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True, timeout=30)
+            if self._pending_migrations(self.conn):
+                self.conn.close()
+                raise OutdatedStore(f"{path} predates the current schema; open it writable to upgrade it")
+        else:
+            self.conn = sqlite3.connect(path, timeout=30)
+            self.conn.execute("PRAGMA journal_mode=WAL")
+            self.conn.executescript(SCHEMA)
+            self._migrate(self.conn)
+        self.conn.execute("PRAGMA foreign_keys=ON")
+        self.conn.execute("PRAGMA busy_timeout=30000")
+
+    @staticmethod
+    def _pending_migrations(conn: sqlite3.Connection) -> list:
+        pending = []
+        for table, column, definition in MIGRATIONS:
+            columns = [row[1] for row in conn.execute(f"PRAGMA table_info({table})")]
+            if column not in columns:
+                pending.append((table, column, definition))
+        return pending
+
+    @classmethod
+    def _migrate(cls, conn: sqlite3.Connection):
+        with conn:
+            for table, column, definition in cls._pending_migrations(conn):
+                conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def org_ids(self, kind: str) -> List[str]:
+        rows = self.conn.execute("SELECT org_id FROM orgs WHERE kind = ? ORDER BY org_id", (kind,))
+        return [row[0] for row in rows]
+
+    def has_org(self, kind: str, org_id: str) -> bool:
+        row = self.conn.execute("SELECT 1 FROM orgs WHERE kind = ? AND org_id = ?", (kind, org_id)).fetchone()
+        return row is not None
+
+    def get_org(self, kind: str, org_id: str) -> Optional[dict]:
+        """One org in the JSON database layout, or None."""
+        row = self.conn.execute(
+            "SELECT pdf_path, page_width, page_height, pages, shapes FROM orgs WHERE kind = ? AND org_id = ?",
+            (kind, org_id)).fetchone()
+        if row is None:
+            return None
+
+        org = {
+            "pdf_path": row[0],
+            "page_dimensions": {"width": row[1], "height": row[2]},
+        }
+        if row[3] is not None:
+            org["pages"] = json.loads(row[3])
+        rows = self.conn.execute(
+            "SELECT text, x, y, w, h, type, page, box FROM elements WHERE kind = ? AND org_id = ? ORDER BY seq",
+            (kind, org_id))
+
+        def element(t, x, y, w, h, elem_type, page, box):
+            e = {"text": t, "x": x, "y": y, "w": w, "h": h}
+            if kind != "coordinates":
+                e["type"] = elem_type
+            e["page"] = page
+            if box is not None:
+                e["box"] = box
+            return e
+
+        if kind == "coordinates":
+            org["text_elements"] = [element(*r) for r in rows]
+        else:
+            org.update({"cargos": [], "nombres": [], "otros": []})
+            for r in rows:
+                org[POSITION_GROUPS.get(r[5], "otros")].append(element(*r))
+        if row[4] is not None:
+            org["shapes"] = json.loads(row[4])
+        return org
+
+    def get_index(self, kind: str, org_id: str) -> Optional[dict]:
+        """Trigram index of one org (see src.text_index), or None."""
+        row = self.conn.execute("SELECT text_index FROM orgs WHERE kind = ? AND org_id = ?",
+                                (kind, org_id)).fetchone()
+        if row is None or row[0] is None:
+            return None
+        return json.loads(row[0])
+
+    def upsert_org(self, kind: str, org_id: str, org: dict, text_index: Optional[dict] = None):
+        """Replaces one org (and its elements) in a single transaction."""
+        if kind == "coordinates":
+            elements = org["text_elements"]
+        else:
+            # Stored in cargos, nombres, otros order so get_org rebuilds the same lists
+            elements = org["cargos"] + org["nombres"] + org["otros"]
+
+        with self.conn:
+            self.conn.execute("DELETE FROM orgs WHERE kind = ? AND org_id = ?", (kind, org_id))
+            self.conn.execute(
+                "INSERT INTO orgs (kind, org_id, pdf_path, page_width, page_height, pages, text_index, shapes) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (kind, org_id, org["pdf_path"], org["page_dimensions"]["width"],
+                 org["page_dimensions"]["height"],
+                 json.dumps(org["pages"]) if org.get("pages") else None,
+                 json.dumps(text_index, ensure_ascii=False, separators=(',', ':')) if text_index else None,
+                 json.dumps(org["shapes"], separators=(',', ':')) if org.get("shapes") else None))
+            self.conn.executemany(
+                "INSERT INTO elements (kind, org_id, seq, text, x, y, w, h, type, page, box) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                [(kind, org_id, seq, e["text"], e["x"], e["y"], e["w"], e["h"], e.get("type"), e.get("page", 0),
+                  e.get("box"))
+                 for seq, e in enumerate(elements)])
+
+    def delete_orgs_except(self, kind: str, keep: Iterable[str]) -> List[str]:
+        """Removes orgs whose template is gone. Returns the removed ids."""
+        keep = set(keep)
+        removed = [org_id for org_id in self.org_ids(kind) if org_id not in keep]
+        with self.conn:
+            self.conn.executemany("DELETE FROM orgs WHERE kind = ? AND org_id = ?",
+                                  [(kind, org_id) for org_id in removed])
+        return removed
+
+    def import_json(self, kind: str, json_path: str) -> int:
+        """Loads a coordinates_db.json / positions_db.json file. Returns the org count."""
+        with open(json_path, 'r', encoding='utf-8') as f:
+            database = json.load(f)
+        index = build_database_index(database, KINDS[kind]["elements_of"], json_path)
+        for org_id, org in database["organigramas"].items():
+            self.upsert_org(kind, org_id, org, index["organigramas"][org_id])
+        return len(database["organigramas"])
+
+    def export_json(self, kind: str, json_path: str) -> int:
+        """Writes the store back in the JSON format (plus its .index.json). Returns the org count."""
+        database = {
+            "version": KINDS[kind]["version"],
+            "description": KINDS[kind]["description"],
+            "organigramas": {org_id: self.get_org(kind, org_id) for org_id in self.org_ids(kind)},
+        }
+        with open(json_path, 'w', encoding='utf-8') as f:
+            json.dump(database, f, indent=2, ensure_ascii=False)
+
+        index = {
+            "version": INDEX_VERSION,
+            "database": os.path.basename(json_path),
+            "organigramas": {org_id: self.get_index(kind, org_id) for org_id in database["organigramas"]},
+        }
+        with open(index_path_for(json_path), 'w', encoding='utf-8') as f:
+            json.dump(index, f, ensure_ascii=False, separators=(',', ':'))
+        return len(database["organigramas"])
+
+class StoreOrgs(Mapping):
+    """
+    Read-only `database['organigramas']` view over the store.
+    Each org is loaded on first access, so callers that need one org
+    never read the others.
+    """
+
+    def __init__(self, store: OrgStore, kind: str):
+        self.store = store
+        self.kind = kind
+        self._loaded = {}
+
+    def __getitem__(self, org_id):
+        if org_id not in self._loaded:
+            org = self.store.get_org(self.kind, org_id)
+            if org is None:
+                raise KeyError(org_id)
+            self._loaded[org_id] = org
+        return self._loaded[org_id]
+
+    def __contains__(self, org_id):
+        return org_id in self._loaded or self.store.has_org(self.kind, org_id)
+
+    def __iter__(self):
+        return iter(self.store.org_ids(self.kind))
+
+    def __len__(self):
+        return len(self.store.org_ids(self.kind))
+
+class Database:
+    """
+    A coordinates/positions database as returned by open_database.
+
+    `data` has the JSON layout ({'version', 'description', 'organigramas'})
+    and `database[key]` reads from it, so callers index it like the JSON
+    dict. `store` is the read-only OrgStore behind it (None for the JSON
+    file); close() releases it.
+    """
+
+    def __init__(self, kind: str, data: dict, store: Optional[OrgStore] = None):
+        self.kind = kind
+        self.data = data
+        self.store = store
+
+    def __getitem__(self, key):
+        return self.data[key]
+
+    def get(self, key, default=None):
+        return self.data.get(key, default)
+
+    def org_index(self, org_id: str) -> Optional[dict]:
+        """
+        Trigram index of one org from wherever the data came from, or None
+        if it is missing or was not built from the org's current elements.
+        """
+        if self.store is not None:
+            index = self.store.get_index(self.kind, org_id)
+        else:
+            index = load_org_index(KINDS[self.kind]["json_path"], org_id)
+        return _checked_org_index(index, self.kind, self.data["organigramas"].get(org_id))
+
+    def close(self):
+        if self.store is not None:
+            self.store.close()
+            self.store = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+def open_database(kind: str, store_path: str = STORE_PATH) -> Optional[Database]:
+    """
+    Database for `kind`, backed by the SQLite store when it has data for
+    that kind and by the JSON file otherwise (also when the store predates
+    the current schema: only the extractors upgrade it). None if neither exists.
+    Orgs in the store are read on first access, so close() it once the
+    orgs in use have been read.
+    """
+    if os.path.exists(store_path):
+        try:
+            store = OrgStore(store_path, readonly=True)
+        except OutdatedStore:
+            print(f"⚠️  {store_path} es de una versión anterior: ejecuta python extract_coordinates.py "
+                  f"o python extract_positions.py para actualizarla. Mientras tanto se usa {KINDS[kind]['json_path']}")
+        else:
+            if store.org_ids(kind):
+                return Database(kind, {
+                    "version": KINDS[kind]["version"],
+                    "description": KINDS[kind]["description"],
+                    "organigramas": StoreOrgs(store, kind),
+                }, store)
+            store.close()
+
+    json_path = KINDS[kind]["json_path"]
+    if not os.path.exists(json_path):
+        return None
+    with open(json_path, 'r', encoding='utf-8') as f:
+        return Database(kind, json.load(f))
+
+def _checked_org_index(index: Optional[dict], kind: str, org: Optional[dict]) -> Optional[dict]:
+    """`index` if it matches the texts of `org` (see text_index.checked_index)."""
+    if index is None or org is None:
+        return None
+    return checked_index(index, [e["text"] for e in KINDS[kind]["elements_of"](org)])
+
+def open_org_index(database, kind: str, org_id: str) -> Optional[dict]:
+    """
+    Trigram index of one org for a Database, or for a plain database dict
+    (read from the JSON file's index). Checked against the org's texts
+    here, once, so load it together with the org and reuse it for every
+    search.
+    """
+    if isinstance(database, Database):
+        return database.org_index(org_id)
+    return _checked_org_index(load_org_index(KINDS[kind]["json_path"], org_id), kind,
+                              database["organigramas"].get(org_id))
+
+if __name__ == "__main__":
+    if len(sys.argv) != 4 or sys.argv[1] not in ("import", "export") or sys.argv[2] not in KINDS:
+        print("Uso: python -m src.store import|export coordinates|positions <archivo.json>")
+        sys.exit(1)
+
+    action, kind, json_path = sys.argv[1:]
+    with OrgStore() as store:
+        if action == "import":
+            count = store.import_json(kind, json_path)
+            print(f"✅ {count} organigramas importados desde {json_path} a {store.path}")
+        else:
+            count = store.export_json(kind, json_path)
+            print(f"✅ {count} organigramas exportados desde {store.path} a {json_path}")
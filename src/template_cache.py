@@ -0,0 +1,76 @@
+"""
+In-memory cache of base template PDFs.
+
+Rendering many variants of the same chart (other people, anonymized or
+per-region copies) used to read the base PDF from disk for every output.
+The cache keeps each file's bytes once and hands every caller its own
+BytesIO over them: pikepdf edits the parsed document, never the buffer, so
+the copies are independent and cost no extra memory.
+"""
+import io
+import os
+import threading
+from collections import OrderedDict
+from typing import Dict, Tuple
+
+MAX_CACHE_BYTES = int(os.environ.get("ORGCHART_TEMPLATE_CACHE_MB", "128")) * 1024 * 1024
+
+class TemplateCache:
+    """
+    LRU cache of PDF bytes keyed by path, capped at `max_bytes`. An entry is
+    reloaded when the file's size or mtime changes. Thread safe.
+    """
+
+    def __init__(self, max_bytes: int = MAX_CACHE_BYTES):
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[str, Tuple[Tuple[int, float], bytes]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get_bytes(self, path: str) -> bytes:
+        stat = os.stat(path)
+        signature = (stat.st_size, stat.st_mtime)
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry is not None and entry[0] == signature:
+                self._entries.move_to_end(path)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+
+        with open(path, 'rb') as f:
+            data = f.read()
+
+        with self._lock:
+            old = self._entries.pop(path, None)
+            if old is not None:
+                self.size -= len(old[1])
+            # Files larger than the whole cache are served but not kept
+            if len(data) <= self.max_bytes:
+                self._entries[path] = (signature, data)
+                self.size += len(data)
+                while self.size > self.max_bytes:
+                    _, (_, evicted) = self._entries.popitem(last=False)
+                    self.size -= len(evicted)
+                    self.evictions += 1
+        return data
+
+    def open(self, path: str) -> io.BytesIO:
+        """A fresh stream over the cached bytes of `path`, one per output."""
+        return io.BytesIO(self.get_bytes(path))
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.size = 0
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses, 'evictions': self.evictions,
+                    'entries': len(self._entries), 'bytes': self.size, 'max_bytes': self.max_bytes}
+
+# Shared by merge_pdfs and apply_overlays within a process
+base_templates = TemplateCache()
@@ -0,0 +1,115 @@
+"""
+Text fitting by real font metrics.
+
+Widths come from reportlab's pdfmetrics, cached per font and per word at a
+1pt size: a width at any other size is a multiplication, so the font size
+search measures each word once no matter how many sizes it tries.
+"""
+import math
+from functools import lru_cache
+from typing import Dict, List, Tuple
+
+MIN_FONT_SIZE = 4.0
+SIZE_STEP = 0.5
+
+@lru_cache(maxsize=None)
+def glyph_widths(font: str) -> Dict[str, float]:
+    """Per-character advance widths of `font` at 1pt, filled on first use."""
+    return {}
+
+def char_width(font: str, ch: str) -> float:
+    widths = glyph_widths(font)
+    width = widths.get(ch)
+    if width is None:
+        from reportlab.pdfbase import pdfmetrics
+        width = widths[ch] = pdfmetrics.stringWidth(ch, font, 1)
+    return width
+
+@lru_cache(maxsize=65536)
+def word_width(font: str, word: str) -> float:
+    """Width of `word` at 1pt (reportlab does not kern, so glyph widths add up)."""
+    return sum(char_width(font, ch) for ch in word)
+
+def measure_lines(lines: List[str], font: str, font_size: float) -> List[float]:
+    """Widths of several lines at once, from the cached word widths."""
+    space = char_width(font, ' ')
+    widths = []
+    for line in lines:
+        words = line.split(' ')
+        widths.append((sum(word_width(font, w) for w in words) + space * (len(words) - 1)) * font_size)
+    return widths
+
+def _split_long_word(word: str, font: str, max_width: float) -> List[str]:
+    """Breaks a word wider than the box at character boundaries (like textwrap)."""
+    pieces, current, current_width = [], "", 0.0
+    for ch in word:
+        w = char_width(font, ch)
+        if current and current_width + w > max_width:
+            pieces.append(current)
+            current, current_width = "", 0.0
+        current += ch
+        current_width += w
+    if current:
+        pieces.append(current)
+    return pieces
+
+def wrap_text(text: str, font: str, font_size: float, width: float) -> List[str]:
+    """
+    Greedy word wrap by measured width. Newlines in `text` are kept as
+    line breaks (the renderer draws title and name on separate lines).
+    """
+    max_width = width / font_size  # Compare in 1pt units
+    space = char_width(font, ' ')
+    lines = []
+    for paragraph in text.split('\n'):
+        words = paragraph.split()
+        current, current_width = [], 0.0
+        for word in words:
+            w = word_width(font, word)
+            if w > max_width:
+                pieces = _split_long_word(word, font, max_width)
+                words_to_add = [(p, word_width(font, p)) for p in pieces]
+            else:
+                words_to_add = [(word, w)]
+            for piece, piece_width in words_to_add:
+                needed = piece_width if not current else current_width + space + piece_width
+                if current and needed > max_width:
+                    lines.append(' '.join(current))
+                    current, current_width = [piece], piece_width
+                else:
+                    current.append(piece)
+                    current_width = needed
+        if current:
+            lines.append(' '.join(current))
+    return lines
+
+def fit_text(text: str, font: str, font_size: float, width: float, max_lines: int,
+             min_font_size: float = MIN_FONT_SIZE, step: float = SIZE_STEP) -> Tuple[float, List[str]]:
+    """
+    Returns (font size, lines) for drawing `text` in a box `width` wide.
+    Uses `font_size` when the wrapped text fits in max_lines; otherwise the
+    largest size (in `step` increments, down to min_font_size) that does.
+    If nothing fits, the smallest size is used and the lines are truncated.
+    """
+    lines = wrap_text(text, font, font_size, width)
+    if len(lines) <= max_lines:
+        return font_size, lines
+    if font_size <= min_font_size:
+        return font_size, lines[:max_lines]
+
+    # Fewer lines as the size shrinks: binary search the step grid
+    low, high = 0, int(math.floor((font_size - min_font_size) / step))
+    best = None
+    while low <= high:
+        mid = (low + high) // 2
+        size = min_font_size + mid * step
+        candidate = wrap_text(text, font, size, width)
+        if len(candidate) <= max_lines:
+            best = (size, candidate)
+            low = mid + 1
+        else:
+            high = mid - 1
+
+    if best is None:
+        return min_font_size, wrap_text(text, font, min_font_size, width)[:max_lines]
+    return best
@@ -0,0 +1,257 @@
+import hashlib
+import json
+import os
+import re
+import unicodedata
+from typing import Callable, Dict, List, Optional, Sequence
+
+# 1.1: trigrams of folded text (see fold)
+# 1.2: digest of the indexed texts instead of their count
+INDEX_VERSION = "1.2"
+# Words shorter than this must match exactly in fuzzy searches
+FUZZY_MIN_LENGTH = 4
+_WORD = re.compile(r"\w+")
+
+def index_path_for(db_path: str) -> str:
+    """'coordinates_db.json' -> 'coordinates_db.index.json' (same folder)."""
+    root, ext = os.path.splitext(db_path)
+    return f"{root}.index{ext or '.json'}"
+
+def fold(text: str) -> str:
+    """Case- and accent-insensitive form of `text`: 'Piñero' -> 'pinero'."""
+    decomposed = unicodedata.normalize('NFKD', text)
+    return ''.join(c for c in decomposed if not unicodedata.combining(c)).casefold()
+
+def trigrams(text: str) -> set:
+    """3-character substrings of the folded `text`."""
+    text = fold(text)
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+def texts_digest(texts: Sequence[str]) -> str:
+    """SHA-256 of the texts in order: ties an index to the exact element list it was built from."""
+    h = hashlib.sha256()
+    for text in texts:
+        h.update(text.encode('utf-8'))
+        h.update(b'\0')
+    return h.hexdigest()
+
+def build_trigram_index(texts: Sequence[str]) -> dict:
+    """
+    Inverted index trigram -> ids of the texts containing it.
+    Ids are positions in `texts`, so they stay valid as long as the
+    element list of the org is not rebuilt.
+    """
+    postings: Dict[str, List[int]] = {}
+    for i, text in enumerate(texts):
+        for tri in trigrams(text):
+            postings.setdefault(tri, []).append(i)
+    return {"version": INDEX_VERSION, "digest": texts_digest(texts), "trigrams": postings}
+
+def candidate_ids(org_index: dict, query: str) -> Optional[List[int]]:
+    """
+    Ids of the texts that contain every trigram of `query`.
+    Returns None when the query is too short to use the index.
+    """
+    query_trigrams = trigrams(query)
+    if not query_trigrams:
+        return None
+
+    postings = org_index["trigrams"]
+    lists = []
+    for tri in query_trigrams:
+        ids = postings.get(tri)
+        if not ids:
+            return []
+        lists.append(ids)
+
+    # Intersect starting from the rarest trigram
+    lists.sort(key=len)
+    result = set(lists[0])
+    for ids in lists[1:]:
+        result.intersection_update(ids)
+        if not result:
+            break
+    return sorted(result)
+
+def match_rank(query_folded: str, text: str):
+    """
+    Sort key for a substring match (lower is better), or None when `text`
+    does not contain the (folded) query: exact, prefix, word start,
+    anywhere; then by how much extra text surrounds the match.
+    """
+    text_folded = fold(text)
+    pos = text_folded.find(query_folded)
+    if pos < 0:
+        return None
+    if text_folded == query_folded:
+        quality = 0
+    elif pos == 0:
+        quality = 1
+    elif not text_folded[pos - 1].isalnum():
+        quality = 2
+    else:
+        quality = 3
+    return quality, len(text_folded) - len(query_folded)
+
+def checked_index(org_index: Optional[dict], texts: Sequence[str]) -> Optional[dict]:
+    """
+    `org_index` if it was built from exactly these texts with the current
+    folding, else None. Hashes every text, so call it once when the index
+    is loaded: the searches below trust the index they are given.
+    """
+    if org_index is None or org_index.get("version") != INDEX_VERSION:
+        return None
+    if org_index.get("digest") != texts_digest(texts):
+        return None
+    return org_index
+
+def search_texts(texts: Sequence[str], query: str, org_index: Optional[dict] = None) -> List[int]:
+    """
+    Ids of every text containing `query` (ignoring case and accents), best
+    match first. Uses the trigram index (from checked_index or
+    build_trigram_index over these texts) to touch only candidates; falls
+    back to a full scan for queries under 3 characters or without an index.
+    """
+    query_folded = fold(query)
+    ids = None
+    if org_index is not None:
+        ids = candidate_ids(org_index, query_folded)
+    if ids is None:
+        ids = range(len(texts))
+
+    ranked = []
+    for i in ids:
+        rank = match_rank(query_folded, texts[i])
+        if rank is not None:
+            ranked.append((rank, i))
+    ranked.sort()
+    return [i for _, i in ranked]
+
+def _deletes(word: str) -> set:
+    """`word` and every string one character shorter."""
+    return {word} | {word[:i] + word[i + 1:] for i in range(len(word))}
+
+def within_one_edit(a: str, b: str) -> bool:
+    """True if a and b differ by at most one insertion, deletion, substitution or adjacent swap."""
+    if a == b:
+        return True
+    if abs(len(a) - len(b)) > 1:
+        return False
+    start = 0
+    while start < min(len(a), len(b)) and a[start] == b[start]:
+        start += 1
+    if len(a) == len(b):
+        return (a[start + 1:] == b[start + 1:] or
+                (a[start + 2:] == b[start + 2:] and a[start:start + 2] == b[start:start + 2][::-1]))
+    if len(a) < len(b):
+        a, b = b, a
+    return a[start + 1:] == b[start:]
+
+class FuzzyIndex:
+    """
+    Typo-tolerant word index of a list of texts (symmetric deletion).
+
+    Every folded word of every text is stored under itself and under each
+    of its one-character deletions. Two words within one edit (insertion,
+    deletion, substitution or adjacent swap) always share one of those
+    keys, so a query word only needs len(word) + 1 dictionary lookups,
+    whatever the number of texts; the candidates are then confirmed with
+    within_one_edit.
+    """
+
+    def __init__(self, texts: Sequence[str]):
+        self.texts = list(texts)
+        self.postings: Dict[str, set] = {}  # folded word -> ids of texts containing it
+        for i, text in enumerate(self.texts):
+            for word in _WORD.findall(fold(text)):
+                self.postings.setdefault(word, set()).add(i)
+        self.variants: Dict[str, List[str]] = {}  # deletion -> words
+        for word in self.postings:
+            if len(word) >= FUZZY_MIN_LENGTH:
+                for variant in _deletes(word):
+                    self.variants.setdefault(variant, []).append(word)
+
+    def similar_words(self, word: str) -> Dict[str, int]:
+        """Indexed words within one edit of `word` -> edits (0 or 1)."""
+        if len(word) < FUZZY_MIN_LENGTH:
+            return {word: 0} if word in self.postings else {}
+        found = {}
+        for variant in _deletes(word):
+            for candidate in self.variants.get(variant, ()):
+                if candidate not in found and within_one_edit(word, candidate):
+                    found[candidate] = 0 if candidate == word else 1
+        return found
+
+    def search(self, query: str) -> List[int]:
+        """
+        Ids of the texts where every word of `query` appears with at most
+        one typo, fewest typos first (then the shortest texts).
+        """
+        words = _WORD.findall(fold(query))
+        if not words:
+            return []
+
+        matches = [self.similar_words(word) for word in words]
+        # Rarest word first: later words only look at texts that are still in
+        matches.sort(key=lambda found: sum(len(self.postings[w]) for w in found))
+
+        edits: Optional[Dict[int, int]] = None
+        for found in matches:
+            best: Dict[int, int] = {}
+            for candidate, distance in found.items():
+                ids = self.postings[candidate]
+                if edits is not None and len(edits) < len(ids):
+                    ids = [i for i in edits if i in ids]
+                for i in ids:
+                    if distance < best.get(i, 2):
+                        best[i] = distance
+            if edits is None:
+                edits = best
+            else:
+                edits = {i: edits[i] + d for i, d in best.items() if i in edits}
+            if not edits:
+                return []
+
+        return sorted(edits, key=lambda i: (edits[i], len(self.texts[i]), i))
+
+def fuzzy_search(texts: Sequence[str], query: str, org_index: Optional[dict] = None) -> List[int]:
+    """
+    FuzzyIndex.search over `texts`. The FuzzyIndex is built on first use and
+    kept in memory inside `org_index` (never saved), so a long-running
+    process that reuses the same index dict builds it once per org.
+    """
+    if org_index is None:
+        return FuzzyIndex(texts).search(query)
+    if "_fuzzy" not in org_index:
+        org_index["_fuzzy"] = FuzzyIndex(texts)
+    return org_index["_fuzzy"].search(query)
+
+def coordinate_elements(org: dict) -> List[dict]:
+    """Elements of a coordinates_db.json org, in index id order."""
+    return org["text_elements"]
+
+def position_elements(org: dict) -> List[dict]:
+    """Elements of a positions_db.json org, in index id order (search priority)."""
+    return org["nombres"] + org["cargos"] + org["otros"]
+
+def build_database_index(database: dict, elements_of: Callable[[dict], List[dict]], db_path: str) -> dict:
+    """Builds the index of every org in a coordinates/positions database."""
+    return {
+        "version": INDEX_VERSION,
+        "database": os.path.basename(db_path),
+        "organigramas": {
+            org_id: build_trigram_index([e["text"] for e in elements_of(org)])
+            for org_id, org in database["organigramas"].items()
+        }
+    }
+
+def load_org_index(db_path: str, org_id: str) -> Optional[dict]:
+    """Index of one org, or None if there is no index file for the database."""
+    path = index_path_for(db_path)
+    if not os.path.exists(path):
+        return None
+    with open(path, 'r', encoding='utf-8') as f:
+        index = json.load(f)
+    if index.get("version") != INDEX_VERSION:
+        return None
+    return index["organigramas"].get(org_id)
@@ -0,0 +1,108 @@
+"""
+Grouping of pdfplumber words into phrases, shared by the extractors.
+
+Words are sorted by line (rounded `top`) and x, and consecutive words are
+joined while they stay on the same line (tops less than LINE_TOLERANCE
+apart) and the horizontal gap is below `max_distance`.
+
+With NumPy installed, pages of NUMPY_MIN_WORDS words or more take the
+vectorized path: the sort is a stable lexsort, group breaks come from
+comparing each word with the previous one as arrays, and the group
+bounding boxes from minimum/maximum.reduceat. Both paths give exactly the
+same groups and coordinates.
+"""
+from typing import List, Tuple
+
+LINE_TOLERANCE = 3
+# Below this the per-call cost of building arrays outweighs the loop
+NUMPY_MIN_WORDS = 64
+
+Boxes = Tuple[List[str], List[float], List[float], List[float], List[float]]
+
+def group_nearby_words(words: List[dict], max_distance: float = 5) -> List[List[dict]]:
+    """Groups (lists of words, in reading order) of horizontally close words."""
+    if not words:
+        return []
+
+    # Sort by line (y), then by x
+    sorted_words = sorted(words, key=lambda w: (round(w['top']), w['x0']))
+
+    groups = []
+    current_group = [sorted_words[0]]
+
+    for word in sorted_words[1:]:
+        last_word = current_group[-1]
+
+        # Same line and close horizontally
+        same_line = abs(word['top'] - last_word['top']) < LINE_TOLERANCE
+        close_horizontally = word['x0'] - last_word['x1'] < max_distance
+
+        if same_line and close_horizontally:
+            current_group.append(word)
+        else:
+            groups.append(current_group)
+            current_group = [word]
+
+    groups.append(current_group)
+
+    return groups
+
+def _group_boxes_python(words: List[dict], max_distance: float) -> Boxes:
+    texts, x0s, x1s, tops, bottoms = [], [], [], [], []
+    for group in group_nearby_words(words, max_distance):
+        texts.append(' '.join(word['text'] for word in group))
+        x0s.append(min(word['x0'] for word in group))
+        x1s.append(max(word['x1'] for word in group))
+        tops.append(min(word['top'] for word in group))
+        bottoms.append(max(word['bottom'] for word in group))
+    return texts, x0s, x1s, tops, bottoms
+
+def _group_boxes_numpy(words: List[dict], max_distance: float) -> Boxes:
+    import numpy as np
+
+    n = len(words)
+    x0 = np.fromiter((w['x0'] for w in words), dtype=float, count=n)
+    x1 = np.fromiter((w['x1'] for w in words), dtype=float, count=n)
+    top = np.fromiter((w['top'] for w in words), dtype=float, count=n)
+    bottom = np.fromiter((w['bottom'] for w in words), dtype=float, count=n)
+
+    # Stable, like sorted(): np.round and round() both round half to even
+    order = np.lexsort((x0, np.round(top)))
+    x0, x1, top, bottom = x0[order], x1[order], top[order], bottom[order]
+
+    joined = (np.abs(top[1:] - top[:-1]) < LINE_TOLERANCE) & (x0[1:] - x1[:-1] < max_distance)
+    starts = np.flatnonzero(np.concatenate(([True], ~joined)))
+
+    ordered_texts = [words[i]['text'] for i in order.tolist()]
+    bounds = starts.tolist() + [n]
+    texts = [' '.join(ordered_texts[a:b]) for a, b in zip(bounds, bounds[1:])]
+    return (texts,
+            np.minimum.reduceat(x0, starts).tolist(), np.maximum.reduceat(x1, starts).tolist(),
+            np.minimum.reduceat(top, starts).tolist(), np.maximum.reduceat(bottom, starts).tolist())
+
+def group_boxes(words: List[dict], max_distance: float = 5) -> Boxes:
+    """(texts, x0s, x1s, tops, bottoms) of every group, in reading order."""
+    if not words:
+        return [], [], [], [], []
+    if len(words) >= NUMPY_MIN_WORDS:
+        try:
+            return _group_boxes_numpy(words, max_distance)
+        except ImportError:
+            pass
+    return _group_boxes_python(words, max_distance)
+
+def group_elements(words: List[dict], page_height: float, max_distance: float = 5) -> List[dict]:
+    """
+    Groups as {'text', 'x', 'y', 'w', 'h'} in PDF coordinates (bottom-left
+    origin), with 2pt of margin around the words, rounded to 0.01pt.
+    """
+    elements = []
+    for text, x0, x1, top, bottom in zip(*group_boxes(words, max_distance)):
+        elements.append({
+            'text': text,
+            'x': round(x0 - 2, 2),
+            'y': round(page_height - bottom - 2, 2),
+            'w': round((x1 - x0) + 4, 2),
+            'h': round((bottom - top) + 4, 2),
+        })
+    return elements
@@ -3,7 +3,12 @@ Script para actualizar PDFs usando la base de datos de coordenadas.
 Este método es más rápido que buscar las coordenadas cada vez.
 
 Uso:
-    python update_from_db.py <org_id> "<texto_a_buscar>" "<texto_de_reemplazo>"
+    python update_from_db.py <org_id> "<texto_a_buscar>" "<texto_de_reemplazo>" [--match N] [--output <ruta|->] [--save-profile fast|compact]
+
+Si hay varias coincidencias se listan todas ordenadas por relevancia y se
+usa la primera, o la N-ésima con --match N. La búsqueda no distingue
+mayúsculas ni acentos ("Pinero" encuentra "Piñero") y, si no hay ninguna
+coincidencia, propone los textos a un error de tipeo por palabra.
 
 Ejemplo:
     python update_from_db.py "02_ORGANIGRAMA_LUCAS" "Lucas Capuano" "Diego Piñero"
@@ -11,25 +16,31 @@ Ejemplo:
 
 import sys
 import os
-import json
-import io
-import pikepdf
-from reportlab.pdfgen import canvas
+from src.overlay import apply_overlays, build_replacement_overlay
+from src.sinks import describe_output
+from src.cli import output_target, pop_option, pop_save_profile
+from src.metrics import StageTimer, org_record, report
+from src.text_index import coordinate_elements, fuzzy_search, search_texts
+from src.store import KINDS, STORE_PATH, open_database, open_org_index, page_dimensions
 
 def load_database():
     """Carga la base de datos de coordenadas."""
-    db_path = "coordinates_db.json"
+    # SQLite (orgcharts.sqlite) si existe; si no, el JSON clásico
+    database = open_database("coordinates")
     
-    if not os.path.exists(db_path):
-        print(f"❌ No se encontró la base de datos: {db_path}")
+    if database is None:
+        print(f"❌ No se encontró la base de datos ({KINDS['coordinates']['json_path']} ni {STORE_PATH})")
         print("   Ejecuta primero: python extract_coordinates.py")
         return None
     
-    with open(db_path, 'r', encoding='utf-8') as f:
-        return json.load(f)
+    return database
 
-def find_text_in_database(database, org_id, search_text):
-    """Busca un texto en la base de datos y retorna sus coordenadas."""
+def find_text_in_database(database, org_id, search_text, org_index=None, choice=1):
+    """
+    Busca un texto en la base de datos y retorna sus coordenadas.
+    Muestra todas las coincidencias ordenadas por relevancia y usa la
+    número `choice` (1 = la mejor).
+    """
     if org_id not in database['organigramas']:
         print(f"❌ Organigrama '{org_id}' no encontrado en la base de datos")
         print(f"   Organigramas disponibles: {list(database['organigramas'].keys())}")
@@ -38,95 +49,84 @@ def find_text_in_database(database, org_id, search_text):
     org = database['organigramas'][org_id]
     
     # Buscar coincidencias (puede ser texto parcial o múltiples palabras)
-    search_lower = search_text.lower()
-    matches = []
-    
-    for element in org['text_elements']:
-        if search_lower in element['text'].lower():
-            matches.append(element)
+    elements = coordinate_elements(org)
+    texts = [e['text'] for e in elements]
+    ranked = search_texts(texts, search_text, org_index)
+    if not ranked:
+        # Tolerar un error de tipeo por palabra
+        ranked = fuzzy_search(texts, search_text, org_index)
+        if ranked:
+            print(f"≈ Sin coincidencia exacta para '{search_text}', usando el texto más parecido")
+    matches = [elements[i] for i in ranked]
     
     if not matches:
         print(f"❌ No se encontró '{search_text}' en el organigrama")
         print(f"   Textos disponibles: {[e['text'] for e in org['text_elements'][:20]]}")
         return None
     
-    # Si hay múltiples coincidencias, usar la primera
+    if not 1 <= choice <= len(matches):
+        print(f"❌ Coincidencia {choice} fuera de rango (hay {len(matches)})")
+        return None
+    
+    # En documentos de varias páginas se indica la página de cada coincidencia
+    def where(e):
+        page = f" pág. {e.get('page', 0) + 1}" if len(org.get('pages', [])) > 1 else ""
+        return f"({e['x']}, {e['y']}){page}"
+    
+    # Si hay múltiples coincidencias, mostrarlas todas
     if len(matches) > 1:
-        print(f"⚠️  Se encontraron {len(matches)} coincidencias, usando la primera")
-        for i, m in enumerate(matches[:5]):
-            print(f"   {i+1}. '{m['text']}' en ({m['x']}, {m['y']})")
+        print(f"⚠️  Se encontraron {len(matches)} coincidencias, usando la número {choice}")
+        for i, m in enumerate(matches, 1):
+            marker = "→" if i == choice else " "
+            print(f"  {marker} {i}. '{m['text']}' en {where(m)}")
     
-    element = matches[0]
-    print(f"✓ Texto encontrado: '{element['text']}' en coordenadas ({element['x']}, {element['y']})")
+    element = matches[choice - 1]
+    print(f"✓ Texto encontrado: '{element['text']}' en coordenadas {where(element)}")
     
+    page = element.get('page', 0)
+    dimensions = page_dimensions(org, page)
     return {
         'x': element['x'],
         'y': element['y'],
         'w': element['w'],
         'h': element['h'],
-        'page_width': org['page_dimensions']['width'],
-        'page_height': org['page_dimensions']['height'],
+        'page': page,
+        'page_width': dimensions['width'],
+        'page_height': dimensions['height'],
         'pdf_path': org['pdf_path']
     }
 
 def generate_text_overlay(coords, replacement_text):
-    """Genera un PDF overlay con el texto de reemplazo."""
-    packet = io.BytesIO()
-    c = canvas.Canvas(packet, pagesize=(coords['page_width'], coords['page_height']))
-    
-    # 1. CUBRIR el texto original con un rectángulo blanco
-    # Usar padding mínimo para no tapar elementos adyacentes
-    padding = 0.5
-    c.setFillColorRGB(1, 1, 1)  # Blanco
-    c.rect(
-        coords['x'] - padding, 
-        coords['y'] - padding, 
-        coords['w'] + (padding * 2), 
-        coords['h'] + (padding * 2), 
-        fill=1, 
-        stroke=0
+    """Genera el overlay con el texto de reemplazo."""
+    # Cubrir con padding mínimo para no tapar elementos adyacentes
+    return build_replacement_overlay(
+        [(coords, replacement_text, 0.5)],
+        coords['page_width'],
+        coords['page_height']
     )
-    
-    # 2. ESCRIBIR el nuevo texto
-    c.setFillColorRGB(0, 0, 0)  # Negro
-    
-    font = "Helvetica-Bold"
-    font_size = 6
-    c.setFont(font, font_size)
-    
-    # Dividir texto en líneas
-    lines = replacement_text.split('\n')
-    
-    # Calcular el alto total del texto
-    total_text_height = len(lines) * font_size * 1.2
-    
-    # Centrar verticalmente el texto en la caja
-    current_y = coords['y'] + coords['h'] - ((coords['h'] - total_text_height) / 2) - font_size
-    
-    for line in lines:
-        # Centrar horizontalmente
-        text_width = c.stringWidth(line, font, font_size)
-        x_pos = coords['x'] + (coords['w'] - text_width) / 2
-        
-        c.drawString(x_pos, current_y, line)
-        current_y -= (font_size * 1.2)
-    
-    c.save()
-    packet.seek(0)
-    return packet
 
-def update_pdf_from_db(org_id, search_text, replacement_text, output_path=None):
-    """Actualiza un PDF usando coordenadas de la base de datos."""
+def update_pdf_from_db(org_id, search_text, replacement_text, output_path=None, choice=1, timer=None,
+                       save_profile=None):
+    """
+    Actualiza un PDF usando coordenadas de la base de datos.
+    Los tiempos de cada etapa se acumulan en `timer` (src/metrics.py) si se indica;
+    `save_profile` elige cómo se guarda el PDF (src/save_profiles.py).
+    """
+    timer = timer or StageTimer()
     
     # 1. Cargar base de datos
     print("📂 Cargando base de datos de coordenadas...")
-    database = load_database()
+    with timer.stage("config_load"):
+        database = load_database()
     if not database:
         return False
     
     # 2. Buscar coordenadas
     print(f"🔍 Buscando '{search_text}' en '{org_id}'...")
-    coords = find_text_in_database(database, org_id, search_text)
+    with timer.stage("search"):
+        coords = find_text_in_database(database, org_id, search_text,
+                                       open_org_index(database, "coordinates", org_id), choice)
+    database.close()  # coords ya tiene todo lo necesario
     if not coords:
         return False
     
@@ -138,46 +138,44 @@ def update_pdf_from_db(org_id, search_text, replacement_text, output_path=None):
     
     # 3. Generar overlay
     print(f"📝 Generando overlay con '{replacement_text}'...")
-    overlay_stream = generate_text_overlay(coords, replacement_text)
+    with timer.stage("render"):
+        overlay_stream = generate_text_overlay(coords, replacement_text)
+    timer.count("nodes_rendered")
     
-    # 4. Fusionar PDFs
+    # 4. Fusionar PDFs y guardar resultado
     print("🔄 Fusionando PDFs...")
-    base_pdf = pikepdf.Pdf.open(pdf_path)
-    overlay_pdf = pikepdf.Pdf.open(overlay_stream)
-    
-    base_page = base_pdf.pages[0]
-    overlay_page = overlay_pdf.pages[0]
-    
-    base_page.add_overlay(overlay_page, pikepdf.Rectangle(base_page.mediabox))
-    
-    # 5. Guardar resultado
     if not output_path:
         output_path = os.path.join("output", f"{org_id}_actualizado.pdf")
     
-    os.makedirs(os.path.dirname(output_path), exist_ok=True)
-    base_pdf.save(output_path)
+    apply_overlays(pdf_path, {coords['page']: overlay_stream}, output_path, timer, save_profile)
     
-    print(f"✅ PDF actualizado guardado en: {output_path}")
+    print(f"✅ PDF actualizado guardado en: {describe_output(output_path)}")
     return True
 
 if __name__ == "__main__":
-    if len(sys.argv) < 4:
-        print("Uso: python update_from_db.py <org_id> <texto_a_buscar> <texto_de_reemplazo>")
+    args = sys.argv[1:]
+    choice = int(pop_option(args, '--match', '1'))
+    output = pop_option(args, '--output')
+    save_profile = pop_save_profile(args)
+    
+    if len(args) < 3:
+        print("Uso: python update_from_db.py <org_id> <texto_a_buscar> <texto_de_reemplazo> [--match N] [--output <ruta|->] [--save-profile fast|compact]")
         print("\nEjemplo:")
         print('  python update_from_db.py "02_ORGANIGRAMA_LUCAS" "Lucas" "Diego Piñero"')
         print("\nPara ver organigramas disponibles, ejecuta:")
         print('  python extract_coordinates.py')
         sys.exit(1)
     
-    org_id = sys.argv[1]
-    search_text = sys.argv[2]
-    replacement_text = sys.argv[3]
+    org_id, search_text, replacement_text = args[:3]
     
-    print("=" * 60)
-    print("🔄 ACTUALIZADOR DE ORGANIGRAMAS (desde BD)")
-    print("=" * 60)
+    timer = StageTimer()
+    with output_target(output) as output_path:
+        print("=" * 60)
+        print("🔄 ACTUALIZADOR DE ORGANIGRAMAS (desde BD)")
+        print("=" * 60)
     
-    success = update_pdf_from_db(org_id, search_text, replacement_text)
+        success = update_pdf_from_db(org_id, search_text, replacement_text, output_path, choice, timer, save_profile)
+        report("update_from_db", [org_record(org_id, "ok" if success else "error", timer.timings, timer.counters)])
     
-    print("=" * 60)
+        print("=" * 60)
     sys.exit(0 if success else 1)
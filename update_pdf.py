@@ -2,154 +2,205 @@
 Script unificado para actualizar PDFs de organigramas.
 
 Uso:
-    python update_pdf.py <pdf_path> <texto_a_buscar> <texto_de_reemplazo>
+    python update_pdf.py <pdf_path> <texto_a_buscar> <texto_de_reemplazo> [<buscar> <reemplazo> ...] [--output <ruta|->] [--save-profile fast|compact]
+    python update_pdf.py <pdf_path> --map <reemplazos.json> [--output <ruta|->] [--save-profile fast|compact]
+
+Con --output - el PDF se escribe en stdout (los mensajes van a stderr).
+--save-profile fast guarda sin recomprimir; compact genera un PDF más chico y
+linealizado para la web (ver src/save_profiles.py).
 
 Ejemplo:
     python update_pdf.py "input/mi_organigrama.pdf" "Lucas Capuano" "Diego Piñero"
+
+Todos los reemplazos se buscan en todas las páginas en una sola pasada
+y el PDF se guarda una única vez.
 """
 
 import sys
 import os
 import json
-import io
-import pdfplumber
-import pikepdf
-import textwrap
-from reportlab.pdfgen import canvas
-from reportlab.lib.pagesizes import A4
+from src.matcher import AhoCorasick, find_word_matches
+from src.extraction_cache import load_pages
+from src.overlay import apply_overlays, build_replacement_overlay
+from src.sinks import describe_output
+from src.cli import output_target, pop_option, pop_save_profile
+from src.metrics import StageTimer, org_record, report
 
 def find_text_coordinates(pdf_path, search_text):
     """Encuentra las coordenadas de un texto en el PDF."""
     print(f"Buscando '{search_text}' en {pdf_path}...")
     
-    with pdfplumber.open(pdf_path) as pdf:
-        page = pdf.pages[0]
-        height = page.height
-        
-        matches = page.search(search_text)
-        
-        if not matches:
-            print(f"❌ No se encontró '{search_text}' en el PDF")
-            return None
-        
-        match = matches[0]
-        print(f"✓ Texto encontrado en coordenadas: {match}")
-        
-        # Convertir a coordenadas PDF (bottom-left origin)
-        x = match['x0'] - 2
-        y = height - match['bottom'] - 2
-        w = (match['x1'] - match['x0']) + 4
-        h = (match['bottom'] - match['top']) + 4
-        
-        return {
-            'x': x,
-            'y': y,
-            'w': w,
-            'h': h,
-            'page_height': height,
-            'page_width': page.width
-        }
+    page = load_pages(pdf_path)[0]
+    height = page['height']
+    
+    matches = find_word_matches(page['words'], AhoCorasick([search_text]))
+    
+    if not matches:
+        print(f"❌ No se encontró '{search_text}' en el PDF")
+        return None
+    
+    match = matches[0]
+    print(f"✓ Texto encontrado en coordenadas: x0={match['x0']:.2f}, top={match['top']:.2f}, "
+          f"x1={match['x1']:.2f}, bottom={match['bottom']:.2f}")
+    
+    # Convertir a coordenadas PDF (bottom-left origin)
+    x = match['x0'] - 2
+    y = height - match['bottom'] - 2
+    w = (match['x1'] - match['x0']) + 4
+    h = (match['bottom'] - match['top']) + 4
+    
+    return {
+        'x': x,
+        'y': y,
+        'w': w,
+        'h': h,
+        'page_height': height,
+        'page_width': page['width']
+    }
 
 def generate_text_overlay(coords, replacement_text, page_width, page_height):
-    """Genera un PDF overlay con el texto de reemplazo."""
-    packet = io.BytesIO()
-    c = canvas.Canvas(packet, pagesize=(page_width, page_height))
-    
-    # 1. CUBRIR el texto original con un rectángulo blanco
-    # Usar padding mínimo para no tapar elementos adyacentes
-    padding = 0.5
-    c.setFillColorRGB(1, 1, 1)  # Blanco
-    c.rect(
-        coords['x'] - padding, 
-        coords['y'] - padding, 
-        coords['w'] + (padding * 2), 
-        coords['h'] + (padding * 2), 
-        fill=1, 
-        stroke=0
+    """Genera el overlay con el texto de reemplazo."""
+    return generate_page_overlay([(coords, replacement_text)], page_width, page_height)
+
+def generate_page_overlay(replacements, page_width, page_height):
+    """Genera un único overlay con todos los reemplazos (coords, texto) de una página."""
+    # Padding mínimo para no tapar elementos adyacentes
+    return build_replacement_overlay(
+        [(coords, replacement_text, 0.5) for coords, replacement_text in replacements],
+        page_width,
+        page_height
     )
-    
-    # 2. ESCRIBIR el nuevo texto
-    c.setFillColorRGB(0, 0, 0)  # Negro
-    
-    # Configuración de fuente - más pequeña para que entre mejor
-    font = "Helvetica-Bold"
-    font_size = 6
-    c.setFont(font, font_size)
-    
-    # Dividir texto en líneas si es necesario
-    lines = replacement_text.split('\n')
-    
-    # Calcular el alto total del texto
-    total_text_height = len(lines) * font_size * 1.2
-    
-    # Centrar verticalmente el texto en la caja
-    current_y = coords['y'] + coords['h'] - ((coords['h'] - total_text_height) / 2) - font_size
-    
-    for line in lines:
-        # Centrar horizontalmente
-        text_width = c.stringWidth(line, font, font_size)
-        x_pos = coords['x'] + (coords['w'] - text_width) / 2
+
+def find_all_replacements(pdf_path, replacements):
+    """
+    Busca todos los patrones de `replacements` en todas las páginas,
+    recorriendo una sola vez el texto de cada página.
+    
+    Retorna una lista por página: {'page_index', 'page_width', 'page_height',
+    'matches': [(coords, texto_reemplazo, texto_encontrado)]}.
+    """
+    matcher = AhoCorasick(replacements.keys())
+    pages = []
+    
+    for page_index, page in enumerate(load_pages(pdf_path)):
+        height = page['height']
         
-        c.drawString(x_pos, current_y, line)
-        current_y -= (font_size * 1.2)
-    
-    c.save()
-    packet.seek(0)
-    return packet
+        matches = []
+        for match in find_word_matches(page['words'], matcher):
+            # Convertir a coordenadas PDF (bottom-left origin)
+            coords = {
+                'x': match['x0'] - 2,
+                'y': height - match['bottom'] - 2,
+                'w': (match['x1'] - match['x0']) + 4,
+                'h': (match['bottom'] - match['top']) + 4
+            }
+            matches.append((coords, replacements[match['pattern']], match['text']))
+        
+        if matches:
+            pages.append({
+                'page_index': page_index,
+                'page_width': page['width'],
+                'page_height': height,
+                'matches': matches
+            })
+    
+    return pages
 
-def update_pdf(pdf_path, search_text, replacement_text, output_path=None):
-    """Actualiza un PDF reemplazando texto."""
-    
-    # 1. Encontrar coordenadas
-    coords = find_text_coordinates(pdf_path, search_text)
-    if not coords:
+def normalize_pattern(search_text):
+    """Interpreta '\\n' literal (como llega desde la consola) como salto de línea."""
+    return search_text.replace('\\n', '\n')
+
+def update_pdf_many(pdf_path, replacements, output_path=None, timer=None, save_profile=None):
+    """
+    Actualiza un PDF aplicando todos los reemplazos {buscar: reemplazo}
+    en todas las páginas, con un único overlay por página y un único guardado.
+    Los tiempos de cada etapa se acumulan en `timer` (src/metrics.py) si se indica;
+    `save_profile` elige cómo se guarda el PDF (src/save_profiles.py).
+    """
+    timer = timer or StageTimer()
+    replacements = {normalize_pattern(k): v for k, v in replacements.items() if k}
+    if not replacements:
+        print("❌ No se indicaron textos a buscar")
         return False
     
-    # 2. Generar overlay
-    print(f"Generando overlay con '{replacement_text}'...")
-    overlay_stream = generate_text_overlay(
-        coords, 
-        replacement_text,
-        coords['page_width'],
-        coords['page_height']
-    )
-    
-    # 3. Fusionar PDFs
-    print("Fusionando PDFs...")
-    base_pdf = pikepdf.Pdf.open(pdf_path)
-    overlay_pdf = pikepdf.Pdf.open(overlay_stream)
+    # 1. Encontrar todas las coordenadas en una sola pasada
+    print(f"Buscando {len(replacements)} textos en {pdf_path}...")
+    with timer.stage("search"):
+        pages = find_all_replacements(pdf_path, replacements)
     
-    base_page = base_pdf.pages[0]
-    overlay_page = overlay_pdf.pages[0]
+    found = {m[2] for page in pages for m in page['matches']}
+    for search_text in replacements:
+        if search_text not in found:
+            print(f"❌ No se encontró '{search_text}' en el PDF")
     
-    base_page.add_overlay(overlay_page, pikepdf.Rectangle(base_page.mediabox))
+    if not pages:
+        return False
     
-    # 4. Guardar resultado
+    # 2. Generar overlays (uno por página)
+    overlays = {}
+    for page in pages:
+        for coords, replacement_text, found_text in page['matches']:
+            print(f"✓ Página {page['page_index'] + 1}: '{found_text}' -> '{replacement_text}' "
+                  f"en ({coords['x']:.2f}, {coords['y']:.2f})")
+        
+        with timer.stage("render"):
+            overlays[page['page_index']] = generate_page_overlay(
+                [(coords, replacement_text) for coords, replacement_text, _ in page['matches']],
+                page['page_width'],
+                page['page_height']
+            )
+        timer.count("nodes_rendered", len(page['matches']))
+    
+    # 3. Fusionar y guardar resultado (una sola vez)
     if not output_path:
         # Generar nombre automático
         base_name = os.path.splitext(os.path.basename(pdf_path))[0]
         output_path = os.path.join("output", f"{base_name}_actualizado.pdf")
     
-    os.makedirs(os.path.dirname(output_path), exist_ok=True)
-    base_pdf.save(output_path)
+    apply_overlays(pdf_path, overlays, output_path, timer, save_profile)
     
-    print(f"✅ PDF actualizado guardado en: {output_path}")
+    total = sum(len(page['matches']) for page in pages)
+    print(f"✅ {total} reemplazos aplicados. PDF guardado en: {describe_output(output_path)}")
     return True
 
+def update_pdf(pdf_path, search_text, replacement_text, output_path=None, timer=None, save_profile=None):
+    """Actualiza un PDF reemplazando texto (todas las apariciones, todas las páginas)."""
+    return update_pdf_many(pdf_path, {search_text: replacement_text}, output_path, timer, save_profile)
+
+def parse_replacements(args):
+    """Convierte los argumentos de consola en un diccionario {buscar: reemplazo}."""
+    if args and args[0] == '--map':
+        if len(args) != 2:
+            return None
+        with open(args[1], 'r', encoding='utf-8') as f:
+            return json.load(f)
+    
+    if not args or len(args) % 2 != 0:
+        return None
+    return dict(zip(args[0::2], args[1::2]))
+
 if __name__ == "__main__":
-    if len(sys.argv) < 4:
-        print("Uso: python update_pdf.py <pdf_path> <texto_a_buscar> <texto_de_reemplazo>")
+    args = sys.argv[1:]
+    output = pop_option(args, '--output')
+    save_profile = pop_save_profile(args)
+    replacements = parse_replacements(args[1:]) if len(args) > 1 else None
+    
+    if not replacements:
+        print("Uso: python update_pdf.py <pdf_path> <texto_a_buscar> <texto_de_reemplazo> [<buscar> <reemplazo> ...] [--output <ruta|->] [--save-profile fast|compact]")
+        print("     python update_pdf.py <pdf_path> --map <reemplazos.json> [--output <ruta|->] [--save-profile fast|compact]")
         print("\nEjemplo:")
         print('  python update_pdf.py "input/templates/02_ORGANIGRAMA_LUCAS.pdf" "Lucas Capuano" "Diego Piñero"')
         sys.exit(1)
     
-    pdf_path = sys.argv[1]
-    search_text = sys.argv[2]
-    replacement_text = sys.argv[3]
+    pdf_path = args[0]
     
     if not os.path.exists(pdf_path):
         print(f"❌ Error: El archivo {pdf_path} no existe")
         sys.exit(1)
     
-    success = update_pdf(pdf_path, search_text, replacement_text)
+    timer = StageTimer()
+    with output_target(output) as output_path:
+        success = update_pdf_many(pdf_path, replacements, output_path, timer, save_profile)
+        org_id = os.path.splitext(os.path.basename(pdf_path))[0]
+        report("update_pdf", [org_record(org_id, "ok" if success else "error", timer.timings, timer.counters)])
     sys.exit(0 if success else 1)
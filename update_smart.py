@@ -1,92 +1,117 @@
 """
 Script mejorado para actualizar PDFs usando la base de datos de posiciones.
-Verifica superposiciones automáticamente para evitar cubrir cargos u otros elementos.
+Verifica superposiciones automáticamente para evitar cubrir cargos u otros elementos,
+y ajusta el área que se cubre al recuadro del texto y a las líneas del organigrama
+(si la base se generó con sus recuadros y líneas).
 
 Uso:
-    python update_smart.py <org_id> "<texto_a_buscar>" "<texto_de_reemplazo>"
+    python update_smart.py <org_id> "<texto_a_buscar>" "<texto_de_reemplazo>" [--match N] [--output <ruta|->] [--save-profile fast|compact]
 
 Ejemplo:
     python update_smart.py "02_ORGANIGRAMA_LUCAS" "Lucas Capuano" "Diego Piñero"
+
+La búsqueda no distingue mayúsculas ni acentos y tolera un error de tipeo
+por palabra cuando no hay ninguna coincidencia exacta.
 """
 
 import sys
 import os
-import json
-import io
-import pikepdf
-from reportlab.pdfgen import canvas
+from src.overlay import apply_overlays, build_replacement_overlay
+from src.sinks import describe_output
+from src.cli import output_target, pop_option, pop_save_profile
+from src.metrics import StageTimer, org_record, report
+from src.shapes import SegmentIndex, fit_cover
+from src.spatial import GridIndex, check_overlap
+from src.text_index import fuzzy_search, position_elements, search_texts
+from src.store import KINDS, STORE_PATH, open_database, open_org_index, page_dimensions
 
 def load_positions_database():
     """Carga la base de datos de posiciones organizacionales."""
-    db_path = "positions_db.json"
+    # SQLite (orgcharts.sqlite) si existe; si no, el JSON clásico
+    database = open_database("positions")
     
-    if not os.path.exists(db_path):
-        print(f"❌ No se encontró la base de datos: {db_path}")
+    if database is None:
+        print(f"❌ No se encontró la base de datos ({KINDS['positions']['json_path']} ni {STORE_PATH})")
         print("   Ejecuta primero: python extract_positions.py")
         return None
     
-    with open(db_path, 'r', encoding='utf-8') as f:
-        return json.load(f)
+    return database
 
-def find_element_in_database(database, org_id, search_text):
-    """Busca un elemento en la base de datos."""
+def find_element_in_database(database, org_id, search_text, org_index=None, choice=1):
+    """
+    Busca un elemento en la base de datos.
+    Las coincidencias se ordenan por relevancia y, a igual relevancia,
+    se prefieren nombres, luego cargos y luego otros.
+    """
     if org_id not in database['organigramas']:
         print(f"❌ Organigrama '{org_id}' no encontrado")
-        return None
+        return None, None
     
     org = database['organigramas'][org_id]
-    search_lower = search_text.lower()
-    
-    # Buscar en nombres primero
-    for nombre in org['nombres']:
-        if search_lower in nombre['text'].lower():
-            print(f"✓ Nombre encontrado: '{nombre['text']}' en ({nombre['x']}, {nombre['y']})")
-            return nombre, org
-    
-    # Buscar en cargos
-    for cargo in org['cargos']:
-        if search_lower in cargo['text'].lower():
-            print(f"✓ Cargo encontrado: '{cargo['text']}' en ({cargo['x']}, {cargo['y']})")
-            return cargo, org
-    
-    # Buscar en otros
-    for otro in org['otros']:
-        if search_lower in otro['text'].lower():
-            print(f"✓ Texto encontrado: '{otro['text']}' en ({otro['x']}, {otro['y']})")
-            return otro, org
-    
-    print(f"❌ No se encontró '{search_text}'")
-    return None, None
+    elements = position_elements(org)
+    texts = [e['text'] for e in elements]
+    ranked = search_texts(texts, search_text, org_index)
+    if not ranked:
+        # Tolerar un error de tipeo por palabra
+        ranked = fuzzy_search(texts, search_text, org_index)
+        if ranked:
+            print(f"≈ Sin coincidencia exacta para '{search_text}', usando el texto más parecido")
+    
+    if not ranked:
+        print(f"❌ No se encontró '{search_text}'")
+        return None, None
+    
+    if not 1 <= choice <= len(ranked):
+        print(f"❌ Coincidencia {choice} fuera de rango (hay {len(ranked)})")
+        return None, None
+    
+    # En documentos de varias páginas se indica la página de cada coincidencia
+    def where(e):
+        page = f" pág. {e.get('page', 0) + 1}" if len(org.get('pages', [])) > 1 else ""
+        return f"({e['x']}, {e['y']}){page}"
+    
+    if len(ranked) > 1:
+        print(f"⚠️  Se encontraron {len(ranked)} coincidencias, usando la número {choice}")
+        for i, idx in enumerate(ranked, 1):
+            e = elements[idx]
+            marker = "→" if i == choice else " "
+            print(f"  {marker} {i}. '{e['text']}' ({e['type']}) en {where(e)}")
+    
+    element = elements[ranked[choice - 1]]
+    labels = {'NOMBRE': 'Nombre', 'CARGO': 'Cargo'}
+    print(f"✓ {labels.get(element['type'], 'Texto')} encontrado: '{element['text']}' en {where(element)}")
+    return element, org
 
-def check_overlap(box1, box2, padding=2):
-    """Verifica si dos cajas se superponen."""
-    x1_min = box1['x'] - padding
-    x1_max = box1['x'] + box1['w'] + padding
-    y1_min = box1['y'] - padding
-    y1_max = box1['y'] + box1['h'] + padding
-    
-    x2_min = box2['x'] - padding
-    x2_max = box2['x'] + box2['w'] + padding
-    y2_min = box2['y'] - padding
-    y2_max = box2['y'] + box2['h'] + padding
-    
-    if x1_max < x2_min or x2_max < x1_min or y1_max < y2_min or y2_max < y1_min:
-        return False
-    return True
+def build_overlap_index(org_data):
+    """Construye el índice espacial de un organigrama (una vez por organigrama)."""
+    all_elements = org_data['cargos'] + org_data['nombres'] + org_data['otros']
+    return GridIndex(all_elements)
 
-def find_overlapping_elements(element, org_data, padding=2):
+def find_overlapping_elements(element, org_data, padding=2, index=None):
     """Encuentra elementos que podrían superponerse con el área de reemplazo."""
-    overlapping = []
+    if index is None:
+        index = build_overlap_index(org_data)
     
-    # Verificar contra todos los elementos
-    all_elements = org_data['cargos'] + org_data['nombres'] + org_data['otros']
+    overlapping = []
     
-    for other in all_elements:
+    # check_overlap agranda ambas cajas con el padding: consultar con el doble
+    # (más un margen para redondeo) y confirmar con check_overlap
+    page = element.get('page', 0)
+    for i in index.query_box(element, 2 * padding + 1e-6):
+        other = index.boxes[i]
+        if other.get('page', 0) != page:
+            continue  # Mismas coordenadas, otra página
         if other['text'] != element['text'] and check_overlap(element, other, padding):
             overlapping.append(other)
     
     return overlapping
 
+def find_all_overlaps(org_data, padding=2):
+    """Retorna, para cada elemento del organigrama, los elementos que se le superponen."""
+    index = build_overlap_index(org_data)
+    return [(element, find_overlapping_elements(element, org_data, padding, index))
+            for element in index.boxes]
+
 def adjust_replacement_area(element, overlapping):
     """Ajusta el área de reemplazo para evitar superposiciones."""
     if not overlapping:
@@ -105,11 +130,38 @@ def adjust_replacement_area(element, overlapping):
     
     return adjusted
 
-def generate_smart_overlay(element, replacement_text, page_width, page_height, overlapping):
-    """Genera overlay inteligente que evita superposiciones."""
-    packet = io.BytesIO()
-    c = canvas.Canvas(packet, pagesize=(page_width, page_height))
-    
+def build_segment_index(shapes):
+    """Líneas del organigrama agrupadas por página, cada grupo con su SegmentIndex (una vez por organigrama)."""
+    by_page = {}
+    for segment in shapes['segments']:
+        by_page.setdefault(segment.get('page', 0), []).append(segment)
+    return {page: (segments, SegmentIndex(segments)) for page, segments in by_page.items()}
+
+def fit_to_shapes(area, element, shapes, padding, segment_index=None):
+    """
+    Área a cubrir (`area` más el padding) sin pasar del recuadro del elemento
+    ni pisar las líneas de su página. `shapes` son los recuadros y líneas del
+    organigrama (src/shapes.py) y `segment_index` sus líneas indexadas
+    (build_segment_index).
+    """
+    if segment_index is None:
+        segment_index = build_segment_index(shapes)
+    
+    cover = {'x': area['x'] - padding, 'y': area['y'] - padding,
+             'w': area['w'] + padding * 2, 'h': area['h'] + padding * 2}
+    box = shapes['boxes'][element['box']] if element.get('box') is not None else None
+    segments, index = segment_index.get(element.get('page', 0), ([], None))
+    fitted = fit_cover(cover, element, box, segments, index)
+    if any(abs(fitted[k] - cover[k]) > 0.01 for k in ('x', 'y', 'w', 'h')):
+        print(f"   📐 Área ajustada al recuadro y a las líneas del organigrama")
+    return fitted
+
+def generate_smart_overlay(element, replacement_text, page_width, page_height, overlapping, shapes=None,
+                           segment_index=None):
+    """
+    Genera overlay inteligente que evita superposiciones. Con los recuadros
+    y líneas del organigrama (`shapes`) el área cubierta además se ajusta a ellos.
+    """
     # Ajustar área si hay superposiciones
     adjusted = adjust_replacement_area(element, overlapping)
     
@@ -120,62 +172,60 @@ def generate_smart_overlay(element, replacement_text, page_width, page_height, o
     else:
         padding = 0.5
     
-    # 1. CUBRIR el texto original
-    c.setFillColorRGB(1, 1, 1)
-    c.rect(
-        adjusted['x'] - padding,
-        adjusted['y'] - padding,
-        adjusted['w'] + (padding * 2),
-        adjusted['h'] + (padding * 2),
-        fill=1,
-        stroke=0
-    )
-    
-    # 2. ESCRIBIR el nuevo texto
-    c.setFillColorRGB(0, 0, 0)
-    font = "Helvetica-Bold"
-    font_size = 6
-    c.setFont(font, font_size)
-    
-    lines = replacement_text.split('\n')
-    total_text_height = len(lines) * font_size * 1.2
-    current_y = adjusted['y'] + adjusted['h'] - ((adjusted['h'] - total_text_height) / 2) - font_size
-    
-    for line in lines:
-        text_width = c.stringWidth(line, font, font_size)
-        x_pos = adjusted['x'] + (adjusted['w'] - text_width) / 2
-        c.drawString(x_pos, current_y, line)
-        current_y -= (font_size * 1.2)
-    
-    c.save()
-    packet.seek(0)
-    return packet
+    if shapes:
+        return build_replacement_overlay([(fit_to_shapes(adjusted, element, shapes, padding, segment_index), replacement_text, 0)],
+                                         page_width, page_height)
+    return build_replacement_overlay([(adjusted, replacement_text, padding)], page_width, page_height)
 
-def update_pdf_smart(org_id, search_text, replacement_text, output_path=None):
-    """Actualiza PDF con verificación de superposiciones."""
-    
-    # 1. Cargar base de datos
-    print("📂 Cargando base de datos de posiciones...")
-    database = load_positions_database()
-    if not database:
-        return False
+def update_pdf_smart(org_id, search_text, replacement_text, output_path=None, choice=1,
+                     database=None, org_index=None, pdf_source=None, timer=None, save_profile=None,
+                     overlap_index=None, segment_index=None):
+    """
+    Actualiza PDF con verificación de superposiciones.
+    
+    Un proceso de larga duración (render_daemon.py) puede pasar la base de
+    datos y el índice ya cargados, los índices espaciales del organigrama
+    (`overlap_index` de build_overlap_index, `segment_index` de
+    build_segment_index) y el PDF base en memoria
+    (`pdf_source`, un stream), para no leerlos ni construirlos en cada pedido.
+    Los tiempos de cada etapa se acumulan en `timer` (src/metrics.py) si se indica;
+    `save_profile` elige cómo se guarda el PDF (src/save_profiles.py).
+    """
+    timer = timer or StageTimer()
+    
+    # 1. Cargar base de datos (si la abre esta función, también la cierra)
+    owns_database = database is None
+    if owns_database:
+        print("📂 Cargando base de datos de posiciones...")
+        with timer.stage("config_load"):
+            database = load_positions_database()
+        if not database:
+            return False
     
     # 2. Buscar elemento
     print(f"🔍 Buscando '{search_text}' en '{org_id}'...")
-    result = find_element_in_database(database, org_id, search_text)
+    with timer.stage("search"):
+        if org_index is None and org_id in database['organigramas']:
+            org_index = open_org_index(database, "positions", org_id)
+        result = find_element_in_database(database, org_id, search_text, org_index, choice)
+    if owns_database:
+        database.close()  # El organigrama encontrado ya está en memoria
     if not result or result[0] is None:
         return False
     
     element, org_data = result
     pdf_path = org_data['pdf_path']
     
-    if not os.path.exists(pdf_path):
-        print(f"❌ El archivo PDF no existe: {pdf_path}")
-        return False
+    if pdf_source is None:
+        if not os.path.exists(pdf_path):
+            print(f"❌ El archivo PDF no existe: {pdf_path}")
+            return False
+        pdf_source = pdf_path
     
     # 3. Verificar superposiciones
     print("🔎 Verificando superposiciones...")
-    overlapping = find_overlapping_elements(element, org_data, padding=3)
+    with timer.stage("overlaps"):
+        overlapping = find_overlapping_elements(element, org_data, padding=3, index=overlap_index)
     
     if overlapping:
         print(f"   ⚠️  {len(overlapping)} elementos cercanos detectados:")
@@ -186,50 +236,53 @@ def update_pdf_smart(org_id, search_text, replacement_text, output_path=None):
     
     # 4. Generar overlay inteligente
     print(f"📝 Generando overlay con '{replacement_text}'...")
-    overlay_stream = generate_smart_overlay(
-        element,
-        replacement_text,
-        org_data['page_dimensions']['width'],
-        org_data['page_dimensions']['height'],
-        overlapping
-    )
-    
-    # 5. Fusionar PDFs
+    page = element.get('page', 0)
+    dimensions = page_dimensions(org_data, page)
+    with timer.stage("render"):
+        overlay_stream = generate_smart_overlay(
+            element,
+            replacement_text,
+            dimensions['width'],
+            dimensions['height'],
+            overlapping,
+            org_data.get('shapes'),
+            segment_index
+        )
+    timer.count("nodes_rendered")
+    
+    # 5. Fusionar PDFs y guardar resultado
     print("🔄 Fusionando PDFs...")
-    base_pdf = pikepdf.Pdf.open(pdf_path)
-    overlay_pdf = pikepdf.Pdf.open(overlay_stream)
-    
-    base_page = base_pdf.pages[0]
-    overlay_page = overlay_pdf.pages[0]
-    
-    base_page.add_overlay(overlay_page, pikepdf.Rectangle(base_page.mediabox))
-    
-    # 6. Guardar resultado
     if not output_path:
         output_path = os.path.join("output", f"{org_id}_actualizado.pdf")
     
-    os.makedirs(os.path.dirname(output_path), exist_ok=True)
-    base_pdf.save(output_path)
+    apply_overlays(pdf_source, {page: overlay_stream}, output_path, timer, save_profile)
     
-    print(f"✅ PDF actualizado guardado en: {output_path}")
+    print(f"✅ PDF actualizado guardado en: {describe_output(output_path)}")
     return True
 
 if __name__ == "__main__":
-    if len(sys.argv) < 4:
-        print("Uso: python update_smart.py <org_id> <texto_a_buscar> <texto_de_reemplazo>")
+    args = sys.argv[1:]
+    choice = int(pop_option(args, '--match', '1'))
+    output = pop_option(args, '--output')
+    save_profile = pop_save_profile(args)
+    
+    if len(args) < 3:
+        print("Uso: python update_smart.py <org_id> <texto_a_buscar> <texto_de_reemplazo> [--match N] [--output <ruta|->] [--save-profile fast|compact]")
         print("\nEjemplo:")
         print('  python update_smart.py "02_ORGANIGRAMA_LUCAS" "Lucas Capuano" "Diego Piñero"')
         sys.exit(1)
     
-    org_id = sys.argv[1]
-    search_text = sys.argv[2]
-    replacement_text = sys.argv[3]
+    org_id, search_text, replacement_text = args[:3]
     
-    print("=" * 70)
-    print("🧠 ACTUALIZADOR INTELIGENTE DE ORGANIGRAMAS")
-    print("=" * 70)
+    timer = StageTimer()
+    with output_target(output) as output_path:
+        print("=" * 70)
+        print("🧠 ACTUALIZADOR INTELIGENTE DE ORGANIGRAMAS")
+        print("=" * 70)
     
-    success = update_pdf_smart(org_id, search_text, replacement_text)
+        success = update_pdf_smart(org_id, search_text, replacement_text, output_path, choice, timer=timer,
+                                   save_profile=save_profile)
+        report("update_smart", [org_record(org_id, "ok" if success else "error", timer.timings, timer.counters)])
     
-    print("=" * 70)
+        print("=" * 70)
     sys.exit(0 if success else 1)